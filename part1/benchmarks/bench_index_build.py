@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark GeoDataLoader index construction.
+
+Compares the array-based _build_indexes with the previous per-pair
+implementation (list membership check per (location, ancestor) pair) on
+portugal.json, on synthetic trees up to 1M nodes and on a deep chain next
+to many shallow nodes (build cost must follow the number of pairs, not
+nodes times depth).
+
+Usage:
+    python benchmarks/bench_index_build.py [--sizes 10000 100000 1000000] [--chain-depth 2000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+part1_dir = os.path.dirname(bench_dir)
+for path in (part1_dir, bench_dir):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from src.loader import GeoDataLoader
+from synthetic import synthetic_tree, write_deep_chain, write_tree
+
+
+def legacy_build_indexes(loader: GeoDataLoader):
+    """Previous index construction, kept here for comparison only."""
+    names = loader.names
+    name_ids = loader.name_ids.tolist()
+    parent_ids = loader.parent_ids.tolist()
+    by_city = {}
+    by_city_state = {}
+    
+    for loc_id, name_id in enumerate(name_ids):
+        name = names[name_id]
+        if name not in by_city:
+            by_city[name] = []
+        by_city[name].append(loc_id)
+    
+    for loc_id, name_id in enumerate(name_ids):
+        name = names[name_id]
+        ancestor_id = parent_ids[loc_id]
+        while ancestor_id >= 0:
+            key = (name, names[name_ids[ancestor_id]])
+            if key not in by_city_state:
+                by_city_state[key] = []
+            if loc_id not in by_city_state[key]:
+                by_city_state[key].append(loc_id)
+            ancestor_id = parent_ids[ancestor_id]
+    return by_city, by_city_state
+
+
+def _timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def bench(label: str, json_path: str, legacy: bool):
+    loader = GeoDataLoader(json_path)
+    pairs = sum(len(ids) for ids in loader.by_city_state.values())
+    new_time = _timed(loader._build_indexes)
+    line = (f"{label:<22} nodes={len(loader.locations):>9,}  pairs={pairs:>10,}  "
+            f"array build={new_time:8.3f}s ({new_time / pairs * 1e9:5.0f} ns/pair)")
+    if legacy:
+        by_city, by_city_state = {}, {}
+        
+        def run():
+            nonlocal by_city, by_city_state
+            by_city, by_city_state = legacy_build_indexes(loader)
+        
+        old_time = _timed(run)
+        assert by_city == loader.by_city and by_city_state == loader.by_city_state
+        line += (f"  legacy build={old_time:8.3f}s ({old_time / pairs * 1e9:5.0f} ns/pair)"
+                 f"  speedup={old_time / new_time:6.1f}x")
+    print(line, flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                        help="synthetic tree sizes (nodes)")
+    parser.add_argument('--legacy-max-nodes', type=int, default=1_000_000,
+                        help="skip the legacy implementation above this size")
+    parser.add_argument('--common-share', type=float, default=0.3,
+                        help="share of nodes named after common homonyms")
+    parser.add_argument('--chain-depth', type=int, default=2000,
+                        help="depth of the deep-chain tree (0 skips it)")
+    parser.add_argument('--chain-leaves', type=int, default=200_000,
+                        help="shallow nodes next to the deep chain")
+    args = parser.parse_args()
+    
+    bench("portugal.json", os.path.join(part1_dir, 'data', 'portugal.json'), legacy=True)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            json_path = os.path.join(tmp, f"synthetic_{size}.json")
+            write_tree(synthetic_tree(size, common_share=args.common_share), json_path)
+            bench(f"synthetic {size:,}", json_path, legacy=size <= args.legacy_max_nodes)
+        
+        if args.chain_depth:
+            json_path = os.path.join(tmp, 'deep_chain.json')
+            write_deep_chain(json_path, args.chain_depth, args.chain_leaves)
+            bench(f"deep chain {args.chain_depth:,}", json_path, legacy=False)
+
+
+if __name__ == '__main__':
+    main()
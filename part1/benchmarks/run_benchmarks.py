@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the part1 matching hot paths.
+
+Measures loader startup (JSON and snapshot), resolve() on cache hits,
+misses and the state fallback, find_common_ancestor_level(s), prefix
+search and the end-to-end GeoProcessor.process at 1k/100k/1M rows (and in
+all-candidates mode below 1M rows), on portugal.json and on a deep
+synthetic tree. Each result reports rows/sec, p50/p99 latency and peak
+traced memory, and the whole run can be written as JSON and compared with
+a previous run to spot regressions between commits.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--quick] [--output results.json]
+    python benchmarks/run_benchmarks.py --compare before.json after.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+part1_dir = os.path.dirname(bench_dir)
+for path in (part1_dir, bench_dir):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from src.loader import GeoDataLoader
+from src.prefix import PrefixIndex
+from src.processor import GeoProcessor
+from src.resolver import LocationResolver
+from synthetic import synthetic_pairs, synthetic_tree, write_tree
+
+
+FORMAT_VERSION = 1
+
+
+def measure(name: str, func: Callable[[], None], rows: int, repeat: int = 5,
+            params: Optional[dict] = None) -> dict:
+    """
+    Time a callable and trace its peak memory.
+    
+    The timed runs happen without tracemalloc (which slows allocations
+    down); one extra traced run gives the peak memory.
+    
+    Args:
+        name: Benchmark name
+        func: Callable processing `rows` rows per call
+        rows: Rows (or queries) handled by one call
+        repeat: Timed calls
+        params: Extra parameters recorded with the result
+        
+    Returns:
+        Result dict (see _result)
+    """
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter_ns()
+        func()
+        timings.append(time.perf_counter_ns() - start)
+    
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    
+    return _result(name, np.array(timings) / rows, sum(timings), rows * repeat, peak, params)
+
+
+def measure_calls(name: str, func: Callable, args: List[tuple], params: Optional[dict] = None) -> dict:
+    """
+    Time a callable once per argument tuple, for per-call latency percentiles.
+    
+    Args:
+        name: Benchmark name
+        func: Callable to time
+        args: Argument tuples, one call each
+        params: Extra parameters recorded with the result
+        
+    Returns:
+        Result dict (see _result)
+    """
+    timings = np.empty(len(args), dtype=np.int64)
+    clock = time.perf_counter_ns
+    gc.collect()
+    for i, call_args in enumerate(args):
+        start = clock()
+        func(*call_args)
+        timings[i] = clock() - start
+    
+    gc.collect()
+    tracemalloc.start()
+    try:
+        for call_args in args:
+            func(*call_args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    
+    return _result(name, timings, int(timings.sum()), len(args), peak, params)
+
+
+def _result(name: str, per_row_ns: np.ndarray, total_ns: int, rows: int, peak: int,
+            params: Optional[dict]) -> dict:
+    """Build one JSON-serializable benchmark result."""
+    return {
+        "name": name,
+        "params": params or {},
+        "rows": rows,
+        "seconds": total_ns / 1e9,
+        "rows_per_sec": rows / (total_ns / 1e9) if total_ns else 0.0,
+        "p50_us": float(np.percentile(per_row_ns, 50)) / 1e3,
+        "p99_us": float(np.percentile(per_row_ns, 99)) / 1e3,
+        "peak_mem_mb": peak / 2 ** 20,
+    }
+
+
+def bench_startup(label: str, json_path: str, tmp: str) -> List[dict]:
+    """Loader construction from JSON and from a binary snapshot."""
+    snapshot_path = os.path.join(tmp, f"{label}.snap")
+    GeoDataLoader(json_path).save_snapshot(snapshot_path)
+    params = {"hierarchy": label}
+    return [
+        measure(f"{label}/startup_json", lambda: GeoDataLoader(json_path), 1, repeat=3, params=params),
+        measure(f"{label}/startup_snapshot", lambda: GeoDataLoader.load_snapshot(snapshot_path), 1,
+                repeat=3, params=params),
+    ]
+
+
+def bench_resolve(label: str, loader: GeoDataLoader, n_queries: int) -> List[dict]:
+    """
+    resolve() latency on cache hits and on misses through each branch.
+    
+    by_city_state holds every proper ancestor, so the state fallback
+    (ancestor_scan) is only reached when the state is the location's own
+    name, e.g. ("sintra", "sintra"); an unknown state ends in all_homonyms.
+    """
+    rng = np.random.default_rng(0)
+    cities = list(loader.by_city)
+    pairs = list(loader.by_city_state)
+    params = {"hierarchy": label}
+    
+    direct = [pairs[i] for i in rng.integers(0, len(pairs), n_queries)]
+    self_states = [(city, city) for city in cities if (city, city) not in loader.by_city_state]
+    fallback = [self_states[i] for i in rng.integers(0, len(self_states), n_queries)]
+    homonyms = [(cities[i], "estado inexistente") for i in rng.integers(0, len(cities), n_queries)]
+    unknown = [(f"lugar inexistente {i}", "") for i in range(n_queries)]
+    
+    results = []
+    uncached = LocationResolver(loader, cache_size=0)
+    results.append(measure_calls(f"{label}/resolve_miss_direct", uncached.resolve, direct, params))
+    results.append(measure_calls(f"{label}/resolve_miss_fallback", uncached.resolve, fallback, params))
+    results.append(measure_calls(f"{label}/resolve_miss_homonyms", uncached.resolve, homonyms, params))
+    results.append(measure_calls(f"{label}/resolve_miss_unknown", uncached.resolve, unknown, params))
+    
+    cached = LocationResolver(loader, cache_size=len(direct))
+    for city, state in direct:
+        cached.resolve(city, state)
+    results.append(measure_calls(f"{label}/resolve_hit", cached.resolve, direct, params))
+    return results
+
+
+def bench_common_ancestor(label: str, loader: GeoDataLoader, n_pairs: int) -> List[dict]:
+    """Scalar and vectorized common ancestor level queries."""
+    rng = np.random.default_rng(1)
+    resolver = LocationResolver(loader)
+    ids_a = rng.integers(0, len(loader.locations), n_pairs)
+    ids_b = rng.integers(0, len(loader.locations), n_pairs)
+    params = {"hierarchy": label}
+    
+    scalar_pairs = [(loader.locations[int(a)], loader.locations[int(b)])
+                    for a, b in zip(ids_a[:min(n_pairs, 100_000)], ids_b)]
+    return [
+        measure_calls(f"{label}/common_ancestor_level", resolver.find_common_ancestor_level,
+                      scalar_pairs, params),
+        measure(f"{label}/common_ancestor_levels", lambda: resolver.find_common_ancestor_levels(ids_a, ids_b),
+                n_pairs, params=params),
+    ]
+
+
+def bench_prefix(label: str, loader: GeoDataLoader, n_queries: int) -> List[dict]:
+    """PrefixIndex.search latency (top 10) with and without an ancestor filter."""
+    rng = np.random.default_rng(2)
+    index = PrefixIndex(loader)
+    names = list(loader.by_city)
+    ancestors = sorted({loader.names[name_id] for name_id in loader.name_ids[loader.admin_levels <= 7].tolist()})
+    params = {"hierarchy": label, "limit": 10}
+    
+    prefixes = [names[i][:length] for i, length in zip(rng.integers(0, len(names), n_queries),
+                                                       rng.integers(1, 6, n_queries))]
+    scoped = [(prefix, ancestors[i]) for prefix, i in zip(prefixes, rng.integers(0, len(ancestors), n_queries))]
+    return [
+        measure_calls(f"{label}/prefix_search", index.search, [(prefix,) for prefix in prefixes], params),
+        measure_calls(f"{label}/prefix_search_ancestor", index.search, scoped, params),
+    ]
+
+
+def bench_process(label: str, json_path: str, sizes: List[int], candidates: bool = False) -> List[dict]:
+    """End-to-end GeoProcessor.process on synthetic pair frames."""
+    processor = GeoProcessor(json_path, candidates=candidates)
+    name = "process_candidates" if candidates else "process"
+    results = []
+    for size in sizes:
+        df = synthetic_pairs(processor.loader, size)
+        params = {"hierarchy": label, "rows": size, "candidates": candidates}
+        
+        def run():
+            processor.resolver.cache.clear()
+            processor.process(df)
+        
+        results.append(measure(f"{label}/{name}_{size}", run, size, repeat=3 if size < 1_000_000 else 1,
+                               params=params))
+    return results
+
+
+def run_suite(sizes: List[int], deep_nodes: int) -> dict:
+    """Run every benchmark and return the JSON document."""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        deep_path = os.path.join(tmp, "deep.json")
+        write_tree(synthetic_tree(deep_nodes, fanout=[20, 15, 10, 8], common_share=0.3), deep_path)
+        hierarchies = [
+            ("portugal", os.path.join(part1_dir, 'data', 'portugal.json')),
+            ("deep", deep_path),
+        ]
+        for label, json_path in hierarchies:
+            loader = GeoDataLoader(json_path)
+            for group in (bench_startup(label, json_path, tmp),
+                          bench_resolve(label, loader, 20_000),
+                          bench_common_ancestor(label, loader, 1_000_000),
+                          bench_prefix(label, loader, 20_000),
+                          bench_process(label, json_path, sizes),
+                          bench_process(label, json_path, [size for size in sizes if size < 1_000_000],
+                                        candidates=True)):
+                for result in group:
+                    print(format_result(result), flush=True)
+                    results.append(result)
+    
+    return {"format_version": FORMAT_VERSION, "environment": environment(), "results": results}
+
+
+def environment() -> dict:
+    """Describe the machine and code version the results come from."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=part1_dir,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def format_result(result: dict) -> str:
+    """One aligned line per result."""
+    return (f"{result['name']:<40} {result['rows_per_sec']:>14,.0f} rows/s  "
+            f"p50={result['p50_us']:>10.2f}us  p99={result['p99_us']:>10.2f}us  "
+            f"peak={result['peak_mem_mb']:>8.1f}MB")
+
+
+def compare(before_path: str, after_path: str, threshold: float = 0.1) -> int:
+    """
+    Print the relative change of every benchmark between two runs.
+    
+    Args:
+        before_path: Baseline JSON results
+        after_path: New JSON results
+        threshold: Relative throughput drop reported as a regression
+        
+    Returns:
+        Number of regressions
+    """
+    with open(before_path, encoding='utf-8') as f:
+        before = {r["name"]: r for r in json.load(f)["results"]}
+    with open(after_path, encoding='utf-8') as f:
+        after = json.load(f)["results"]
+    
+    regressions = 0
+    for result in after:
+        old = before.get(result["name"])
+        if old is None or not old["rows_per_sec"]:
+            print(f"{result['name']:<40} (new)")
+            continue
+        change = result["rows_per_sec"] / old["rows_per_sec"] - 1
+        memory = result["peak_mem_mb"] - old["peak_mem_mb"]
+        flag = ""
+        if change < -threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{result['name']:<40} throughput {change:+7.1%}  p99 {old['p99_us']:>9.2f} -> "
+              f"{result['p99_us']:>9.2f}us  peak {memory:+8.1f}MB{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000, 1_000_000],
+                        help="row counts for the end-to-end process benchmark")
+    parser.add_argument('--deep-nodes', type=int, default=200_000,
+                        help="size of the synthetic deep hierarchy")
+    parser.add_argument('--quick', action='store_true',
+                        help="small sizes only (1k/10k rows, 20k-node tree)")
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'),
+                        help="compare two JSON result files instead of running")
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help="throughput drop reported as a regression by --compare")
+    args = parser.parse_args()
+    
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, threshold=args.threshold) else 0)
+    
+    if args.quick:
+        args.sizes = [1_000, 10_000]
+        args.deep_nodes = 20_000
+    
+    document = run_suite(args.sizes, args.deep_nodes)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
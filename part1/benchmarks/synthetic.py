@@ -0,0 +1,148 @@
+"""
+Synthetic hierarchies and location pairs for benchmarks.
+"""
+
+import json
+import random
+from typing import List
+
+
+# Freguesia-like names that repeat all over the country, which is what
+# makes by_city / by_city_state lists long
+COMMON_NAMES = [
+    "santa maria", "sao pedro", "sao joao", "santiago", "sao martinho",
+    "sao miguel", "santa marinha", "sao salvador", "sao tiago", "sao vicente",
+    "nossa senhora da conceicao", "santo antonio", "sao mamede", "sao sebastiao",
+]
+
+
+def synthetic_tree(n_nodes: int, fanout: List[int] = None, n_names: int = 5000,
+                   common_share: float = 0.2, seed: int = 0) -> dict:
+    """
+    Build a country hierarchy in the portugal.json format.
+    
+    Levels below the country follow the Portuguese admin levels
+    (6 = district, 7 = concelho, 8 = freguesia, then 9, 10, ... for deeper
+    trees). A share of the names is drawn from COMMON_NAMES so there are
+    many homonyms.
+    
+    Args:
+        n_nodes: Approximate number of nodes
+        fanout: Children per node for each level below the root; the last
+            level is sized so the tree reaches n_nodes (default: 20 districts,
+            15 concelhos each, freguesias for the rest)
+        n_names: Size of the pool of distinct (non-common) names
+        common_share: Probability of using a common name
+        seed: Random seed
+        
+    Returns:
+        Root node dict (admin_level 2) with nested "children"
+    """
+    rng = random.Random(seed)
+    fanout = list(fanout or [20, 15])
+    inner = 1
+    width = 1
+    for f in fanout:
+        width *= f
+        inner += width
+    fanout.append(max(1, (n_nodes - inner) // width))
+    
+    pool = [f"lugar {i}" for i in range(n_names)]
+    
+    def name():
+        if rng.random() < common_share:
+            return rng.choice(COMMON_NAMES)
+        return rng.choice(pool)
+    
+    def build(depth: int) -> dict:
+        level = 5 + depth if depth else 2
+        node = {"admin_level": level}
+        if depth < len(fanout):
+            children = {}
+            while len(children) < fanout[depth]:
+                child_name = name()
+                if child_name not in children:
+                    children[child_name] = build(depth + 1)
+            node["children"] = children
+        return node
+    
+    return build(0)
+
+
+def write_tree(tree: dict, path: str):
+    """Write a synthetic hierarchy to a JSON file."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(tree, f)
+
+
+def write_deep_chain(path: str, depth: int, leaves: int):
+    """
+    Write a hierarchy with one very deep chain next to many shallow nodes.
+    
+    The root has a chain of depth nested locations and a district with
+    leaves freguesias, so the (location, ancestor) pairs are few while the
+    maximum depth is large. The JSON is written as text, since json.dump
+    recurses once per level.
+    
+    Args:
+        path: Output JSON file
+        depth: Length of the chain below the root
+        leaves: Freguesias under the shallow district
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{"admin_level": 2, "children": {"distrito": {"admin_level": 6, "children": {')
+        f.write(', '.join(f'"lugar {i}": {{"admin_level": 8}}' for i in range(leaves)))
+        f.write('}}, "cadeia 0": {"admin_level": 6')
+        f.write(''.join(f', "children": {{"cadeia {i}": {{"admin_level": 8' for i in range(1, depth)))
+        f.write('}}' * (depth - 1) + '}}}')
+
+
+def synthetic_pairs(loader, n_rows: int, missing_state_share: float = 0.3,
+                    unknown_share: float = 0.05, seed: int = 0):
+    """
+    Generate a DataFrame of location pairs drawn from a loaded hierarchy.
+    
+    Each side is a random location; its state is one of its ancestors
+    (any level below the root), missing with probability
+    missing_state_share, and the city is replaced by an unknown name with
+    probability unknown_share. Values are drawn from a pool of distinct
+    rows, so the frame has realistic repetition.
+    
+    Args:
+        loader: GeoDataLoader with the hierarchy
+        n_rows: Number of rows
+        missing_state_share: Probability of an empty state
+        unknown_share: Probability of a city that does not exist
+        seed: Random seed
+        
+    Returns:
+        DataFrame with id_1, id_2, city_1, state_1, city_2, state_2
+    """
+    import numpy as np
+    import pandas as pd
+    
+    rng = random.Random(seed)
+    n_locations = len(loader.locations)
+    pool_size = min(n_rows, 50_000)
+    
+    def side():
+        loc = loader.locations[rng.randrange(1, n_locations)]
+        if rng.random() < unknown_share:
+            return f"lugar inexistente {rng.randrange(1000)}", None
+        ancestors = loc.ancestors_names[1:-1]
+        if not ancestors or rng.random() < missing_state_share:
+            return loc.original_name, None
+        return loc.original_name, rng.choice(ancestors)
+    
+    pool = [side() for _ in range(2 * pool_size)]
+    picks = np.random.default_rng(seed).integers(0, len(pool), size=(n_rows, 2))
+    cities = np.array([city for city, _ in pool], dtype=object)
+    states = np.array([state for _, state in pool], dtype=object)
+    return pd.DataFrame({
+        'id_1': np.arange(n_rows),
+        'id_2': np.arange(n_rows) + n_rows,
+        'city_1': cities[picks[:, 0]],
+        'state_1': states[picks[:, 0]],
+        'city_2': cities[picks[:, 1]],
+        'state_2': states[picks[:, 1]],
+    })
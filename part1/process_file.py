@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Annotate a CSV/Parquet file of location pairs with expected_level and
+is_ambiguous, streaming it in chunks so files larger than memory can be
+processed with flat memory usage.
+
+Usage:
+    python process_file.py pairs.csv result.csv
+    python process_file.py pairs.parquet result.parquet --chunk-size 500000
+"""
+
+import argparse
+import os
+import sys
+
+# Add part1 directory to path to enable imports
+part1_dir = os.path.dirname(os.path.abspath(__file__))
+if part1_dir not in sys.path:
+    sys.path.insert(0, part1_dir)
+
+from src.processor import GeoProcessor
+from src.stream import process_file
+
+
+def main():
+    """Parse arguments and stream the input file through GeoProcessor."""
+    parser = argparse.ArgumentParser(description="Annotate location pairs with expected_level and is_ambiguous.")
+    parser.add_argument('input', help="input CSV or Parquet file (columns city_1, state_1, city_2, state_2)")
+    parser.add_argument('output', help="output CSV or Parquet file")
+    parser.add_argument('--chunk-size', type=int, default=100_000, help="rows per chunk (default: 100000)")
+    parser.add_argument('--input-format', choices=['csv', 'parquet'], help="default: from the file extension")
+    parser.add_argument('--output-format', choices=['csv', 'parquet'], help="default: from the file extension")
+    parser.add_argument('--json', default=os.path.join(part1_dir, 'data', 'portugal.json'),
+                        help="hierarchy JSON (default: data/portugal.json)")
+    parser.add_argument('--snapshot', help="binary snapshot of the hierarchy, created if missing or stale")
+    parser.add_argument('--fuzzy', action='store_true',
+                        help="match misspelled city names (adds an is_fuzzy column)")
+    parser.add_argument('--aliases', metavar='PATH',
+                        help="alias table of abbreviated names, e.g. data/aliases.json")
+    parser.add_argument('--candidates', action='store_true',
+                        help="evaluate every candidate combination (adds best_level, worst_level, "
+                             "candidate_count)")
+    parser.add_argument('--compact', action='store_true',
+                        help="write expected_level as int8 and the flags as booleans")
+    parser.add_argument('--pair-cache', metavar='PATH',
+                        help="pair result cache file, loaded at start and saved at the end")
+    parser.add_argument('--pair-cache-size', type=int, default=1_000_000,
+                        help="maximum cached pairs with --pair-cache (default: 1000000)")
+    parser.add_argument('--profile', metavar='PATH',
+                        help="write resolution branch counts and phase timings to a JSON file")
+    parser.add_argument('--quiet', action='store_true', help="do not report progress")
+    args = parser.parse_args()
+    
+    processor = GeoProcessor(args.json, snapshot_path=args.snapshot, fuzzy=args.fuzzy,
+                             pair_cache_size=args.pair_cache_size if args.pair_cache else 0,
+                             pair_cache_path=args.pair_cache, candidates=args.candidates,
+                             profile=args.profile is not None, aliases=args.aliases)
+    
+    def report(stats):
+        print(f"\r{stats['rows']:,} rows | {stats['chunks']} chunks | "
+              f"{stats['rows_per_sec']:,.0f} rows/s", end='', file=sys.stderr, flush=True)
+    
+    try:
+        stats = process_file(processor, args.input, args.output, chunk_size=args.chunk_size,
+                             input_format=args.input_format, output_format=args.output_format,
+                             progress=None if args.quiet else report, compact=args.compact)
+    except ImportError as e:
+        # Parquet input or output without pyarrow
+        print(f"Cannot process {args.input}: {e}", file=sys.stderr)
+        return 1
+    if args.pair_cache:
+        processor.save_pair_cache()
+    if args.profile:
+        processor.profiler.dump(args.profile, extra={"run": stats})
+    
+    if not args.quiet:
+        print(file=sys.stderr)
+        print(f"Processed {stats['rows']:,} rows in {stats['seconds']:.2f}s "
+              f"({stats['rows_per_sec']:,.0f} rows/s) -> {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Run the HTTP matching service over a warm GeoProcessor.
+
+Usage:
+    python serve.py --port 8080
+    curl -X POST localhost:8080/match -d '[{"city_1": "Sintra", "city_2": "Colares"}]'
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+# Add part1 directory to path to enable imports
+part1_dir = os.path.dirname(os.path.abspath(__file__))
+if part1_dir not in sys.path:
+    sys.path.insert(0, part1_dir)
+
+from src.processor import GeoProcessor
+from src.service import MatchService
+
+
+def main():
+    """Parse arguments, load the hierarchy once and serve until interrupted."""
+    parser = argparse.ArgumentParser(description="Serve location pair matching over HTTP.")
+    parser.add_argument('--host', default='127.0.0.1', help="interface to listen on (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8080, help="TCP port (default: 8080)")
+    parser.add_argument('--json', default=os.path.join(part1_dir, 'data', 'portugal.json'),
+                        help="hierarchy JSON (default: data/portugal.json)")
+    parser.add_argument('--snapshot', help="binary snapshot of the hierarchy, created if missing or stale")
+    parser.add_argument('--fuzzy', action='store_true',
+                        help="match misspelled city names (adds is_fuzzy to the results)")
+    parser.add_argument('--aliases', metavar='PATH',
+                        help="alias table of abbreviated names, e.g. data/aliases.json")
+    parser.add_argument('--candidates', action='store_true',
+                        help="evaluate every candidate combination (adds best_level, worst_level, "
+                             "candidate_count)")
+    parser.add_argument('--pair-cache-size', type=int, default=1_000_000,
+                        help="maximum cached pair results (default: 1000000, 0 disables)")
+    parser.add_argument('--max-batch-rows', type=int, default=50_000,
+                        help="pairs above which a micro-batch is closed (default: 50000)")
+    parser.add_argument('--max-wait-ms', type=float, default=2.0,
+                        help="milliseconds a micro-batch waits for more requests (default: 2)")
+    parser.add_argument('--profile', action='store_true',
+                        help="count resolution branches and time phases (shown in /metrics)")
+    args = parser.parse_args()
+    
+    processor = GeoProcessor(args.json, snapshot_path=args.snapshot, fuzzy=args.fuzzy,
+                             pair_cache_size=args.pair_cache_size, candidates=args.candidates,
+                             profile=args.profile, aliases=args.aliases)
+    service = MatchService(processor, host=args.host, port=args.port, max_batch_rows=args.max_batch_rows,
+                           max_wait=args.max_wait_ms / 1000)
+    
+    def ready():
+        print(f"Serving on http://{args.host}:{service.port} (POST /match, GET /health, GET /metrics)",
+              file=sys.stderr)
+    
+    try:
+        asyncio.run(service.serve_forever(ready))
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"Cannot listen on {args.host}:{args.port}: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
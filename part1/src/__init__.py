@@ -8,13 +8,20 @@ their hierarchical relationship in the Portuguese administrative structure.
 from .loader import GeoDataLoader, Location
 from .resolver import LocationResolver
 from .processor import GeoProcessor
-from .utils import normalize_name, is_empty
+from .registry import HierarchyRegistry
+from .prefix import PrefixIndex
+from .clustering import cluster_records
+from .utils import normalize_name, normalize_series, is_empty
 
 __all__ = [
     'GeoDataLoader',
     'Location',
     'LocationResolver',
     'GeoProcessor',
+    'HierarchyRegistry',
+    'PrefixIndex',
+    'cluster_records',
     'normalize_name',
+    'normalize_series',
     'is_empty'
 ]
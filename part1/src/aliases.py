@@ -0,0 +1,102 @@
+"""
+Alias (abbreviation) tables compiled into the loader's name indexes.
+"""
+
+import hashlib
+import json
+from itertools import islice, product
+from typing import Dict, Iterable, List, Mapping, Union
+
+from .utils import normalize_name
+
+# Most alias forms indexed per name (names with many abbreviable words
+# would otherwise multiply into hundreds of keys)
+MAX_VARIANTS = 64
+
+
+def load_aliases(aliases: Union[str, Mapping[str, Iterable[str]]]) -> Dict[str, List[str]]:
+    """
+    Read and normalize an alias table.
+    
+    The table maps a full word to its abbreviations, e.g.
+    {"santa": ["sta", "s"], "senhora": ["sra"]}. Words and abbreviations
+    are normalized like location names, and every abbreviation is
+    accepted with and without a trailing period ("sta" and "sta.").
+    Normalizing an already normalized table returns it unchanged.
+    
+    Args:
+        aliases: Path to a JSON file holding the table, or the table itself
+        
+    Returns:
+        Dict from normalized word to its sorted abbreviations
+        
+    Raises:
+        ValueError: If a word or abbreviation is empty or not a single word
+    """
+    if isinstance(aliases, str):
+        with open(aliases, encoding='utf-8') as f:
+            aliases = json.load(f)
+    
+    table: Dict[str, List[str]] = {}
+    for word, abbreviations in aliases.items():
+        word = _single_word(word)
+        if isinstance(abbreviations, str):
+            abbreviations = [abbreviations]
+        forms = set(table.get(word, []))
+        for abbreviation in abbreviations:
+            base = _single_word(abbreviation).rstrip('.')
+            if not base:
+                raise ValueError(f"Invalid abbreviation {abbreviation!r} of {word!r}")
+            forms.update((base, base + '.'))
+        forms.discard(word)
+        table[word] = sorted(forms)
+    return table
+
+
+def table_checksum(table: Mapping[str, List[str]]) -> str:
+    """
+    SHA-256 checksum of a normalized alias table (see load_aliases).
+    
+    Args:
+        table: Normalized alias table
+        
+    Returns:
+        Hex digest of its canonical JSON form
+    """
+    document = json.dumps(table, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(document.encode('utf-8')).hexdigest()
+
+
+def name_variants(name: str, table: Mapping[str, List[str]], limit: int = MAX_VARIANTS) -> List[str]:
+    """
+    Abbreviated forms of a normalized name.
+    
+    Every combination of its words replaced by one of their
+    abbreviations, e.g. "sao pedro do sul" -> ["s pedro do sul",
+    "s. pedro do sul"].
+    
+    Args:
+        name: Normalized name
+        table: Normalized alias table
+        limit: Most forms returned
+        
+    Returns:
+        Alias forms of name (without name itself)
+    """
+    words = name.split(' ')
+    options = [[word] + table[word] if word in table else [word] for word in words]
+    if all(len(choices) == 1 for choices in options):
+        return []
+    
+    # The first combination keeps every word, i.e. is the name itself
+    forms = (' '.join(choice) for choice in product(*options))
+    next(forms)
+    return list(islice(forms, limit))
+
+
+def _single_word(value) -> str:
+    """Normalize a table entry, which must be one word."""
+    word = normalize_name(value)
+    if not word or len(word.split()) != 1:
+        raise ValueError(f"Alias table entries must be single words, got {value!r}")
+    return word
@@ -0,0 +1,159 @@
+"""
+Clustering of location records into "same place" groups per admin level.
+"""
+
+from typing import Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .resolver import LocationResolver
+from .utils import factorize_names
+
+
+class UnionFind:
+    """Disjoint sets over 0..n-1 (union by size, path halving)."""
+    
+    def __init__(self, n: int):
+        """
+        Start with n singleton sets.
+        
+        Args:
+            n: Number of elements
+        """
+        self.parent = list(range(n))
+        self.size = [1] * n
+    
+    def find(self, x: int) -> int:
+        """Representative of the set containing x."""
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+    
+    def union(self, a: int, b: int) -> int:
+        """
+        Merge the sets containing a and b.
+        
+        Returns:
+            Representative of the merged set
+        """
+        a = self.find(a)
+        b = self.find(b)
+        if a == b:
+            return a
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+        return a
+    
+    def roots(self) -> np.ndarray:
+        """Representative of every element."""
+        return np.array([self.find(x) for x in range(len(self.parent))], dtype=np.int64)
+
+
+def cluster_records(resolver: LocationResolver, df: pd.DataFrame, levels: Iterable[int] = (6, 7, 8),
+                    city_col: str = 'city', state_col: str = 'state',
+                    merge_ambiguous: bool = True) -> pd.DataFrame:
+    """
+    Assign every record a cluster id per admin level.
+    
+    Two resolved records share the level-L cluster when their locations
+    match at level L or deeper (expected_level >= L), i.e. when they have
+    the same highest ancestor whose path reaches L (see
+    LCAIndex.block_ancestors). Records are resolved once per distinct
+    (city, state), so the cost is linear in the number of records.
+    
+    An ambiguous record belongs to every candidate's cluster at once:
+    with merge_ambiguous those clusters are merged (union-find over the
+    candidates' ancestors), otherwise only the first candidate is used,
+    like GeoProcessor.process does.
+    
+    Args:
+        resolver: LocationResolver over the loaded hierarchy
+        df: Records with a city column and an optional state column
+        levels: Admin levels to cluster at
+        city_col: Name of the city column
+        state_col: Name of the state column
+        merge_ambiguous: Merge the clusters of all candidates of
+            ambiguous records (default) instead of using the first one
+            
+    Returns:
+        DataFrame with df's index and one int64 column cluster_<level>
+        per level: cluster ids numbered 0, 1, ... in order of first
+        appearance, -1 for records that are unresolved or above the level
+    """
+    levels = list(levels)
+    with resolver.loader.lock:
+        inverse, offsets, ids = _resolve_keys(resolver, df, city_col, state_col)
+        blocks = [resolver.loader.lca_index.block_ancestors(ids, level) for level in levels]
+    
+    if not merge_ambiguous:
+        # Keep the first candidate of every key
+        counts = np.minimum(np.diff(offsets), 1)
+        firsts = offsets[:-1][counts > 0]
+        blocks = [level_blocks[firsts] for level_blocks in blocks]
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+    owners = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    
+    columns = {}
+    for level, level_blocks in zip(levels, blocks):
+        valid = level_blocks >= 0
+        nodes, block_nodes = np.unique(level_blocks[valid], return_inverse=True)
+        key_owners = owners[valid]
+        
+        # Candidates of one key are linked to the key's first valid candidate
+        first = np.flatnonzero(np.diff(key_owners, prepend=-1))
+        heads = np.repeat(block_nodes[first], np.diff(np.append(first, len(key_owners))))
+        sets = UnionFind(len(nodes))
+        linked = np.flatnonzero(heads != block_nodes)
+        for a, b in zip(heads[linked].tolist(), block_nodes[linked].tolist()):
+            sets.union(a, b)
+        
+        key_clusters = np.full(len(offsets) - 1, -1, dtype=np.int64)
+        key_clusters[key_owners[first]] = sets.roots()[block_nodes[first]]
+        columns[f'cluster_{level}'] = _renumber(key_clusters[inverse])
+    
+    return pd.DataFrame(columns, index=df.index)
+
+
+def _resolve_keys(resolver: LocationResolver, df: pd.DataFrame, city_col: str,
+                  state_col: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Resolve each distinct normalized (city, state) of df once.
+    
+    Returns:
+        Tuple of (key code per row, offsets, ids): the candidates of key k
+        are ids[offsets[k]:offsets[k + 1]]
+    """
+    city_codes, city_names = _column_codes(df, city_col)
+    state_codes, state_names = _column_codes(df, state_col)
+    keys, inverse = np.unique(city_codes * len(state_names) + state_codes, return_inverse=True)
+    
+    counts = np.zeros(len(keys), dtype=np.int64)
+    key_ids: List[int] = []
+    for i, key in enumerate(keys.tolist()):
+        city_code, state_code = divmod(key, len(state_names))
+        matches = resolver.resolve_normalized(city_names[city_code], state_names[state_code])
+        counts[i] = len(matches)
+        key_ids.extend(match.id for match in matches)
+    
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    return inverse.astype(np.int64), offsets, np.array(key_ids, dtype=np.int64)
+
+
+def _column_codes(df: pd.DataFrame, col: str) -> Tuple[np.ndarray, List[str]]:
+    """factorize_names of a column ("" for every row if it is missing)."""
+    if col not in df.columns:
+        return np.zeros(len(df), dtype=np.int64), [""]
+    return factorize_names(df[col])
+
+
+def _renumber(clusters: np.ndarray) -> np.ndarray:
+    """Number clusters 0, 1, ... in order of first appearance, keeping -1."""
+    result = np.full(len(clusters), -1, dtype=np.int64)
+    clustered = clusters >= 0
+    result[clustered] = pd.factorize(clusters[clustered])[0]
+    return result
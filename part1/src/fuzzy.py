@@ -0,0 +1,190 @@
+"""
+Typo-tolerant name lookup using a SymSpell-style deletion index.
+"""
+
+from array import array
+from typing import Iterable, List, Set, Tuple
+
+import numpy as np
+
+
+class FuzzyIndex:
+    """
+    Finds names within a small edit distance of a query.
+    
+    Every name contributes the variants of its first prefix_length
+    characters with up to max_distance characters deleted. A query
+    generates its own deletion variants and any shared variant makes the
+    name a candidate, which is then checked with the real (Damerau)
+    edit distance. Variants are stored as sorted 64-bit hashes next to the
+    owning name id, so the index is a pair of flat arrays rather than
+    millions of dict entries, and a lookup is a handful of binary searches.
+    """
+    
+    def __init__(self, names: Iterable[str], max_distance: int = 2, prefix_length: int = 7):
+        """
+        Build the index.
+        
+        Args:
+            names: Normalized names to index
+            max_distance: Largest edit distance supported by lookup()
+            prefix_length: Characters of each name used for the deletion
+                variants (longer prefixes mean fewer candidates to verify
+                but a larger index)
+        """
+        self.names = list(names)
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        
+        hashes = array('q')
+        counts = np.empty(len(self.names), dtype=np.int64)
+        for i, name in enumerate(self.names):
+            variants = _deletes(name[:prefix_length], max_distance)
+            hashes.extend(hash(variant) for variant in variants)
+            counts[i] = len(variants)
+        
+        hashes = np.frombuffer(hashes, dtype=np.int64)
+        owners = np.repeat(np.arange(len(self.names), dtype=np.int32), counts)
+        order = np.argsort(hashes, kind='stable')
+        self._hashes = hashes[order]
+        self._owners = owners[order]
+        self._lengths = np.fromiter((len(name) for name in self.names), dtype=np.int32,
+                                    count=len(self.names))
+        self._histograms = _histograms(self.names, self._lengths)
+    
+    def lookup(self, term: str, max_distance: int = None) -> List[Tuple[str, int]]:
+        """
+        Find indexed names within an edit distance of a term.
+        
+        The distance allowed is capped by the term length (one edit per
+        four characters), so very short names do not match everything.
+        
+        Args:
+            term: Normalized query name
+            max_distance: Largest edit distance (default and upper bound:
+                the index's max_distance)
+                
+        Returns:
+            List of (name, distance) sorted by distance, then name
+        """
+        if max_distance is None or max_distance > self.max_distance:
+            max_distance = self.max_distance
+        max_distance = min(max_distance, len(term) // 4)
+        
+        variants = _deletes(term[:self.prefix_length], max_distance)
+        hashes = np.fromiter((hash(variant) for variant in variants), dtype=np.int64, count=len(variants))
+        starts = np.searchsorted(self._hashes, hashes, side='left')
+        stops = np.searchsorted(self._hashes, hashes, side='right')
+        
+        candidates = np.concatenate([self._owners[start:stop] for start, stop in zip(starts, stops)])
+        candidates = np.unique(candidates[np.abs(self._lengths[candidates] - len(term)) <= max_distance])
+        
+        # Character-count lower bound: every edit adds and/or removes at
+        # most one character, which rejects most candidates before the
+        # (pure Python) distance computation
+        diff = self._histograms[candidates].astype(np.int16) - _histograms([term], [len(term)])[0]
+        added = np.where(diff > 0, diff, 0).sum(axis=1)
+        removed = np.where(diff < 0, -diff, 0).sum(axis=1)
+        candidates = candidates[np.maximum(added, removed) <= max_distance]
+        
+        matches = []
+        for name_id in candidates.tolist():
+            name = self.names[name_id]
+            distance = edit_distance(term, name, max_distance)
+            if distance <= max_distance:
+                matches.append((name, distance))
+        matches.sort(key=lambda match: (match[1], match[0]))
+        return matches
+    
+    def memory_bytes(self) -> int:
+        """Size of the index arrays in bytes."""
+        return (self._hashes.nbytes + self._owners.nbytes + self._lengths.nbytes
+                + self._histograms.nbytes)
+
+
+def _histograms(names: List[str], lengths) -> np.ndarray:
+    """
+    Character counts per name over 32 buckets (code point modulo 32).
+    
+    Lowercase letters get one bucket each; other characters share
+    buckets, which only makes the bound derived from them looser.
+    """
+    codes = np.frombuffer("".join(names).encode('utf-32-le'), dtype=np.uint32) & 31
+    owners = np.repeat(np.arange(len(names), dtype=np.int64), lengths)
+    counts = np.bincount(owners * 32 + codes, minlength=len(names) * 32)
+    return np.minimum(counts, 255).astype(np.uint8).reshape(len(names), 32)
+
+
+def _deletes(word: str, max_distance: int) -> Set[str]:
+    """All variants of word with up to max_distance characters deleted (word included)."""
+    variants = {word}
+    frontier = [word]
+    for _ in range(max_distance):
+        next_frontier = []
+        for item in frontier:
+            for i in range(len(item)):
+                variant = item[:i] + item[i + 1:]
+                if variant not in variants:
+                    variants.add(variant)
+                    next_frontier.append(variant)
+        frontier = next_frontier
+    return variants
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Optimal string alignment distance (Levenshtein plus transpositions).
+    
+    Stops as soon as the distance is known to exceed max_distance.
+    
+    Args:
+        a: First string
+        b: Second string
+        max_distance: Bound of interest
+        
+    Returns:
+        The distance, or max_distance + 1 if it is larger than max_distance
+    """
+    if a == b:
+        return 0
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    
+    # Shared prefixes and suffixes never cost edits
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < len(a) - start and end < len(b) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a = a[start:len(a) - end]
+    b = b[start:len(b) - end]
+    if not a or not b:
+        return min(len(a) + len(b), max_distance + 1)
+    
+    # Only cells within max_distance of the diagonal can stay in bounds
+    bound = max_distance + 1
+    previous_previous = None
+    previous = [j if j < bound else bound for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [bound] * (len(b) + 1)
+        current[0] = i if i < bound else bound
+        row_min = current[0]
+        char_a = a[i - 1]
+        for j in range(max(1, i - max_distance), min(len(b), i + max_distance) + 1):
+            value = previous[j - 1] + (char_a != b[j - 1])
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if (previous_previous is not None and j > 1 and char_a == b[j - 2]
+                    and a[i - 2] == b[j - 1] and previous_previous[j - 2] + 1 < value):
+                value = previous_previous[j - 2] + 1
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > max_distance:
+            return bound
+        previous_previous, previous = previous, current
+    
+    return min(previous[-1], bound)
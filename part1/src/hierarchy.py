@@ -0,0 +1,414 @@
+"""
+Precomputed hierarchy indexes built over the loader's parent array.
+"""
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+class LCAIndex:
+    """
+    Lowest-common-ancestor index using binary lifting.
+
+    up[k][v] is the 2**k-th ancestor of v (the root is its own ancestor),
+    so a query lifts the deeper node to the same depth and then both nodes
+    together in O(log depth) steps. Queries are vectorized over arrays of
+    location ids.
+    """
+
+    def __init__(self, parent_ids: np.ndarray, admin_levels: np.ndarray):
+        """
+        Build the index.
+
+        Args:
+            parent_ids: Parent id per location (-1 for roots)
+            admin_levels: Admin level per location
+        """
+        n = len(parent_ids)
+        self.admin_levels = admin_levels
+
+        parent = np.asarray(parent_ids, dtype=np.int64)
+        self.roots = np.flatnonzero(parent < 0)
+        parent = np.where(parent < 0, np.arange(n), parent)
+
+        depths, by_depth = _depths(parent, self.roots)
+        max_depth = int(depths.max()) if n else 0
+
+        # Arrays live in buffers with spare capacity so update() can append
+        # nodes; the public attributes are views over the first n entries
+        self._depths_buffer = depths
+        self._path_max_buffer = np.asarray(admin_levels, dtype=np.int16).copy()
+
+        # up[k] = 2**k-th ancestor; stored as int32 to keep the table small
+        self._up_buffer = np.empty((max(1, max_depth.bit_length()), n), dtype=np.int32)
+        self._up_buffer[0] = parent
+        for k in range(1, len(self._up_buffer)):
+            self._up_buffer[k] = self._up_buffer[k - 1][self._up_buffer[k - 1]]
+        self._set_size(n)
+        self._preorder = None
+        self._level_orders = {}
+
+        # Deepest admin_level along the path root -> v (inclusive)
+        for nodes in by_depth[1:]:
+            self.path_max_level[nodes] = np.maximum(self.path_max_level[nodes],
+                                                    self.path_max_level[parent[nodes]])
+
+    def _set_size(self, n: int):
+        """Point the public arrays at the first n entries of the buffers."""
+        self.size = n
+        self.depths = self._depths_buffer[:n]
+        self.path_max_level = self._path_max_buffer[:n]
+        self.up = self._up_buffer[:, :n]
+
+    def update(self, parent_ids: np.ndarray, admin_levels: np.ndarray, levels: List[np.ndarray]):
+        """
+        Recompute the entries of nodes that were added or re-parented.
+
+        Only the given nodes are touched, so the cost is proportional to
+        the changed subtree (the table is rebuilt from scratch only when
+        the tree gets deeper than it can lift).
+
+        Args:
+            parent_ids: Parent id per location after the change (may be
+                longer than before)
+            admin_levels: Admin level per location after the change
+            levels: Changed node ids grouped so that every node's parent is
+                either unchanged or in an earlier group (e.g. the subtree's
+                breadth-first levels)
+        """
+        n = len(parent_ids)
+        if n > len(self._depths_buffer):
+            self._grow(max(n, 2 * len(self._depths_buffer)))
+        self._set_size(n)
+        self.admin_levels = admin_levels
+        self._preorder = None
+        self._level_orders = {}
+
+        for nodes in levels:
+            nodes = np.asarray(nodes, dtype=np.int64)
+            parent = parent_ids[nodes].astype(np.int64)
+            is_root = parent < 0
+            parent = np.where(is_root, nodes, parent)
+            levels_here = admin_levels[nodes].astype(np.int16)
+            self.depths[nodes] = np.where(is_root, 0, self.depths[parent] + 1)
+            self.path_max_level[nodes] = np.where(is_root, levels_here,
+                                                  np.maximum(levels_here, self.path_max_level[parent]))
+            self.up[0][nodes] = parent
+            for k in range(1, len(self.up)):
+                self.up[k][nodes] = self.up[k - 1][self.up[k - 1][nodes]]
+
+        if n and int(self.depths.max()) >= 1 << len(self.up):
+            self.__init__(parent_ids, admin_levels)
+
+    def _grow(self, capacity: int):
+        """Reallocate the buffers with room for capacity nodes."""
+        n = self.size
+        depths = np.zeros(capacity, dtype=self._depths_buffer.dtype)
+        depths[:n] = self.depths
+        path_max = np.zeros(capacity, dtype=self._path_max_buffer.dtype)
+        path_max[:n] = self.path_max_level
+        up = np.zeros((len(self._up_buffer), capacity), dtype=self._up_buffer.dtype)
+        up[:, :n] = self.up
+        self._depths_buffer, self._path_max_buffer, self._up_buffer = depths, path_max, up
+
+    @property
+    def preorder(self) -> np.ndarray:
+        """
+        Preorder rank of every node (siblings in id order, roots one after
+        another), computed on first use and again after update().
+
+        Every subtree occupies a contiguous range of ranks, so the lowest
+        common ancestor of a set of nodes is the one of its first and last
+        nodes in this order.
+        """
+        if self._preorder is None:
+            ranks, sizes = _preorder(self.up[0].astype(np.int64), self.depths)
+            order = np.empty(len(ranks), dtype=np.int64)
+            order[ranks] = np.arange(len(ranks))
+            self._preorder = ranks, sizes, order
+        return self._preorder[0]
+
+    @property
+    def subtree_sizes(self) -> np.ndarray:
+        """
+        Number of nodes in the subtree of every node (itself included).
+
+        The descendants of v are exactly the nodes ranked in
+        [preorder[v], preorder[v] + subtree_sizes[v]).
+        """
+        self.preorder
+        return self._preorder[1]
+
+    @property
+    def by_preorder(self) -> np.ndarray:
+        """Node ids sorted by preorder rank (by_preorder[preorder[v]] == v)."""
+        self.preorder
+        return self._preorder[2]
+
+    def subtree_range(self, ancestor_id: int) -> Tuple[int, int]:
+        """
+        Nested-set interval of a node.
+
+        Args:
+            ancestor_id: Node id
+
+        Returns:
+            Preorder ranks [low, high) of the node and its descendants
+        """
+        low = int(self.preorder[ancestor_id])
+        return low, low + int(self.subtree_sizes[ancestor_id])
+
+    def is_within(self, ids: np.ndarray, ancestor_id: int, proper: bool = False) -> np.ndarray:
+        """
+        Vectorized containment test: two comparisons per node.
+
+        Args:
+            ids: Node ids (-1 for unresolved)
+            ancestor_id: Node id of the container
+            proper: Do not count the container as within itself
+
+        Returns:
+            Boolean array, True where the node is in the container's subtree
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        low, high = self.subtree_range(ancestor_id)
+        ranks = self.preorder[np.maximum(ids, 0)]
+        return (ids >= 0) & (ranks >= low + proper) & (ranks < high)
+
+    def descendants(self, ancestor_id: int, level: Optional[int] = None) -> np.ndarray:
+        """
+        Proper descendants of a node, in preorder.
+
+        Args:
+            ancestor_id: Node id
+            level: Only return nodes of this admin level
+
+        Returns:
+            int64 array of node ids, a contiguous slice (view) of
+            by_preorder, or of the level's nodes in preorder when a level
+            is given
+        """
+        low, high = self.subtree_range(ancestor_id)
+        if level is None:
+            return self.by_preorder[low + 1:high]
+        ranks, ids = self._level_order(level)
+        return ids[np.searchsorted(ranks, low + 1):np.searchsorted(ranks, high)]
+
+    def _level_order(self, level: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(ranks, ids) of the nodes of one admin level in preorder, cached."""
+        cached = self._level_orders.get(level)
+        if cached is None:
+            order = self.by_preorder
+            ids = order[self.admin_levels[order] == level]
+            cached = self._level_orders[level] = (self.preorder[ids], ids)
+        return cached
+
+    def lca(self, ids_a: np.ndarray, ids_b: np.ndarray) -> np.ndarray:
+        """
+        Lowest common ancestor of each pair (ids_a[i], ids_b[i]).
+
+        Args:
+            ids_a: Location ids
+            ids_b: Location ids (same length as ids_a)
+
+        Returns:
+            int64 array of ancestor ids (-1 when the pair has no common
+            ancestor, i.e. the locations are in different trees)
+        """
+        a = np.asarray(ids_a, dtype=np.int64).copy()
+        b = np.asarray(ids_b, dtype=np.int64).copy()
+
+        # Make a the deeper node of each pair
+        swap = self.depths[a] < self.depths[b]
+        a[swap], b[swap] = b[swap], a[swap]
+
+        # Lift a to the depth of b
+        diff = self.depths[a] - self.depths[b]
+        for k in range(len(self.up)):
+            step = (diff >> k) & 1 == 1
+            a[step] = self.up[k][a[step]]
+
+        # Lift both while their ancestors differ
+        for k in range(len(self.up) - 1, -1, -1):
+            up_a = self.up[k][a]
+            up_b = self.up[k][b]
+            move = up_a != up_b
+            a[move] = up_a[move]
+            b[move] = up_b[move]
+
+        parent_a = self.up[0][a]
+        return np.where(a == b, a, np.where(parent_a == self.up[0][b], parent_a, -1))
+
+    def lca_one(self, a: int, b: int) -> int:
+        """
+        Scalar version of lca() for a single pair.
+
+        Args:
+            a: Location id
+            b: Location id
+
+        Returns:
+            Lowest common ancestor id, or -1 if there is none
+        """
+        depths = self.depths
+        up = self.up
+        if depths[a] < depths[b]:
+            a, b = b, a
+        diff = int(depths[a] - depths[b])
+        k = 0
+        while diff:
+            if diff & 1:
+                a = int(up[k][a])
+            diff >>= 1
+            k += 1
+        if a == b:
+            return a
+        for k in range(len(up) - 1, -1, -1):
+            if up[k][a] != up[k][b]:
+                a = int(up[k][a])
+                b = int(up[k][b])
+        return int(up[0][a]) if up[0][a] == up[0][b] else -1
+
+    def common_ancestor_levels(self, ids_a: np.ndarray, ids_b: np.ndarray) -> np.ndarray:
+        """
+        Highest admin_level where each pair of locations shares an ancestor.
+
+        Same semantics as LocationResolver.find_common_ancestor_level:
+        when one location contains the other, the container's level;
+        otherwise the deepest level among common ancestors, at least 2.
+        Pairs with a negative id (unresolved location) get level 2.
+
+        Args:
+            ids_a: Location ids (-1 for unresolved)
+            ids_b: Location ids (-1 for unresolved)
+
+        Returns:
+            int64 array of admin levels
+        """
+        ids_a = np.asarray(ids_a, dtype=np.int64)
+        ids_b = np.asarray(ids_b, dtype=np.int64)
+        levels = np.full(len(ids_a), 2, dtype=np.int64)
+
+        valid = (ids_a >= 0) & (ids_b >= 0)
+        a = ids_a[valid]
+        b = ids_b[valid]
+        common = self.lca(a, b)
+
+        found = common >= 0
+        contained = found & ((common == a) | (common == b))
+        shared = found & ~contained
+
+        valid_levels = np.full(len(a), 2, dtype=np.int64)
+        valid_levels[contained] = self.admin_levels[common[contained]]
+        valid_levels[shared] = np.maximum(2, self.path_max_level[common[shared]])
+        levels[valid] = valid_levels
+        return levels
+
+    def block_ancestors(self, ids: np.ndarray, min_level: int) -> np.ndarray:
+        """
+        Highest ancestor (or self) whose path reaches min_level.
+
+        path_max_level never decreases going down, so the ancestors of v
+        with path_max_level >= min_level form a chain from v up to one
+        node. Two locations share that node exactly when their common
+        ancestor has path_max_level >= min_level, which makes it a
+        blocking key for pairs matching at min_level or deeper.
+
+        Args:
+            ids: Location ids (-1 for unresolved)
+            min_level: Admin level
+
+        Returns:
+            int64 array of ancestor ids (-1 for unresolved locations and
+            locations whose path never reaches min_level)
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        blocks = np.full(len(ids), -1, dtype=np.int64)
+        valid = np.flatnonzero(ids >= 0)
+        valid = valid[self.path_max_level[ids[valid]] >= min_level]
+
+        # Lift as far as the path still reaches min_level
+        nodes = ids[valid]
+        for k in range(len(self.up) - 1, -1, -1):
+            up = self.up[k][nodes]
+            move = self.path_max_level[up] >= min_level
+            nodes[move] = up[move]
+        blocks[valid] = nodes
+        return blocks
+
+
+def _preorder(parent: np.ndarray, depths: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Preorder rank per node, level by level instead of with a DFS.
+
+    Subtree sizes are accumulated bottom-up; a node's rank is then its
+    parent's rank plus one plus the sizes of its earlier siblings.
+
+    Args:
+        parent: Parent per node (roots point to themselves)
+        depths: Depth per node
+
+    Returns:
+        Tuple of int64 arrays (rank per node, subtree size per node)
+    """
+    n = len(parent)
+    order = np.argsort(depths, kind='stable')
+    bounds = np.searchsorted(depths[order], np.arange(int(depths.max(initial=0)) + 2)).tolist()
+    levels = [order[start:stop] for start, stop in zip(bounds, bounds[1:])]
+
+    sizes = np.ones(n, dtype=np.int64)
+    for nodes in reversed(levels[1:]):
+        np.add.at(sizes, parent[nodes], sizes[nodes])
+
+    ranks = np.zeros(n, dtype=np.int64)
+    if not n:
+        return ranks, sizes
+    roots = levels[0]
+    ranks[roots] = np.cumsum(sizes[roots]) - sizes[roots]
+    for nodes in levels[1:]:
+        # Siblings next to each other, in id order
+        nodes = nodes[np.argsort(parent[nodes], kind='stable')]
+        parents = parent[nodes]
+        before = np.cumsum(sizes[nodes]) - sizes[nodes]
+        first = np.flatnonzero(np.r_[True, parents[1:] != parents[:-1]])
+        before -= np.repeat(before[first], np.diff(np.r_[first, len(nodes)]))
+        ranks[nodes] = ranks[parents] + 1 + before
+    return ranks, sizes
+
+
+def _depths(parent: np.ndarray, roots: np.ndarray) -> Tuple[np.ndarray, list]:
+    """
+    Compute node depths breadth-first from the roots.
+
+    Args:
+        parent: Parent per node (roots point to themselves)
+        roots: Root node ids
+
+    Returns:
+        Tuple of (depth per node, list of node arrays per depth)
+    """
+    n = len(parent)
+    depths = np.zeros(n, dtype=np.int32)
+
+    # Children grouped by parent, as a CSR over a stable sort
+    non_roots = np.flatnonzero(parent != np.arange(n))
+    children = non_roots[np.argsort(parent[non_roots], kind='stable')]
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(parent[non_roots], minlength=n), out=offsets[1:])
+
+    by_depth = []
+    frontier = roots
+    depth = 0
+    while len(frontier):
+        depths[frontier] = depth
+        by_depth.append(frontier)
+        starts = offsets[frontier]
+        counts = offsets[frontier + 1] - starts
+        if not counts.sum():
+            break
+        # Gather the children of every frontier node
+        positions = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        frontier = children[positions]
+        depth += 1
+    return depths, by_depth
@@ -0,0 +1,245 @@
+"""
+Incremental JSON parsing into a flat stream of events.
+
+Events follow ijson's basic_parse format, so ijson (with its C backend)
+is used when installed:
+
+    ('start_map', None), ('map_key', key), ('end_map', None),
+    ('start_array', None), ('end_array', None),
+    ('string', str), ('number', int | float), ('boolean', bool), ('null', None)
+    
+The built-in tokenizer keeps memory flat but is about 7-10x slower than
+json.load, so without ijson open_document parses documents of up to
+IN_MEMORY_LIMIT bytes with json.loads instead, and only larger (or deeper
+than json.loads supports) documents pay the tokenizer's cost.
+"""
+
+import codecs
+import json
+import re
+from typing import Iterator, Optional, Tuple
+
+CHUNK_SIZE = 1 << 20
+
+# Largest document parsed in memory (json.loads) when ijson is missing
+IN_MEMORY_LIMIT = 1 << 24
+
+_TOKEN = re.compile(
+    r'[ \t\n\r]*(?:'
+    r'([{}\[\]:,])'                                      # punctuation
+    r'|"([^"\\]*(?:\\.[^"\\]*)*)"'                       # string
+    r'|(-?(?:0|[1-9][0-9]*)(\.[0-9]+)?([eE][+-]?[0-9]+)?)'  # number
+    r'|(true|false|null))',                              # literal
+    re.S
+)
+
+# Characters that may still extend a number matched at the end of a chunk
+_NUMBER_TAIL = re.compile(r'[0-9.eE+-]*')
+
+_LITERALS = {'true': ('boolean', True), 'false': ('boolean', False), 'null': ('null', None)}
+
+
+def iter_events(f, chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[str, object]]:
+    """
+    Parse a JSON document from a binary file incrementally.
+    
+    Args:
+        f: Binary file object (anything with read(size))
+        chunk_size: Bytes read at a time by the built-in tokenizer
+        
+    Returns:
+        Iterator of (event, value) tuples
+    """
+    try:
+        import ijson
+    except ImportError:
+        return _iter_events(f, chunk_size)
+    return ijson.basic_parse(f, use_float=True)
+
+
+def open_document(f, chunk_size: int = CHUNK_SIZE) -> Tuple[object, Optional[Iterator[Tuple[str, object]]]]:
+    """
+    Parse a JSON document, in memory when that is the faster option.
+    
+    Without ijson, a document of at most IN_MEMORY_LIMIT bytes is parsed
+    by json.loads, which is several times faster than the built-in
+    tokenizer; larger or deeper documents are streamed as events.
+    
+    Args:
+        f: Binary file object (anything with read(size))
+        chunk_size: Bytes read at a time by the built-in tokenizer
+        
+    Returns:
+        Tuple of (document, None) when the document was parsed in memory,
+        or (None, event iterator as from iter_events)
+    """
+    try:
+        import ijson
+    except ImportError:
+        pass
+    else:
+        return None, ijson.basic_parse(f, use_float=True)
+    
+    head = f.read(IN_MEMORY_LIMIT + 1)
+    if len(head) <= IN_MEMORY_LIMIT:
+        try:
+            return json.loads(head), None
+        except RecursionError:
+            pass  # Nested deeper than json.loads supports
+    return None, _iter_events(f, chunk_size, head)
+
+
+def _iter_events(f, chunk_size: int, head: bytes = b"") -> Iterator[Tuple[str, object]]:
+    """
+    Built-in tokenizer behind iter_events (no validation beyond nesting).
+    
+    Args:
+        f: Binary file object
+        chunk_size: Bytes read at a time
+        head: Bytes already read from the start of f
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ""
+    eof = False
+    containers = []  # True for objects, False for arrays
+    expect_key = False
+    
+    while not eof:
+        chunk, head = head or f.read(chunk_size), b""
+        eof = not chunk
+        buffer += decoder.decode(chunk, final=eof)
+        
+        # Tokens are matched one after another from the start of the
+        # buffer; the last one may continue in the next chunk, so it is
+        # kept for the next round unless the file is over
+        scanner = _TOKEN.scanner(buffer)
+        end = 0
+        match = scanner.match()
+        while match is not None:
+            group = match.lastindex
+            if not eof and (match.end() == len(buffer) or (
+                    group == 3 and _NUMBER_TAIL.match(buffer, match.end()).end() == len(buffer))):
+                break
+            end = match.end()
+            if group == 1:
+                punct = match.group(1)
+                if punct == '{':
+                    containers.append(True)
+                    expect_key = True
+                    yield 'start_map', None
+                elif punct == ',':
+                    expect_key = bool(containers) and containers[-1]
+                elif punct == '}' or punct == ']':
+                    if not containers or containers.pop() != (punct == '}'):
+                        raise ValueError(f"Unexpected {punct!r} in JSON document")
+                    expect_key = False
+                    yield ('end_map' if punct == '}' else 'end_array'), None
+                elif punct == '[':
+                    containers.append(False)
+                    yield 'start_array', None
+            elif group == 2:
+                string = match.group(2)
+                if '\\' in string:
+                    string = json.loads(f'"{string}"')
+                if expect_key:
+                    expect_key = False
+                    yield 'map_key', string
+                else:
+                    yield 'string', string
+            elif group == 6:
+                yield _LITERALS[match.group(6)]
+            else:
+                number, fraction, exponent = match.group(3, 4, 5)
+                yield 'number', float(number) if fraction or exponent else int(number)
+            match = scanner.match()
+        buffer = buffer[end:]
+    
+    if buffer.strip():
+        raise ValueError(f"Invalid JSON near {buffer[:40]!r}")
+    if containers:
+        raise ValueError("Unexpected end of JSON document")
+
+
+def build_value(events: Iterator[Tuple[str, object]], event: str, value=None):
+    """
+    Materialize one JSON value from an event stream, iteratively.
+    
+    Args:
+        events: Event iterator positioned right after the value's first event
+        event: First event of the value
+        value: Value of the first event
+        
+    Returns:
+        The Python object (dict, list or scalar)
+    """
+    if event not in ('start_map', 'start_array'):
+        return value
+    
+    root = {} if event == 'start_map' else []
+    stack = [root]
+    key = None
+    for event, value in events:
+        container = stack[-1]
+        if event == 'map_key':
+            key = value
+            continue
+        if event in ('end_map', 'end_array'):
+            stack.pop()
+            if not stack:
+                return root
+            continue
+        if event == 'start_map':
+            value = {}
+        elif event == 'start_array':
+            value = []
+        if isinstance(container, dict):
+            container[key] = value
+        else:
+            container.append(value)
+        if event in ('start_map', 'start_array'):
+            stack.append(value)
+    raise ValueError("Unexpected end of JSON document")
+
+
+def skip_value(events: Iterator[Tuple[str, object]], event: str):
+    """
+    Consume the rest of a JSON value from an event stream.
+    
+    Args:
+        events: Event iterator positioned right after the value's first event
+        event: First event of the value
+    """
+    if event not in ('start_map', 'start_array'):
+        return
+    depth = 1
+    for event, _ in events:
+        if event in ('start_map', 'start_array'):
+            depth += 1
+        elif event in ('end_map', 'end_array'):
+            depth -= 1
+            if not depth:
+                return
+    raise ValueError("Unexpected end of JSON document")
+
+
+class HashingReader:
+    """Binary file wrapper that feeds everything read through it to a hash."""
+    
+    def __init__(self, f, hasher):
+        """
+        Args:
+            f: Binary file object
+            hasher: hashlib object updated with the bytes read
+        """
+        self._f = f
+        self._hasher = hasher
+    
+    def read(self, size: int = -1) -> bytes:
+        data = self._f.read(size)
+        self._hasher.update(data)
+        return data
+    
+    def drain(self):
+        """Read (and hash) whatever the parser left unread."""
+        while self.read(CHUNK_SIZE):
+            pass
@@ -2,13 +2,41 @@
 Loader module to parse portugal.json and build lookup structures.
 """
 
-import json
-from typing import Dict, List, Tuple, Optional
-from .utils import normalize_name
+import hashlib
+import operator
+import os
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_left
+from itertools import product
+from typing import Dict, Iterable, List, Mapping, Set, Tuple, Optional, Union
+
+import numpy as np
+
+from .aliases import load_aliases, name_variants, table_checksum
+from .utils import normalize_name, gc_paused
+from .hierarchy import LCAIndex
+from .jsonstream import HashingReader, build_value, open_document, skip_value
+from .snapshot import (SnapshotError, file_checksum, read_snapshot, write_snapshot,
+                       encode_strings, decode_strings)
+
+
+# Name of the root node (the JSON root object has no name of its own)
+DEFAULT_ROOT_NAME = "portugal"
 
 
 class Location:
-    """Represents a geographic location with its hierarchy."""
+    """
+    Represents a geographic location with its hierarchy.
+    
+    Locations built directly hold their own fields; the locations of a
+    GeoDataLoader are views over its arrays (see _view).
+    """
+    
+    __slots__ = ('id', 'name', 'original_name', 'admin_level', 'parent_id',
+                 'ancestors', 'ancestors_names', 'ancestors_levels')
     
     def __init__(self, id: int, name: str, admin_level: int, parent_id: Optional[int] = None):
         self.id = id
@@ -20,46 +48,344 @@ class Location:
         self.ancestors_names = []  # List of ancestor names
         self.ancestors_levels = []  # List of ancestor levels
     
+    @classmethod
+    def _view(cls, loader: 'GeoDataLoader', id: int) -> 'Location':
+        """Location id of loader, read from its arrays."""
+        return _LocationView(loader, id)
+    
     def __repr__(self):
         return f"Location(id={self.id}, name='{self.name}', level={self.admin_level})"
 
 
+class _LocationView(Location):
+    """
+    Lightweight view of one location stored in a GeoDataLoader.
+    
+    The data lives in the loader's arrays (struct-of-arrays); a view only
+    holds the loader and its id, and ancestor chains are derived from
+    parent_ids on access.
+    """
+    
+    __slots__ = ('_loader',)
+    
+    def __init__(self, loader: 'GeoDataLoader', id: int):
+        self._loader = loader
+        self.id = id
+    
+    @property
+    def name(self) -> str:
+        """Normalized name."""
+        return self._loader.names[self._loader.name_ids[self.id]]
+    
+    @property
+    def original_name(self) -> str:
+        """Name as it appears in the source JSON."""
+        return self._loader.names[self._loader.original_name_ids[self.id]]
+    
+    @property
+    def admin_level(self) -> int:
+        return int(self._loader.admin_levels[self.id])
+    
+    @property
+    def parent_id(self) -> Optional[int]:
+        parent_id = int(self._loader.parent_ids[self.id])
+        return None if parent_id < 0 else parent_id
+    
+    @property
+    def ancestors(self) -> List[int]:
+        """Ancestor IDs from this location up to the root (including self)."""
+        return self._loader.ancestor_ids(self.id)
+    
+    @property
+    def ancestors_names(self) -> List[str]:
+        """Ancestor names from this location up to the root."""
+        names = self._loader.names
+        name_ids = self._loader.name_ids
+        return [names[name_ids[ancestor_id]] for ancestor_id in self.ancestors]
+    
+    @property
+    def ancestors_levels(self) -> List[int]:
+        """Ancestor levels from this location up to the root."""
+        admin_levels = self._loader.admin_levels
+        return [int(admin_levels[ancestor_id]) for ancestor_id in self.ancestors]
+    
+    def __eq__(self, other):
+        if not isinstance(other, _LocationView):
+            return NotImplemented
+        return self.id == other.id and self._loader is other._loader
+    
+    def __hash__(self):
+        return hash(self.id)
+
+
+class LocationStore:
+    """Read-only sequence of Location views indexed by location id."""
+    
+    __slots__ = ('_loader',)
+    
+    def __init__(self, loader: 'GeoDataLoader'):
+        self._loader = loader
+    
+    def __len__(self):
+        return len(self._loader.parent_ids)
+    
+    def __getitem__(self, loc_id):
+        if isinstance(loc_id, slice):
+            return [Location._view(self._loader, i) for i in range(len(self))[loc_id]]
+        loc_id = operator.index(loc_id)
+        if not 0 <= loc_id < len(self):
+            raise IndexError(f"Location id {loc_id} out of range")
+        return Location._view(self._loader, loc_id)
+    
+    def __iter__(self):
+        loader = self._loader
+        return (Location._view(loader, loc_id) for loc_id in range(len(self)))
+    
+    def __contains__(self, item):
+        if isinstance(item, _LocationView):
+            return item._loader is self._loader and 0 <= item.id < len(self)
+        return isinstance(item, (int, np.integer)) and 0 <= item < len(self)
+    
+    def get(self, loc_id: int, default=None) -> Optional[Location]:
+        """Return the Location for loc_id, or default if it does not exist."""
+        return self[loc_id] if loc_id in self else default
+
+
 class GeoDataLoader:
     """Loads and indexes geographic data from JSON."""
     
-    def __init__(self, json_path: str):
+    def __init__(self, json_path: str, snapshot_path: Optional[str] = None,
+                 root_name: str = DEFAULT_ROOT_NAME,
+                 aliases: Union[str, Mapping[str, Iterable[str]], None] = None):
         """
         Initialize loader and parse JSON file.
         
         Args:
             json_path: Path to portugal.json file
+            snapshot_path: Optional path to a binary snapshot (see
+                save_snapshot). A valid snapshot of the same JSON is loaded
+                instead of parsing; otherwise the JSON is parsed and the
+                snapshot is (re)written.
+            root_name: Name given to the root node (the country)
+            aliases: Optional alias table (path to a JSON file or mapping,
+                see aliases.load_aliases). The abbreviated forms of every
+                name are added to by_city and by_city_state as keys of
+                their own; snapshots record the table's checksum.
         """
+        self._init_structures(json_path, root_name, aliases)
+        
+        if snapshot_path is not None and self._load_snapshot(snapshot_path, verify_source=True):
+            return
+        
+        self._load_and_index()
+        
+        if snapshot_path is not None:
+            self.save_snapshot(snapshot_path)
+    
+    def _init_structures(self, json_path: str, root_name: str = DEFAULT_ROOT_NAME,
+                         aliases: Union[str, Mapping[str, Iterable[str]], None] = None):
+        """Initialize empty location arrays and indexes."""
         self.json_path = json_path
-        self.locations: List[Location] = []
-        self.locations_by_id: Dict[int, Location] = {}
+        self.root_name = root_name
+        self.source_checksum: Optional[str] = None  # SHA-256 of the JSON file
+        
+        # Normalized alias table (word -> abbreviations) and its checksum
+        self.aliases: Dict[str, List[str]] = load_aliases(aliases) if aliases else {}
+        self.aliases_checksum: Optional[str] = table_checksum(self.aliases) if self.aliases else None
+        
+        # Interned name table shared by normalized and original names
+        self.names: List[str] = []
+        self.name_index: Dict[str, int] = {}  # name -> position in names
+        
+        # Struct-of-arrays location store, indexed by location id
+        self.parent_ids = np.empty(0, dtype=np.int32)  # -1 for the root
+        self.admin_levels = np.empty(0, dtype=np.int8)
+        self.name_ids = np.empty(0, dtype=np.int32)
+        self.original_name_ids = np.empty(0, dtype=np.int32)
+        
+        # Location views over the arrays (both names kept for compatibility)
+        self.locations = LocationStore(self)
+        self.locations_by_id = self.locations
+        
+        # Hierarchy indexes (see _build_hierarchy_indexes)
+        self.lca_index: Optional[LCAIndex] = None
+        self.depths = np.empty(0, dtype=np.int32)
         self.by_city: Dict[str, List[int]] = {}  # normalized_name -> [location_ids]
         self.by_city_state: Dict[Tuple[str, str], List[int]] = {}  # (city, state) -> [location_ids]
         
-        self._load_and_index()
+        # Incremental updates (see add_subtree): removed ids stay allocated
+        # but leave the indexes; version changes on every update and lock
+        # serializes updates with readers such as GeoProcessor.process
+        self.removed: Set[int] = set()
+        self.version = 0
+        self.lock = threading.RLock()
+        self._children: Optional[Dict[int, List[int]]] = None
+        self._buffers: Optional[Tuple[np.ndarray, ...]] = None
+    
+    @classmethod
+    def load_snapshot(cls, snapshot_path: str, json_path: Optional[str] = None,
+                      root_name: Optional[str] = None,
+                      aliases: Union[str, Mapping[str, Iterable[str]], None] = None) -> 'GeoDataLoader':
+        """
+        Load a loader from a binary snapshot, rebuilding it if stale.
+        
+        The snapshot embeds the checksum of the JSON it was built from. If
+        the source JSON (json_path, or the path recorded in the snapshot)
+        exists and no longer matches, or the snapshot is missing/corrupt,
+        the JSON is parsed again and the snapshot rewritten.
+        
+        Args:
+            snapshot_path: Path to the snapshot file
+            json_path: Path to the source JSON (defaults to the recorded one)
+            root_name: Name of the root node (defaults to the recorded one)
+            aliases: Alias table (defaults to the recorded one; {} for none)
+            
+        Returns:
+            GeoDataLoader instance
+            
+        Raises:
+            SnapshotError: If the snapshot is unusable and there is no
+                source JSON to rebuild it from
+        """
+        if json_path is None or root_name is None or aliases is None:
+            try:
+                metadata, _ = read_snapshot(snapshot_path)
+            except SnapshotError:
+                if json_path is None:
+                    raise
+                metadata = {}
+            json_path = json_path or metadata["json_path"]
+            root_name = root_name or metadata.get("root_name", DEFAULT_ROOT_NAME)
+            aliases = metadata.get("aliases") if aliases is None else aliases
+        
+        if os.path.exists(json_path):
+            return cls(json_path, snapshot_path=snapshot_path, root_name=root_name, aliases=aliases)
+        
+        # No source to compare against or rebuild from: trust the snapshot
+        loader = cls.__new__(cls)
+        loader._init_structures(json_path, root_name)
+        if not loader._load_snapshot(snapshot_path, verify_source=False):
+            raise SnapshotError(f"Snapshot {snapshot_path} is unusable and {json_path} does not exist")
+        return loader
     
     def _load_and_index(self):
         """Load JSON and build all indexes."""
-        with open(self.json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
+        # Column buffers filled by the parser
+        self._parsed = (array('i'), array('i'), array('i'), array('i'))
+        self._parsed_base = 0
         
-        # Parse the tree structure - start with "portugal" as the root
-        self._parse_tree(data, parent_id=None, parent_name=None, node_name="portugal")
+        # Stream the file: the checksum is computed on the bytes as they
+        # are parsed, and only small files (see open_document) are
+        # materialized as a dict tree
+        hasher = hashlib.sha256()
+        with open(self.json_path, 'rb') as f:
+            reader = HashingReader(f, hasher)
+            document, events = open_document(reader)
+            if events is not None:
+                self._parse_events(events)
+            elif isinstance(document, dict):
+                self._parse_tree(document, parent_id=None, parent_name=None, node_name=self.root_name)
+            else:
+                raise ValueError(f"{self.json_path}: the hierarchy must be a JSON object")
+            reader.drain()
+        self.source_checksum = hasher.hexdigest()
         
-        # Build ancestor chains
-        self._build_ancestors()
+        # Freeze the parsed columns into compact arrays
+        parent_ids, admin_levels, name_ids, original_name_ids = self._parsed
+        del self._parsed
+        self.parent_ids = np.frombuffer(parent_ids, dtype=np.int32).copy()
+        self.admin_levels = np.frombuffer(admin_levels, dtype=np.int32).astype(np.int8)
+        self.name_ids = np.frombuffer(name_ids, dtype=np.int32).copy()
+        self.original_name_ids = np.frombuffer(original_name_ids, dtype=np.int32).copy()
         
         # Build indexes
         self._build_indexes()
+        self._build_hierarchy_indexes()
+    
+    def _intern(self, name: str) -> int:
+        """Return the id of name in the name table, adding it if new."""
+        name_id = self.name_index.get(name)
+        if name_id is None:
+            name_id = len(self.names)
+            self.name_index[name] = name_id
+            self.names.append(name)
+        return name_id
+    
+    def _add_location(self, parent_id: Optional[int], name: str, admin_level: int) -> int:
+        """Append a location to the parsed columns and return its id."""
+        parent_ids, admin_levels, name_ids, original_name_ids = self._parsed
+        loc_id = self._parsed_base + len(parent_ids)
+        parent_ids.append(-1 if parent_id is None else parent_id)
+        admin_levels.append(admin_level)
+        name_ids.append(self._intern(normalize_name(name)))
+        original_name_ids.append(self._intern(name))
+        return loc_id
+    
+    def _parse_events(self, events):
+        """
+        Build the location columns from a stream of JSON events.
+        
+        Nodes are numbered in preorder as soon as their admin_level is
+        read, using an explicit stack instead of recursion. A node whose
+        children come before its admin_level (or that is named by a "name"
+        field instead of its key) is materialized and handed to _parse_tree.
+        
+        Args:
+            events: Event iterator (see jsonstream.iter_events)
+        """
+        events = iter(events)
+        event, _ = next(events, (None, None))
+        if event != 'start_map':
+            raise ValueError(f"{self.json_path}: the hierarchy must be a JSON object")
+        
+        # Frames: [is_children_map, loc_id, name, parent_id]. loc_id stays
+        # None until the node's admin_level is known.
+        stack = [[False, None, self.root_name, None]]
+        for event, value in events:
+            frame = stack[-1]
+            if event == 'end_map':
+                stack.pop()
+                if not stack:
+                    return
+                continue
+            
+            if frame[0]:
+                # Key of a child node inside a "children" object
+                event, _ = next(events)
+                if event != 'start_map':
+                    skip_value(events, event)
+                elif value:
+                    stack.append([False, None, value, frame[1]])
+                else:
+                    node = build_value(events, event)
+                    self._parse_tree(node, parent_id=frame[1], parent_name=None, node_name=value)
+                continue
+            
+            # Key of a node's own field
+            event, field = next(events)
+            if value == 'admin_level' and frame[1] is None and field is not None:
+                frame[1] = self._add_location(frame[3], frame[2], field)
+            elif value == 'children' and event == 'start_map':
+                if frame[1] is not None:
+                    stack.append([True, frame[1], None, None])
+                    continue
+                # admin_level not seen yet: materialize the rest of the node
+                children = build_value(events, 'start_map')
+                node = build_value(events, 'start_map')
+                node["children"] = children
+                stack.pop()
+                self._parse_tree(node, parent_id=frame[3], parent_name=None, node_name=frame[2])
+                if not stack:
+                    return
+            else:
+                skip_value(events, event)
     
     def _parse_tree(self, node: dict, parent_id: Optional[int], parent_name: Optional[str], node_name: Optional[str] = None):
         """
-        Recursively parse the JSON tree structure.
+        Parse a JSON (sub)tree already loaded as dicts.
+        
+        Nodes are visited in preorder with an explicit stack, so deep
+        trees do not hit the recursion limit.
         
         Args:
             node: Current node in the tree
@@ -67,75 +393,529 @@ class GeoDataLoader:
             parent_name: Name of the parent location (for state context)
             node_name: Name of this node (used when name is a dict key)
         """
-        # Determine the name - either from parameter, "name" field, or default
-        name = node_name or node.get("name", "")
-        admin_level = node.get("admin_level")
+        pending = [(node, parent_id, node_name)]
+        while pending:
+            node, parent_id, node_name = pending.pop()
+            if not isinstance(node, dict):
+                continue
+            
+            # Determine the name - either from parameter, "name" field, or default
+            name = node_name or node.get("name", "")
+            admin_level = node.get("admin_level")
+            
+            # Skip if no admin_level (invalid node)
+            if admin_level is None:
+                continue
+            
+            loc_id = self._add_location(parent_id, name, admin_level)
+            
+            # Children are pushed in reverse so they are visited in order
+            children = node.get("children")
+            if children:
+                pending.extend((child_node, loc_id, child_name)
+                               for child_name, child_node in reversed(list(children.items())))
+    
+    def ancestor_ids(self, loc_id: int) -> List[int]:
+        """
+        Build the ancestor chain of a location from the parent array.
+        
+        Args:
+            loc_id: Location id
+            
+        Returns:
+            Ancestor IDs from loc_id up to the root (including loc_id)
+        """
+        parent_ids = self.parent_ids
+        ancestors = []
+        current = loc_id
+        while current >= 0:
+            ancestors.append(current)
+            current = int(parent_ids[current])
+        return ancestors
+    
+    def is_within(self, ids, ancestor_id: int, proper: bool = False) -> np.ndarray:
+        """
+        Vectorized containment test against the nested-set (preorder
+        interval) labels of LCAIndex.
         
-        # Skip if no admin_level (invalid node)
-        if admin_level is None:
+        Args:
+            ids: Location ids (-1 for unresolved)
+            ancestor_id: Id of the containing location
+            proper: Do not count the location as within itself
+            
+        Returns:
+            Boolean array, True where the location is inside ancestor_id
+            (False for unresolved and removed locations)
+        """
+        with self.lock:
+            self._check_location(ancestor_id)
+            within = self.lca_index.is_within(ids, ancestor_id, proper=proper)
+            if self.removed:
+                within &= ~np.isin(ids, list(self.removed))
+            return within
+    
+    def descendants(self, ancestor_id: int, level: Optional[int] = None) -> np.ndarray:
+        """
+        All locations under a location, without walking the tree.
+        
+        Args:
+            ancestor_id: Location id
+            level: Only return locations of this admin level
+            
+        Returns:
+            int64 array of location ids in preorder (a contiguous range of
+            the preorder arrays, see LCAIndex.descendants)
+        """
+        with self.lock:
+            self._check_location(ancestor_id)
+            ids = self.lca_index.descendants(ancestor_id, level)
+            if self.removed:
+                ids = ids[~np.isin(ids, list(self.removed))]
+            return ids
+    
+    def _build_hierarchy_indexes(self):
+        """Build the precomputed structures over parent_ids (LCA index)."""
+        self.lca_index = LCAIndex(self.parent_ids, self.admin_levels)
+        self.depths = self.lca_index.depths
+    
+    def _build_indexes(self):
+        """
+        Build lookup indexes.
+        
+        Both indexes are built with array operations in time linear in the
+        total ancestor-chain length (plus a sort of the keys): every
+        (location, ancestor) pair is generated level by level from
+        parent_ids, duplicates are dropped after grouping instead of with
+        per-key list membership checks, and each key's ids stay in
+        ascending location order.
+        """
+        n = len(self.parent_ids)
+        n_names = max(len(self.names), 1)
+        names = np.array(self.names, dtype=object)
+        name_ids = self.name_ids.astype(np.int64)
+        
+        with gc_paused():
+            # Index by city name
+            keys, id_lists = self._group_ids(name_ids, np.arange(n, dtype=np.int64))
+            self.by_city = dict(zip(names[keys].tolist(), id_lists))
+            
+            # Index by (city, ancestor) for ALL ancestors
+            # This allows state to be any level (district, concelho, etc)
+            loc_ids, ancestor_ids = self._ancestor_pairs()
+            keys, id_lists = self._group_ids(name_ids[loc_ids] * n_names + name_ids[ancestor_ids], loc_ids)
+            city_state_keys = zip(names[keys // n_names].tolist(), names[keys % n_names].tolist())
+            self.by_city_state = dict(zip(city_state_keys, id_lists))
+            
+            if self.aliases:
+                self._add_alias_keys()
+    
+    def _add_alias_keys(self):
+        """
+        Add the alias forms of every indexed name as keys of their own.
+        
+        A form gets the ids of the name it abbreviates, in both indexes
+        (for the city, the state or both), so an abbreviated input is the
+        same single dict hit as a full name. A form shared by several
+        names (or equal to a real name) holds the union of their ids.
+        """
+        forms = {}
+        for name in self.by_city:
+            name_forms = self._name_forms(name)
+            if len(name_forms) > 1:
+                forms[name] = name_forms
+        if not forms:
             return
         
-        # Create location
-        loc_id = len(self.locations)
-        normalized_name = normalize_name(name)
-        loc = Location(id=loc_id, name=normalized_name, admin_level=admin_level, parent_id=parent_id)
-        loc.original_name = name
-        
-        self.locations.append(loc)
-        self.locations_by_id[loc_id] = loc
-        
-        # Process children
-        if "children" in node and node["children"]:
-            for child_name, child_node in node["children"].items():
-                # Recursively process child with its name
-                self._parse_tree(child_node, parent_id=loc_id, parent_name=normalized_name, node_name=child_name)
-    
-    def _build_ancestors(self):
-        """Build ancestor chains for all locations."""
-        for loc in self.locations:
-            # Build ancestor chain from this location up to root
-            ancestors = []
-            ancestors_names = []
-            ancestors_levels = []
-            
-            current = loc
-            while current is not None:
-                ancestors.append(current.id)
-                ancestors_names.append(current.name)
-                ancestors_levels.append(current.admin_level)
+        # Read the source lists first: merged keys get new lists
+        city_sources = [(name_forms, self.by_city[name]) for name, name_forms in forms.items()]
+        city_state_sources = [(key, ids) for key, ids in self.by_city_state.items()
+                              if key[0] in forms or key[1] in forms]
+        for name_forms, ids in city_sources:
+            for form in name_forms[1:]:
+                _merge_sorted(self.by_city, form, ids)
+        for (city, state), ids in city_state_sources:
+            keys = product(forms.get(city, [city]), forms.get(state, [state]))
+            next(keys)
+            for key in keys:
+                _merge_sorted(self.by_city_state, key, ids)
+    
+    def _name_forms(self, name: str) -> List[str]:
+        """A normalized name followed by its alias forms (interned)."""
+        if not self.aliases:
+            return [name]
+        forms = [name] + name_variants(name, self.aliases)
+        for form in forms[1:]:
+            self._intern(form)
+        return forms
+    
+    def _ancestor_pairs(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Enumerate every (location, proper ancestor) pair.
+        
+        The tree is climbed one step at a time from a frontier holding
+        only the locations whose chain has not reached the root yet, so
+        time and memory are linear in the number of pairs (not in the
+        number of locations times the maximum depth).
+        
+        Returns:
+            Tuple of int64 arrays (loc_ids, ancestor_ids) ordered by
+            location id, then from the nearest ancestor to the root
+        """
+        parent_ids = self.parent_ids.astype(np.int64)
+        n = len(parent_ids)
+        steps = []
+        lengths = np.zeros(n, dtype=np.int64)
+        locs = np.flatnonzero(parent_ids >= 0)
+        current = parent_ids[locs]
+        while len(locs):
+            steps.append((locs, current))
+            lengths[locs] += 1
+            up = parent_ids[current]
+            active = up >= 0
+            locs, current = locs[active], up[active]
+        
+        # Step k of a location's chain goes to position starts[loc] + k
+        starts = np.cumsum(lengths) - lengths
+        ancestor_ids = np.empty(int(lengths.sum()), dtype=np.int64)
+        for k, (step_locs, step_ancestors) in enumerate(steps):
+            ancestor_ids[starts[step_locs] + k] = step_ancestors
+        return np.repeat(np.arange(n, dtype=np.int64), lengths), ancestor_ids
+    
+    @staticmethod
+    def _group_ids(keys: np.ndarray, loc_ids: np.ndarray) -> Tuple[np.ndarray, List[List[int]]]:
+        """
+        Group location ids by integer key.
+        
+        Args:
+            keys: int64 key per entry
+            loc_ids: Location id per entry (non-decreasing)
+            
+        Returns:
+            Tuple of (distinct keys in order of first appearance, list of
+            distinct location ids for each key)
+        """
+        # Stable sort keeps location ids ascending within each key
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        sorted_ids = loc_ids[order]
+        
+        # Drop repeated (key, location) entries, which are now adjacent
+        keep = np.ones(len(order), dtype=bool)
+        keep[1:] = (sorted_keys[1:] != sorted_keys[:-1]) | (sorted_ids[1:] != sorted_ids[:-1])
+        order, sorted_keys, sorted_ids = order[keep], sorted_keys[keep], sorted_ids[keep]
+        
+        is_start = np.ones(len(order), dtype=bool)
+        is_start[1:] = sorted_keys[1:] != sorted_keys[:-1]
+        starts = np.flatnonzero(is_start)
+        bounds = np.append(starts, len(order)).tolist()
+        first_seen = np.argsort(order[starts], kind='stable')
+        
+        # Slice the groups sequentially, then reorder them by first appearance
+        ids = sorted_ids.tolist()
+        id_lists = [ids[start:end] for start, end in zip(bounds, bounds[1:])]
+        id_lists = [id_lists[g] for g in first_seen.tolist()]
+        return sorted_keys[starts][first_seen], id_lists
+    
+    def add_subtree(self, parent_id: int, name: str, node: dict) -> int:
+        """
+        Add a location (with its descendants) under an existing location.
+        
+        Args:
+            parent_id: Id of the new parent
+            name: Name of the new location
+            node: Node in the JSON format, e.g.
+                {"admin_level": 8} or {"admin_level": 7, "children": {...}}
                 
-                # Move to parent
-                if current.parent_id is not None:
-                    current = self.locations_by_id[current.parent_id]
-                else:
-                    current = None
+        Returns:
+            Id of the new location; descendants get the following ids in
+            preorder
+            
+        Raises:
+            KeyError: If the parent does not exist
+            ValueError: If the node has no admin_level
+        """
+        with self.lock:
+            self._check_location(parent_id)
+            self._parsed = (array('i'), array('i'), array('i'), array('i'))
+            self._parsed_base = len(self.parent_ids)
+            self._parse_tree(node, parent_id=parent_id, parent_name=None, node_name=name)
+            parsed = self._parsed
+            del self._parsed
+            if not parsed[0]:
+                raise ValueError(f"Location {name!r} has no admin_level")
             
-            loc.ancestors = ancestors
-            loc.ancestors_names = ancestors_names
-            loc.ancestors_levels = ancestors_levels
+            first_id = len(self.parent_ids)
+            new_ids = range(first_id, first_id + len(parsed[0]))
+            self._append_locations(parsed)
+            children = self._children_map()
+            for loc_id in new_ids:
+                children.setdefault(int(self.parent_ids[loc_id]), []).append(loc_id)
+            
+            self._index_add(new_ids)
+            self.lca_index.update(self.parent_ids, self.admin_levels, self._subtree_levels(first_id))
+            self.depths = self.lca_index.depths
+            self.version += 1
+            return first_id
     
-    def _build_indexes(self):
-        """Build lookup indexes."""
-        # Index by city name
-        for loc in self.locations:
-            if loc.name not in self.by_city:
-                self.by_city[loc.name] = []
-            self.by_city[loc.name].append(loc.id)
-        
-        # Index by (city, ancestor) for ALL ancestors
-        # This allows state to be any level (district, concelho, etc)
-        for loc in self.locations:
-            # Create index entries for ALL ancestors
-            for ancestor_id in loc.ancestors:
-                if ancestor_id == loc.id:
-                    continue  # Skip self
+    def remove_subtree(self, loc_id: int) -> List[int]:
+        """
+        Remove a location and all its descendants.
+        
+        Removed ids are not reused: they stay readable through
+        locations_by_id but are no longer returned by any lookup.
+        
+        Args:
+            loc_id: Id of the location to remove
+            
+        Returns:
+            Ids of the removed locations
+        """
+        with self.lock:
+            self._check_location(loc_id)
+            subtree = [int(lid) for level in self._subtree_levels(loc_id) for lid in level]
+            self._index_remove(subtree)
+            self.removed.update(subtree)
+            
+            parent_id = int(self.parent_ids[loc_id])
+            if parent_id >= 0:
+                self._children_map()[parent_id].remove(loc_id)
+            self.version += 1
+            return subtree
+    
+    def rename(self, loc_id: int, new_name: str):
+        """
+        Rename a location (its descendants' (city, state) keys follow).
+        
+        Args:
+            loc_id: Id of the location
+            new_name: New original name (normalized for the indexes)
+        """
+        with self.lock:
+            self._check_location(loc_id)
+            subtree = [int(lid) for level in self._subtree_levels(loc_id) for lid in level]
+            self._index_remove(subtree)
+            self._ensure_writable()
+            self.name_ids[loc_id] = self._intern(normalize_name(new_name))
+            self.original_name_ids[loc_id] = self._intern(new_name)
+            self._index_add(subtree)
+            self.version += 1
+    
+    def move_subtree(self, loc_id: int, new_parent_id: int):
+        """
+        Re-parent a location together with its descendants.
+        
+        Args:
+            loc_id: Id of the location to move
+            new_parent_id: Id of the new parent
+            
+        Raises:
+            ValueError: If the new parent is inside the moved subtree
+        """
+        with self.lock:
+            self._check_location(loc_id)
+            self._check_location(new_parent_id)
+            levels = self._subtree_levels(loc_id)
+            subtree = [int(lid) for level in levels for lid in level]
+            if new_parent_id in set(subtree):
+                raise ValueError(f"Cannot move location {loc_id} under its own descendant {new_parent_id}")
+            
+            self._index_remove(subtree)
+            children = self._children_map()
+            old_parent_id = int(self.parent_ids[loc_id])
+            if old_parent_id >= 0:
+                children[old_parent_id].remove(loc_id)
+            children.setdefault(new_parent_id, []).append(loc_id)
+            self._ensure_writable()
+            self.parent_ids[loc_id] = new_parent_id
+            self._index_add(subtree)
+            
+            self.lca_index.update(self.parent_ids, self.admin_levels, levels)
+            self.depths = self.lca_index.depths
+            self.version += 1
+    
+    def _check_location(self, loc_id: int):
+        """Raise KeyError unless loc_id is an existing (not removed) location."""
+        if not 0 <= loc_id < len(self.parent_ids) or loc_id in self.removed:
+            raise KeyError(f"Unknown location id: {loc_id}")
+    
+    def _children_map(self) -> Dict[int, List[int]]:
+        """Children ids per parent id, built on the first update and then maintained."""
+        if self._children is None:
+            parents = self.parent_ids.astype(np.int64)
+            non_roots = np.flatnonzero(parents >= 0)
+            keys, id_lists = self._group_ids(parents[non_roots], non_roots)
+            removed = self.removed
+            self._children = {parent: [lid for lid in ids if lid not in removed] if removed else ids
+                              for parent, ids in zip(keys.tolist(), id_lists)}
+        return self._children
+    
+    def _subtree_levels(self, loc_id: int) -> List[np.ndarray]:
+        """Ids of a subtree grouped by depth below loc_id (breadth-first)."""
+        children = self._children_map()
+        levels = []
+        level = [loc_id]
+        while level:
+            levels.append(np.array(level, dtype=np.int64))
+            level = [child for parent in level for child in children.get(parent, ())]
+        return levels
+    
+    def _ensure_writable(self, extra: int = 0):
+        """
+        Make the location arrays writable with room for extra locations.
+        
+        The arrays become views over buffers with spare capacity, so
+        appending subtrees does not copy every location each time; arrays
+        loaded from a snapshot (read-only maps) are copied on the first
+        update.
+        """
+        n = len(self.parent_ids)
+        if self._buffers is not None and len(self._buffers[0]) >= n + extra:
+            return
+        capacity = max(n + extra, n + n // 2)
+        columns = (self.parent_ids, self.admin_levels, self.name_ids, self.original_name_ids)
+        self._buffers = tuple(np.empty(capacity, dtype=column.dtype) for column in columns)
+        for buffer, column in zip(self._buffers, columns):
+            buffer[:n] = column
+        self._set_size(n)
+    
+    def _set_size(self, n: int):
+        """Point the location arrays at the first n entries of the buffers."""
+        self.parent_ids, self.admin_levels, self.name_ids, self.original_name_ids = (
+            buffer[:n] for buffer in self._buffers)
+    
+    def _append_locations(self, parsed: tuple):
+        """Append parsed columns (see _add_location) to the location arrays."""
+        n = len(self.parent_ids)
+        count = len(parsed[0])
+        self._ensure_writable(count)
+        for buffer, column in zip(self._buffers, parsed):
+            buffer[n:n + count] = np.frombuffer(column, dtype=np.int32)
+        self._set_size(n + count)
+    
+    def _index_keys(self, loc_id: int) -> Tuple[List[str], List[Tuple[str, str]]]:
+        """by_city keys and by_city_state keys of a location (with alias forms)."""
+        names = self.names
+        cities = self._name_forms(names[self.name_ids[loc_id]])
+        keys = []
+        ancestor_id = int(self.parent_ids[loc_id])
+        while ancestor_id >= 0:
+            keys.extend(product(cities, self._name_forms(names[self.name_ids[ancestor_id]])))
+            ancestor_id = int(self.parent_ids[ancestor_id])
+        return cities, keys
+    
+    def _index_add(self, loc_ids):
+        """Insert locations into by_city / by_city_state (lists stay sorted)."""
+        for loc_id in loc_ids:
+            cities, keys = self._index_keys(loc_id)
+            for city in cities:
+                _insert_sorted(self.by_city, city, loc_id)
+            for key in keys:
+                _insert_sorted(self.by_city_state, key, loc_id)
+    
+    def _index_remove(self, loc_ids):
+        """Remove locations from by_city / by_city_state."""
+        for loc_id in loc_ids:
+            cities, keys = self._index_keys(loc_id)
+            for city in cities:
+                _remove_sorted(self.by_city, city, loc_id)
+            for key in keys:
+                _remove_sorted(self.by_city_state, key, loc_id)
+    
+    def save_snapshot(self, snapshot_path: str):
+        """
+        Write the flattened locations and indexes to a binary snapshot.
+        
+        The snapshot stores parent/level/name arrays, the interned name
+        tables, both indexes in CSR form (keys, offsets, ids, alias forms
+        included) and the ids removed by remove_subtree, together with the
+        checksum of the source JSON and the alias table.
+        
+        Args:
+            snapshot_path: Destination file path
+        """
+        name_index = self.name_index
+        arrays = {
+            "parent_ids": self.parent_ids,
+            "admin_levels": self.admin_levels,
+            "name_ids": self.name_ids,
+            "original_name_ids": self.original_name_ids,
+        }
+        
+        arrays["by_city_keys"] = np.array([name_index[city] for city in self.by_city], dtype=np.int32)
+        arrays["by_city_offsets"], arrays["by_city_ids"] = _to_csr(self.by_city.values())
+        
+        arrays["by_city_state_keys"] = np.array(
+            [(name_index[city], name_index[state]) for city, state in self.by_city_state],
+            dtype=np.int32
+        ).reshape(-1, 2)
+        arrays["by_city_state_offsets"], arrays["by_city_state_ids"] = _to_csr(self.by_city_state.values())
+        
+        arrays["names_blob"], arrays["names_offsets"] = encode_strings(self.names)
+        arrays["removed_ids"] = np.array(sorted(self.removed), dtype=np.int32)
+        
+        if self.source_checksum is None and os.path.exists(self.json_path):
+            self.source_checksum = file_checksum(self.json_path)
+        metadata = {
+            "json_path": os.path.abspath(self.json_path),
+            "source_checksum": self.source_checksum,
+            "root_name": self.root_name,
+            "aliases": self.aliases,
+            "aliases_checksum": self.aliases_checksum,
+        }
+        write_snapshot(snapshot_path, metadata, arrays)
+    
+    def _load_snapshot(self, snapshot_path: str, verify_source: bool) -> bool:
+        """
+        Populate locations and indexes from a snapshot.
+        
+        Args:
+            snapshot_path: Snapshot file path
+            verify_source: Reject the snapshot if its checksum does not
+                match the current json_path contents, or it was built with
+                another root name or alias table
                 
-                ancestor = self.locations_by_id[ancestor_id]
-                key = (loc.name, ancestor.name)
-                if key not in self.by_city_state:
-                    self.by_city_state[key] = []
-                if loc.id not in self.by_city_state[key]:
-                    self.by_city_state[key].append(loc.id)
+        Returns:
+            True if the snapshot was loaded, False if it is missing,
+            corrupt, of another version or stale
+        """
+        try:
+            metadata, arrays = read_snapshot(snapshot_path)
+        except SnapshotError:
+            return False
+        
+        snapshot_root = metadata.get("root_name", DEFAULT_ROOT_NAME)
+        if verify_source:
+            checksum = file_checksum(self.json_path)
+            if (metadata.get("source_checksum") != checksum or snapshot_root != self.root_name
+                    or metadata.get("aliases_checksum") != self.aliases_checksum):
+                return False
+        self.source_checksum = metadata.get("source_checksum")
+        self.root_name = snapshot_root
+        self.aliases = metadata.get("aliases") or {}
+        self.aliases_checksum = metadata.get("aliases_checksum")
+        
+        names = decode_strings(arrays["names_blob"], arrays["names_offsets"])
+        self.names = names
+        self.name_index = {name: name_id for name_id, name in enumerate(names)}
+        
+        # Location arrays stay as read-only views over the mapped file
+        self.parent_ids = arrays["parent_ids"]
+        self.admin_levels = arrays["admin_levels"]
+        self.name_ids = arrays["name_ids"]
+        self.original_name_ids = arrays["original_name_ids"]
+        if "removed_ids" in arrays:
+            self.removed = set(arrays["removed_ids"].tolist())
+        
+        with gc_paused():
+            city_ids = _from_csr(arrays["by_city_offsets"], arrays["by_city_ids"])
+            self.by_city = {names[key]: ids for key, ids in zip(arrays["by_city_keys"].tolist(), city_ids)}
+            
+            city_state_ids = _from_csr(arrays["by_city_state_offsets"], arrays["by_city_state_ids"])
+            self.by_city_state = {(names[city], names[state]): ids
+                                  for (city, state), ids in zip(arrays["by_city_state_keys"].tolist(), city_state_ids)}
+        
+        self._build_hierarchy_indexes()
+        return True
     
     def _find_state(self, loc: Location) -> Optional[str]:
         """
@@ -171,10 +951,110 @@ class GeoDataLoader:
     
     def get_stats(self) -> dict:
         """Get statistics about the loaded data."""
+        levels, counts = np.unique(self.admin_levels, return_counts=True)
         return {
-            "total_locations": len(self.locations),
+            "total_locations": len(self.locations) - len(self.removed),
             "unique_cities": len(self.by_city),
             "unique_city_state_pairs": len(self.by_city_state),
-            "levels": {level: sum(1 for loc in self.locations if loc.admin_level == level) 
-                      for level in set(loc.admin_level for loc in self.locations)}
+            "levels": dict(zip(levels.tolist(), counts.tolist())),
+            "memory": {
+                "location_store_bytes": self._location_store_bytes(),
+                "per_node_objects_bytes": self._per_node_objects_bytes()
+            }
         }
+    
+    def memory_bytes(self) -> int:
+        """
+        Approximate memory held by the loader: location store, hierarchy
+        indexes and the by_city / by_city_state dicts.
+        """
+        pointer_size = struct.calcsize('P')
+        total = self._location_store_bytes()
+        if self.lca_index is not None:
+            index = self.lca_index
+            total += index.up.nbytes + index.depths.nbytes + index.path_max_level.nbytes + index.roots.nbytes
+        
+        # Dicts, one list per key, one pointer and int object per id, key tuples
+        id_lists = (self.by_city, self.by_city_state)
+        n_lists = len(self.by_city) + len(self.by_city_state)
+        n_ids = sum(len(ids) for index in id_lists for ids in index.values())
+        total += sum(sys.getsizeof(index) for index in id_lists)
+        total += n_lists * sys.getsizeof([]) + n_ids * (pointer_size + sys.getsizeof(1 << 20))
+        total += len(self.by_city_state) * sys.getsizeof(("", ""))
+        return total
+    
+    def _location_store_bytes(self) -> int:
+        """Memory used by the location arrays and the interned name table."""
+        arrays = (self.parent_ids, self.admin_levels, self.name_ids, self.original_name_ids)
+        return (sum(array.nbytes for array in arrays)
+                + sys.getsizeof(self.names) + sum(sys.getsizeof(name) for name in self.names)
+                + sys.getsizeof(self.name_index))
+    
+    def _per_node_objects_bytes(self) -> int:
+        """
+        Estimate the memory of the previous layout: one Python object per
+        node holding its attributes and three ancestor-chain lists.
+        
+        Name strings are counted as shared (interned), so the estimate is
+        a lower bound for that layout.
+        """
+        class _Node:
+            pass
+        
+        node = _Node()
+        node.__dict__.update(id=0, name="", original_name="", admin_level=0, parent_id=0,
+                             ancestors=[], ancestors_names=[], ancestors_levels=[])
+        per_node = sys.getsizeof(node) + sys.getsizeof(node.__dict__) + sys.getsizeof(1 << 20)
+        
+        # Each node holds three lists as long as its ancestor chain
+        chain_lengths = int(self.depths.sum()) + len(self.parent_ids)
+        pointer_size = struct.calcsize('P')
+        lists = 3 * (len(self.parent_ids) * sys.getsizeof([]) + chain_lengths * pointer_size)
+        
+        return (len(self.parent_ids) * per_node + lists
+                + sys.getsizeof(self.names) + sum(sys.getsizeof(name) for name in self.names))
+
+
+def _insert_sorted(index: dict, key, loc_id: int):
+    """Add loc_id to the sorted id list of key (no duplicates)."""
+    ids = index.get(key)
+    if ids is None:
+        index[key] = [loc_id]
+        return
+    position = bisect_left(ids, loc_id)
+    if position == len(ids) or ids[position] != loc_id:
+        ids.insert(position, loc_id)
+
+
+def _merge_sorted(index: dict, key, loc_ids: List[int]):
+    """Add the sorted loc_ids to the id list of key (as a new list)."""
+    ids = index.get(key)
+    index[key] = list(loc_ids) if ids is None else sorted(set(ids).union(loc_ids))
+
+
+def _remove_sorted(index: dict, key, loc_id: int):
+    """Remove loc_id from the sorted id list of key, dropping empty keys."""
+    ids = index.get(key)
+    if ids is None:
+        return
+    position = bisect_left(ids, loc_id)
+    if position < len(ids) and ids[position] == loc_id:
+        del ids[position]
+        if not ids:
+            del index[key]
+
+
+def _to_csr(id_lists) -> Tuple[np.ndarray, np.ndarray]:
+    """Flatten a sequence of id lists into (offsets, ids) arrays."""
+    id_lists = list(id_lists)
+    offsets = np.zeros(len(id_lists) + 1, dtype=np.int64)
+    np.cumsum([len(ids) for ids in id_lists], out=offsets[1:])
+    ids = np.fromiter((lid for ids in id_lists for lid in ids), dtype=np.int32, count=int(offsets[-1]))
+    return offsets, ids
+
+
+def _from_csr(offsets: np.ndarray, ids: np.ndarray) -> List[List[int]]:
+    """Split (offsets, ids) arrays back into id lists."""
+    bounds = offsets.tolist()
+    flat = ids.tolist()
+    return [flat[bounds[i]:bounds[i + 1]] for i in range(len(bounds) - 1)]
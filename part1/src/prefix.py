@@ -0,0 +1,195 @@
+"""
+Prefix (autocomplete) search over location names.
+"""
+
+from bisect import bisect_left
+from itertools import chain
+from typing import List, Tuple, Union
+
+import numpy as np
+
+from .loader import GeoDataLoader, Location
+from .utils import normalize_name, LRUCache
+
+# Sorts after any character, so every name starting with p is below p + _MAX_CHAR
+_MAX_CHAR = '\U0010ffff'
+
+
+class PrefixIndex:
+    """
+    Sorted-array prefix index over the loader's by_city names.
+    
+    Entries (one per location) are sorted by normalized name, then admin
+    level (larger areas first), then id, and kept as flat arrays next to
+    their preorder rank. A query is two binary searches over the sorted
+    distinct names. With an ancestor, whose descendants are a contiguous
+    range of preorder ranks (see LCAIndex.subtree_sizes), the cheaper of
+    two vectorized scans is used: the matching names in growing blocks
+    until enough results pass the ancestor filter, or the ancestor's
+    subtree keeping the names in the prefix range.
+    
+    The index is rebuilt on first use after the loader's hierarchy is
+    updated (see GeoDataLoader.add_subtree).
+    """
+    
+    def __init__(self, loader: GeoDataLoader, block_size: int = 256, ancestor_cache_size: int = 1024):
+        """
+        Build the index.
+        
+        Args:
+            loader: GeoDataLoader instance with parsed data
+            block_size: Entries checked by the first block of a filtered
+                scan (each following block is twice as large)
+            ancestor_cache_size: Ancestors whose rank ranges are cached
+                (typeahead repeats the same ancestor on every keystroke)
+        """
+        self.loader = loader
+        self.block_size = block_size
+        self.ancestor_cache = LRUCache(ancestor_cache_size)
+        self._build()
+    
+    def _build(self):
+        """Sort the by_city entries into the flat arrays."""
+        loader = self.loader
+        with loader.lock:
+            self.names: List[str] = sorted(loader.by_city)
+            counts = np.fromiter((len(loader.by_city[name]) for name in self.names), dtype=np.int64,
+                                 count=len(self.names))
+            ids = np.fromiter(chain.from_iterable(loader.by_city[name] for name in self.names),
+                              dtype=np.int64, count=int(counts.sum()))
+            name_codes = np.repeat(np.arange(len(self.names)), counts)
+            
+            # Alias forms (see GeoDataLoader aliases) are lookup keys, not
+            # names: list every location under its own name only
+            if loader.aliases:
+                key_name_ids = np.array([loader.name_index[name] for name in self.names], dtype=np.int64)
+                own = loader.name_ids[ids] == key_name_ids[name_codes]
+                kept = np.bincount(name_codes[own], minlength=len(self.names))
+                self.names = [name for name, count in zip(self.names, kept.tolist()) if count]
+                counts = kept[kept > 0]
+                ids = ids[own]
+                name_codes = np.repeat(np.arange(len(self.names)), counts)
+            
+            # Entries of a name: larger areas (lower admin level) first
+            order = np.lexsort((ids, loader.admin_levels[ids], name_codes))
+            self._offsets = np.concatenate(([0], np.cumsum(counts))).tolist()
+            self._ids = ids[order]
+            
+            # Per location: position of its name in self.names (-1 if not
+            # indexed), and the locations in preorder for subtree scans
+            preorder = loader.lca_index.preorder
+            self._name_positions = np.full(len(preorder), -1, dtype=np.int64)
+            self._name_positions[self._ids] = name_codes
+            self._ranks = preorder[self._ids]
+            self._by_rank = loader.lca_index.by_preorder
+            self.ancestor_cache.clear()
+            self._version = loader.version
+    
+    def search(self, prefix: str, ancestor: Union[int, str, Location, None] = None,
+               limit: int = 10) -> List[Location]:
+        """
+        Find locations whose name starts with a prefix.
+        
+        Args:
+            prefix: Typed text, normalized like the names (a trailing
+                space is kept, so "sao " does not match "saozinho")
+            ancestor: Optional location (id, Location or name) the results
+                must be inside of; a name stands for every location with
+                that name, e.g. "viseu" for the district and the concelho
+            limit: Maximum number of results
+            
+        Returns:
+            Up to limit Locations, sorted by name, then admin level, then id
+        """
+        if self._version != self.loader.version:
+            self._build()
+        
+        first_name, last_name = self._name_range(prefix)
+        start, stop = self._offsets[first_name], self._offsets[last_name]
+        if ancestor is None:
+            ids = self._ids[start:min(stop, start + limit)]
+        else:
+            # The name scan stops after about limit / (share of locations
+            # inside the ancestor) entries; the subtree scan reads them all
+            lows, highs = self._intervals(ancestor)
+            covered = int((highs - lows).sum())
+            if covered < min(stop - start, limit * len(self._by_rank) / max(covered, 1)):
+                ids = self._scan_subtrees(first_name, last_name, lows, highs, limit)
+            else:
+                ids = self._scan_names(start, stop, lows, highs, limit)
+        
+        loader = self.loader
+        return [Location._view(loader, loc_id) for loc_id in ids.tolist()]
+    
+    def _name_range(self, prefix: str) -> Tuple[int, int]:
+        """Positions [first, last) in self.names of the names starting with prefix."""
+        key = normalize_name(prefix)
+        if key and prefix[-1].isspace():
+            key += " "
+        return bisect_left(self.names, key), bisect_left(self.names, key + _MAX_CHAR)
+    
+    def _intervals(self, ancestor: Union[int, str, Location]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Preorder rank ranges [low, high) of the ancestor's proper
+        descendants, sorted and disjoint (nested ranges are dropped).
+        """
+        if isinstance(ancestor, Location):
+            ancestor = ancestor.id
+        elif isinstance(ancestor, str):
+            ancestor = normalize_name(ancestor)
+        else:
+            ancestor = int(ancestor)
+        
+        intervals = self.ancestor_cache.get(ancestor)
+        if intervals is None:
+            ancestor_ids = self.loader.by_city.get(ancestor, []) if isinstance(ancestor, str) else [ancestor]
+            intervals = self._rank_ranges(ancestor_ids)
+            self.ancestor_cache.put(ancestor, intervals)
+        return intervals
+    
+    def _rank_ranges(self, ancestor_ids: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Disjoint rank ranges of the proper descendants of some locations."""
+        lca_index = self.loader.lca_index
+        ancestor_ids = np.array(ancestor_ids, dtype=np.int64)
+        lows = lca_index.preorder[ancestor_ids] + 1
+        highs = lows - 1 + lca_index.subtree_sizes[ancestor_ids]
+        if len(lows) > 1:
+            order = np.argsort(lows)
+            lows, highs = lows[order], highs[order]
+            outer = np.ones(len(lows), dtype=bool)
+            outer[1:] = lows[1:] >= np.maximum.accumulate(highs)[:-1]
+            lows, highs = lows[outer], highs[outer]
+        return lows, highs
+    
+    def _scan_names(self, start: int, stop: int, lows: np.ndarray, highs: np.ndarray,
+                    limit: int) -> np.ndarray:
+        """First limit entries of [start, stop) inside any of the rank ranges."""
+        found = []
+        n_found = 0
+        block_size = self.block_size
+        while start < stop and n_found < limit and len(lows):
+            ranks = self._ranks[start:min(start + block_size, stop)]
+            interval = np.searchsorted(lows, ranks, side='right') - 1
+            inside = (interval >= 0) & (ranks < highs[interval])
+            hits = np.flatnonzero(inside)[:limit - n_found]
+            found.append(self._ids[start + hits])
+            n_found += len(hits)
+            start += block_size
+            block_size *= 2
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+    
+    def _scan_subtrees(self, first_name: int, last_name: int, lows: np.ndarray, highs: np.ndarray,
+                       limit: int) -> np.ndarray:
+        """Locations in the rank ranges whose name position is in [first_name, last_name)."""
+        sizes = highs - lows
+        offsets = np.cumsum(sizes) - sizes
+        ids = self._by_rank[np.repeat(lows - offsets, sizes) + np.arange(int(sizes.sum()))]
+        positions = self._name_positions[ids]
+        matching = (positions >= first_name) & (positions < last_name)
+        ids = ids[matching]
+        order = np.lexsort((ids, self.loader.admin_levels[ids], positions[matching]))
+        return ids[order[:limit]]
+    
+    def memory_bytes(self) -> int:
+        """Size of the index arrays in bytes (the names and preorder are the loader's)."""
+        return self._ids.nbytes + self._ranks.nbytes + self._name_positions.nbytes + len(self._offsets) * 8
@@ -2,25 +2,101 @@
 Processor module to process DataFrames and add expected_level and is_ambiguous columns.
 """
 
+import json
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Optional, Union
+
+import numpy as np
 import pandas as pd
-from .loader import GeoDataLoader
+from .clustering import cluster_records
+from .loader import GeoDataLoader, DEFAULT_ROOT_NAME
+from .profiling import Profiler, NO_PHASE
 from .resolver import LocationResolver
+from .utils import factorize_names, import_pyarrow, normalize_name, is_empty, LRUCache
+
+# Input columns read by the matching engine
+PAIR_COLUMNS = ['city_1', 'state_1', 'city_2', 'state_2']
+
+# Format version of the files written by GeoProcessor.save_pair_cache
+PAIR_CACHE_VERSION = 1
+
+# Columns added in all-candidates mode (see GeoProcessor)
+CANDIDATE_COLUMNS = ['best_level', 'worst_level', 'candidate_count']
+
+# Candidate combinations evaluated per vectorized LCA query
+CANDIDATE_CHUNK = 1 << 20
+
+# Ways process() can return its results (see GeoProcessor.process)
+OUTPUT_MODES = ('copy', 'inplace', 'columns')
+
+# Output dtypes with compact=True (other columns stay int64)
+COMPACT_DTYPES = {
+    'expected_level': np.int8,
+    'is_ambiguous': np.bool_,
+    'is_fuzzy': np.bool_,
+    'best_level': np.int8,
+    'worst_level': np.int8,
+}
+
+# Per-process state for process_parallel workers. With the fork start
+# method these are set in the parent right before the pool starts, so the
+# children share the loaded hierarchy (and input frame) copy-on-write.
+_worker_processor = None
+_worker_frame = None
 
 
 class GeoProcessor:
     """Processes DataFrames to add geographic matching information."""
     
-    def __init__(self, json_path: str):
+    def __init__(self, json_path: str, cache_size: int = 4096, snapshot_path: Optional[str] = None,
+                 fuzzy: bool = False, pair_cache_size: int = 0, pair_cache_path: Optional[str] = None,
+                 root_name: str = DEFAULT_ROOT_NAME, candidates: bool = False, profile: bool = False,
+                 aliases: Union[str, dict, None] = None):
         """
         Initialize processor by loading geographic data.
         
         Args:
             json_path: Path to portugal.json file
+            cache_size: Size of the resolver's LRU resolution cache
+                (0 disables caching)
+            snapshot_path: Optional binary snapshot used to skip parsing the
+                JSON (see GeoDataLoader.save_snapshot)
+            fuzzy: Match misspelled city names within a small edit distance
+                when there is no exact match; adds an is_fuzzy column
+            pair_cache_size: Maximum number of (city_1, state_1, city_2,
+                state_2) results kept in the pair cache (0 disables it)
+            pair_cache_path: Optional file the pair cache is loaded from
+                (if it exists and matches this hierarchy) and saved to by
+                save_pair_cache
+            root_name: Name of the hierarchy's root node (the country)
+            candidates: Evaluate every combination of candidate locations
+                of the two sides; adds best_level, worst_level and
+                candidate_count columns
+            profile: Count resolution branches and time the processing
+                phases in self.profiler (see Profiler); None when disabled
+            aliases: Optional alias table (path to a JSON file such as
+                data/aliases.json, or a mapping) whose abbreviated names
+                are compiled into the loader's indexes
         """
-        self.loader = GeoDataLoader(json_path)
-        self.resolver = LocationResolver(self.loader)
+        self.snapshot_path = snapshot_path
+        self.profiler = Profiler() if profile else None
+        self.loader = GeoDataLoader(json_path, snapshot_path=snapshot_path, root_name=root_name,
+                                    aliases=aliases)
+        self.resolver = LocationResolver(self.loader, cache_size=cache_size, fuzzy=fuzzy,
+                                         profiler=self.profiler)
+        self.candidates = candidates
+        self.pair_cache = LRUCache(pair_cache_size)
+        self.pair_cache_path = pair_cache_path
+        self._version = self.loader.version
+        self._snapshot_version = self.loader.version  # Hierarchy version in snapshot_path
+        if pair_cache_path is not None and os.path.exists(pair_cache_path):
+            self.load_pair_cache(pair_cache_path)
     
-    def process(self, df: pd.DataFrame) -> pd.DataFrame:
+    def process(self, df: pd.DataFrame, batch: bool = True, output: str = 'copy', compact: bool = False,
+                dtype_backend: Optional[str] = None) -> pd.DataFrame:
         """
         Process a DataFrame to add expected_level and is_ambiguous columns.
         
@@ -32,30 +108,602 @@ class GeoProcessor:
         Adds columns:
         - expected_level: Highest admin_level where the two locations match
         - is_ambiguous: 1 if at least one location is ambiguous, 0 otherwise
+        - is_fuzzy (fuzzy mode only): 1 if at least one location was
+          matched through a misspelled city name, 0 otherwise
+        - best_level, worst_level, candidate_count (all-candidates mode
+          only): highest and lowest common ancestor level over every
+          combination of candidates, and the number of combinations
+          (0 and level 2 when either side is unresolved)
+          
+        Args:
+            df: Input DataFrame (NumPy- or Arrow-backed; name columns are
+                factorized as they are, without conversion to objects)
+            batch: Use the columnar batch engine (default). When False, rows
+                are processed one by one with _process_row.
+            output: "copy" (default) returns a copy of df with the columns
+                added; "inplace" adds them to df itself and returns it;
+                "columns" returns only the new columns, with df's index,
+                without copying the input
+            compact: Store levels as int8 and flags as bool instead of
+                int64 (candidate_count stays int64)
+            dtype_backend: "pyarrow" for Arrow-backed columns (pd.ArrowDtype)
+                wrapping the result arrays without copying them (bool
+                columns are bit-packed); None for NumPy columns
+                
+        Returns:
+            DataFrame with added columns (or only those columns)
+        """
+        if output not in OUTPUT_MODES:
+            raise ValueError(f"output must be one of {OUTPUT_MODES}, got {output!r}")
+        
+        # Hierarchy updates (see GeoDataLoader.add_subtree) wait for the
+        # frame to be done, and invalidate the pair cache
+        with self.loader.lock:
+            self._sync_version()
+            if self.profiler is not None:
+                self.profiler.count('rows', len(df))
+            
+            if batch:
+                columns = self._process_batch(df)
+            else:
+                # Process each row
+                columns = {name: [] for name in self._output_columns()}
+                
+                for _, row in df.iterrows():
+                    for name, value in zip(columns, self._process_row(row)):
+                        columns[name].append(value)
+        
+        return _assemble(df, columns, output, compact, dtype_backend)
+    
+    def _sync_version(self):
+        """Clear the pair cache if the hierarchy was updated (hold loader.lock)."""
+        if self._version != self.loader.version:
+            self.pair_cache.clear()
+            self._version = self.loader.version
+    
+    def _phase(self, name: str):
+        """Context timing a processing phase (no-op unless profiling)."""
+        return NO_PHASE if self.profiler is None else self.profiler.phase(name)
+    
+    def _output_columns(self) -> list:
+        """Names of the columns added by process, in order."""
+        columns = ['expected_level', 'is_ambiguous']
+        if self.resolver.fuzzy:
+            columns.append('is_fuzzy')
+        if self.candidates:
+            columns.extend(CANDIDATE_COLUMNS)
+        return columns
+    
+    def process_parallel(self, df: pd.DataFrame, workers: Optional[int] = None,
+                         chunk_size: int = 250_000, start_method: Optional[str] = None,
+                         output: str = 'copy', compact: bool = False,
+                         dtype_backend: Optional[str] = None) -> pd.DataFrame:
+        """
+        Process a DataFrame on a pool of worker processes.
+        
+        The frame is split into chunks of consecutive rows, each chunk runs
+        through the batch engine in a worker, and the results are
+        reassembled in the original row order and index.
+        
+        Workers never re-parse the JSON: with the "fork" start method they
+        inherit this processor (and the input frame) copy-on-write; with
+        "spawn"/"forkserver" they load a binary snapshot of the hierarchy
+        (written to a temporary file if the processor has none, or if the
+        hierarchy was updated since its snapshot was written). As in
+        process, hierarchy updates wait for the whole run.
         
         Args:
-            df: Input DataFrame
+            df: Input DataFrame (same columns as process)
+            workers: Number of worker processes (default: CPU count)
+            chunk_size: Rows per chunk
+            start_method: multiprocessing start method (default: "fork"
+                when available, otherwise "spawn")
+            output: See process
+            compact: See process
+            dtype_backend: See process
             
         Returns:
-            DataFrame with added columns
+            DataFrame with added columns, equal to process(df)
         """
-        # Create a copy to avoid modifying original
-        result = df.copy()
+        global _worker_processor, _worker_frame
         
-        # Process each row
-        expected_levels = []
-        is_ambiguous_flags = []
+        workers = workers or os.cpu_count() or 1
+        bounds = [(start, min(start + chunk_size, len(df))) for start in range(0, len(df), chunk_size)]
+        if workers == 1 or len(bounds) <= 1:
+            return self.process(df, output=output, compact=compact, dtype_backend=dtype_backend)
         
-        for _, row in result.iterrows():
-            expected_level, is_ambiguous = self._process_row(row)
-            expected_levels.append(expected_level)
-            is_ambiguous_flags.append(is_ambiguous)
+        if start_method is None:
+            start_method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+        context = multiprocessing.get_context(start_method)
+        workers = min(workers, len(bounds))
         
-        result['expected_level'] = expected_levels
-        result['is_ambiguous'] = is_ambiguous_flags
+        with self.loader.lock:
+            self._sync_version()
+            if start_method == 'fork':
+                _worker_processor, _worker_frame = self, df
+                try:
+                    with ProcessPoolExecutor(workers, mp_context=context) as pool:
+                        results = list(pool.map(_process_shared_chunk, bounds))
+                finally:
+                    _worker_processor, _worker_frame = None, None
+            else:
+                with tempfile.TemporaryDirectory() as tmp:
+                    snapshot_path = self.snapshot_path
+                    if snapshot_path is None or self._snapshot_version != self.loader.version:
+                        snapshot_path = os.path.join(tmp, 'hierarchy.snap')
+                        self.loader.save_snapshot(snapshot_path)
+                    
+                    columns = [col for col in PAIR_COLUMNS if col in df.columns]
+                    chunks = (df[columns].iloc[start:stop] for start, stop in bounds)
+                    with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker,
+                                             initargs=(self.loader.json_path, snapshot_path,
+                                                       self.resolver.cache.maxsize, self.resolver.fuzzy,
+                                                       self.loader.root_name, self.candidates,
+                                                       self.profiler is not None,
+                                                       self.loader.aliases)) as pool:
+                        results = list(pool.map(_process_chunk, chunks))
         
+        # Worker profiles (counted per chunk) add up to this run's
+        if self.profiler is not None:
+            self.profiler.count('rows', len(df))
+            for _, summary in results:
+                self.profiler.merge(summary)
+        results = [columns for columns, _ in results]
+        columns = {name: np.concatenate([columns[name] for columns in results]) for name in results[0]}
+        return _assemble(df, columns, output, compact, dtype_backend)
+    
+    def link(self, df_a: pd.DataFrame, df_b: pd.DataFrame, min_level: int, city_col: str = 'city',
+             state_col: str = 'state', compact: bool = False) -> pd.DataFrame:
+        """
+        Pair the rows of two location DataFrames that match at min_level
+        or deeper, without building their cross join.
+        
+        Each side is resolved once per distinct (city, state) and every
+        row gets a blocking key: the highest ancestor of its (first)
+        location whose path reaches min_level (see
+        LCAIndex.block_ancestors). Only rows with the same key are paired,
+        so the cost grows with the number of pairs returned rather than
+        len(df_a) * len(df_b). Their levels come from one vectorized LCA
+        query and pairs below min_level (possible when admin levels
+        decrease going down the hierarchy) are dropped.
+        
+        Args:
+            df_a: First DataFrame with a city column and an optional state
+                column
+            df_b: Second DataFrame (same columns)
+            min_level: Smallest expected_level of the pairs returned
+                (above 2, since every pair matches at country level)
+            city_col: Name of the city columns
+            state_col: Name of the state columns
+            compact: See process
+            
+        Returns:
+            DataFrame with index_a and index_b (index labels of the paired
+            rows), expected_level and is_ambiguous (same meaning as in
+            process, plus is_fuzzy in fuzzy mode), sorted by df_a's row
+            order, then df_b's
+        """
+        if min_level <= 2:
+            raise ValueError(f"min_level must be above 2 (every pair matches at level 2), got {min_level}")
+        
+        with self.loader.lock:
+            with self._phase('normalize'):
+                sides = [(self._normalize_column(df, city_col), self._normalize_column(df, state_col))
+                         for df in (df_a, df_b)]
+            with self._phase('resolve'):
+                first_a, count_a, fuzzy_a, _ = self._resolve_columns(*sides[0])
+                first_b, count_b, fuzzy_b, _ = self._resolve_columns(*sides[1])
+            
+            with self._phase('link'):
+                lca_index = self.loader.lca_index
+                blocks_a = lca_index.block_ancestors(first_a, min_level)
+                blocks_b = lca_index.block_ancestors(first_b, min_level)
+                
+                # Rows of df_b grouped by block; each row of df_a takes its group
+                rows_b = np.flatnonzero(blocks_b >= 0)
+                rows_b = rows_b[np.argsort(blocks_b[rows_b], kind='stable')]
+                rows_a = np.flatnonzero(blocks_a >= 0)
+                starts = np.searchsorted(blocks_b[rows_b], blocks_a[rows_a], side='left')
+                sizes = np.searchsorted(blocks_b[rows_b], blocks_a[rows_a], side='right') - starts
+                offsets = np.cumsum(sizes) - sizes
+                pairs_a = np.repeat(rows_a, sizes)
+                pairs_b = rows_b[np.repeat(starts - offsets, sizes) + np.arange(int(sizes.sum()))]
+            
+            with self._phase('lca'):
+                levels = self.resolver.find_common_ancestor_levels(first_a[pairs_a], first_b[pairs_b])
+            keep = np.flatnonzero(levels >= min_level)
+            pairs_a, pairs_b = pairs_a[keep], pairs_b[keep]
+        
+        columns = {
+            'expected_level': levels[keep],
+            'is_ambiguous': (count_a[pairs_a] > 1) | (count_b[pairs_b] > 1),
+        }
+        if self.resolver.fuzzy:
+            columns['is_fuzzy'] = fuzzy_a[pairs_a] | fuzzy_b[pairs_b]
+        result = _assemble(pd.DataFrame(index=pd.RangeIndex(len(keep))), columns, 'columns', compact, None)
+        result.insert(0, 'index_a', df_a.index[pairs_a])
+        result.insert(1, 'index_b', df_b.index[pairs_b])
         return result
     
+    def cluster(self, df: pd.DataFrame, levels: Iterable[int] = (6, 7, 8), city_col: str = 'city',
+                state_col: str = 'state', merge_ambiguous: bool = True) -> pd.DataFrame:
+        """
+        Group location records into same-place clusters per admin level.
+        
+        See clustering.cluster_records, which this runs with the
+        processor's resolver.
+        
+        Returns:
+            DataFrame with df's index and a cluster_<level> column per level
+        """
+        return cluster_records(self.resolver, df, levels, city_col=city_col, state_col=state_col,
+                               merge_ambiguous=merge_ambiguous)
+    
+    def rollup(self, df: pd.DataFrame, value_cols: Iterable[str] = (), levels: Iterable[int] = (6, 7, 8),
+               city_col: str = 'city', state_col: str = 'state') -> pd.DataFrame:
+        """
+        Count records and sum values per location, rolled up the hierarchy.
+        
+        Records are resolved once per distinct (city, state) and credited
+        to their (first) location, like expected_level in process. The
+        totals of every subtree then come from one prefix sum over the
+        locations in preorder: a subtree is a contiguous range of ranks
+        (see LCAIndex.subtree_range), so its total is the difference of two
+        prefix sums, for every level at once.
+        
+        Args:
+            df: Records with a city column, an optional state column and
+                the value columns
+            value_cols: Numeric columns to sum (NaN/NA counts as 0);
+                integer and bool columns, nullable ones included, are
+                summed exactly in int64, the others in float64
+            levels: Admin levels to report
+            city_col: Name of the city column
+            state_col: Name of the state column
+            
+        Returns:
+            Tidy DataFrame with one row per location of the given levels
+            holding at least one record: level, location_id, name,
+            records (resolved records inside it) and one sum per value
+            column, sorted by level and location id. Unresolved records
+            are not counted anywhere.
+            
+        Raises:
+            ValueError: If a value column is not numeric
+        """
+        value_cols = list(value_cols)
+        levels = list(levels)
+        for col in value_cols:
+            if not pd.api.types.is_numeric_dtype(df[col].dtype):
+                raise ValueError(f"Value column {col!r} is not numeric (dtype {df[col].dtype})")
+        with self.loader.lock:
+            with self._phase('normalize'):
+                city, state = self._normalize_column(df, city_col), self._normalize_column(df, state_col)
+            with self._phase('resolve'):
+                first, _, _, _ = self._resolve_columns(city, state)
+            
+            with self._phase('rollup'):
+                lca_index = self.loader.lca_index
+                resolved = first >= 0
+                ranks = lca_index.preorder[first[resolved]]
+                low = lca_index.preorder
+                high = low + lca_index.subtree_sizes
+                
+                records = _subtree_sums(ranks, None, low, high)
+                nodes = np.flatnonzero(np.isin(self.loader.admin_levels, levels) & (records > 0))
+                if self.loader.removed:
+                    nodes = nodes[~np.isin(nodes, list(self.loader.removed))]
+                node_levels = self.loader.admin_levels[nodes].astype(np.int64)
+                order = np.lexsort((nodes, node_levels))
+                nodes, node_levels = nodes[order], node_levels[order]
+                
+                result = pd.DataFrame({
+                    'level': node_levels,
+                    'location_id': nodes,
+                    'name': [self.loader.locations[loc_id].original_name for loc_id in nodes.tolist()],
+                    'records': records[nodes],
+                })
+                for col in value_cols:
+                    dtype = df[col].dtype
+                    if pd.api.types.is_integer_dtype(dtype) or pd.api.types.is_bool_dtype(dtype):
+                        weights = df[col].to_numpy(np.int64, na_value=0)[resolved]
+                    else:
+                        weights = np.nan_to_num(df[col].to_numpy(np.float64, na_value=np.nan)[resolved])
+                    result[col] = _subtree_sums(ranks, weights, low, high)[nodes]
+        return result
+    
+    def _process_batch(self, df: pd.DataFrame) -> dict:
+        """
+        Columnar equivalent of calling _process_row on every row.
+        
+        Names are normalized once per distinct raw value and each distinct
+        (city, state) key is resolved once; results are mapped back to the
+        rows with array indexing and the common ancestor levels of all rows
+        come from one vectorized LCA query. With the pair cache enabled,
+        distinct pairs found in the cache skip resolution entirely.
+        
+        Args:
+            df: DataFrame with city_1, city_2, state_1, state_2
+            
+        Returns:
+            Dict of int64 arrays keyed by output column (see process)
+        """
+        with self._phase('normalize'):
+            columns = [self._normalize_column(df, col) for col in PAIR_COLUMNS]
+        if self.pair_cache.maxsize <= 0:
+            return self._compute_columns(*columns)
+        
+        # One representative row per distinct normalized pair
+        side_1 = _compact(columns[0][0] * len(columns[1][1]) + columns[1][0])
+        side_2 = _compact(columns[2][0] * len(columns[3][1]) + columns[3][0])
+        inverse = _compact(side_1 * (side_2.max(initial=0) + 1) + side_2)
+        first_rows = np.empty(inverse.max(initial=-1) + 1, dtype=np.int64)
+        first_rows[inverse[::-1]] = np.arange(len(inverse) - 1, -1, -1)
+        
+        names = [np.asarray(col_names, dtype=object)[codes[first_rows]] for codes, col_names in columns]
+        output_columns = self._output_columns()
+        values = np.empty((len(first_rows), len(output_columns)), dtype=np.int64)
+        missing = []
+        with self._phase('pair_cache'):
+            for i, key in enumerate(zip(*names)):
+                cached = self.pair_cache.get(_pair_key(*key))
+                if cached is None:
+                    missing.append(i)
+                else:
+                    values[i] = cached
+        
+        if missing:
+            rows = first_rows[missing]
+            computed = self._compute_columns(*[(codes[rows], col_names) for codes, col_names in columns])
+            computed = np.column_stack([computed[name] for name in output_columns])
+            values[missing] = computed
+            for i, row_values in zip(missing, computed.tolist()):
+                key = _pair_key(names[0][i], names[1][i], names[2][i], names[3][i])
+                self.pair_cache.put(key, tuple(row_values))
+        
+        return {name: values[inverse, j] for j, name in enumerate(output_columns)}
+    
+    def _compute_columns(self, city_1: tuple, state_1: tuple, city_2: tuple, state_2: tuple) -> dict:
+        """
+        Resolve and compare normalized pair columns (no pair cache).
+        
+        Args:
+            city_1, state_1, city_2, state_2: (codes, names) per column, as
+                returned by _normalize_column
+                
+        Returns:
+            Dict of int64 arrays keyed by output column (see process)
+        """
+        with self._phase('resolve'):
+            first_1, count_1, fuzzy_1, keys_1 = self._resolve_columns(city_1, state_1)
+            first_2, count_2, fuzzy_2, keys_2 = self._resolve_columns(city_2, state_2)
+        
+        # Ambiguous if either location has multiple matches
+        is_ambiguous = ((count_1 > 1) | (count_2 > 1)).astype(np.int64)
+        
+        # Common ancestor level (country level if either side is unresolved)
+        with self._phase('lca'):
+            expected_level = self.resolver.find_common_ancestor_levels(first_1, first_2)
+        
+        columns = {'expected_level': expected_level, 'is_ambiguous': is_ambiguous}
+        if self.resolver.fuzzy:
+            columns['is_fuzzy'] = (fuzzy_1 | fuzzy_2).astype(np.int64)
+        if self.candidates:
+            with self._phase('candidates'):
+                best, worst = self._candidate_levels(keys_1, keys_2)
+            columns['best_level'] = best
+            columns['worst_level'] = worst
+            columns['candidate_count'] = count_1 * count_2
+        return columns
+    
+    def _candidate_levels(self, keys_1: tuple, keys_2: tuple) -> tuple:
+        """
+        Best and worst common ancestor level over all candidate combinations.
+        
+        Each distinct pair of resolution keys is evaluated once. When admin
+        levels never decrease going down the hierarchy (the usual case), a
+        pair's level only depends on how deep its lowest common ancestor
+        is, and candidates are grouped by subtree through their preorder
+        ranks: the worst case is the common ancestor of the first and last
+        candidate of both sides, and the best case is among the pairs of
+        candidates from different sides that are adjacent in preorder. The
+        cost is linear in the number of candidates instead of quadratic.
+        Other hierarchies fall back to evaluating every combination.
+        
+        Args:
+            keys_1: (codes, offsets, ids) of side 1, as returned by
+                _resolve_columns
+            keys_2: Same for side 2
+            
+        Returns:
+            Tuple of (best_level, worst_level) int64 arrays per row
+        """
+        codes_1, offsets_1, ids_1 = keys_1
+        codes_2, offsets_2, ids_2 = keys_2
+        
+        # One representative row per distinct pair of keys
+        inverse = _compact(codes_1 * (len(offsets_2) - 1) + codes_2)
+        first_rows = np.empty(inverse.max(initial=-1) + 1, dtype=np.int64)
+        first_rows[inverse[::-1]] = np.arange(len(inverse) - 1, -1, -1)
+        key_1 = codes_1[first_rows]
+        key_2 = codes_2[first_rows]
+        
+        best = np.full(len(first_rows), 2, dtype=np.int64)
+        worst = np.full(len(first_rows), 2, dtype=np.int64)
+        pairs = np.flatnonzero((offsets_1[key_1 + 1] > offsets_1[key_1])
+                               & (offsets_2[key_2 + 1] > offsets_2[key_2]))
+        
+        lca_index = self.loader.lca_index
+        if (lca_index.path_max_level == self.loader.admin_levels).all() and self.loader.admin_levels.min() >= 2:
+            levels = self._grouped_candidate_levels
+        else:
+            levels = self._all_candidate_levels
+        best[pairs], worst[pairs] = levels((key_1[pairs], offsets_1, ids_1), (key_2[pairs], offsets_2, ids_2))
+        return best[inverse], worst[inverse]
+    
+    def _grouped_candidate_levels(self, side_1: tuple, side_2: tuple) -> tuple:
+        """
+        Preorder-based best/worst levels (see _candidate_levels).
+        
+        Args:
+            side_1: (keys, offsets, ids) with one key per pair, every key
+                having at least one candidate
+            side_2: Same for side 2
+            
+        Returns:
+            Tuple of (best_level, worst_level) int64 arrays per pair
+        """
+        ranks = self.loader.lca_index.preorder
+        sides = []
+        for keys, offsets, ids in (side_1, side_2):
+            # Candidates of every key sorted by preorder rank
+            ids = ids[np.lexsort((ranks[ids], np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))))]
+            sides.append((offsets[keys], offsets[keys + 1] - offsets[keys], ids))
+        (starts_1, counts_1, ids_1), (starts_2, counts_2, ids_2) = sides
+        
+        # Worst case: the common ancestor of every candidate of the pair
+        first = np.where(ranks[ids_1[starts_1]] <= ranks[ids_2[starts_2]], ids_1[starts_1], ids_2[starts_2])
+        last_1 = ids_1[starts_1 + counts_1 - 1]
+        last_2 = ids_2[starts_2 + counts_2 - 1]
+        last = np.where(ranks[last_1] >= ranks[last_2], last_1, last_2)
+        worst = self.resolver.find_common_ancestor_levels(first, last)
+        
+        # Best case: merge both sides in preorder, in chunks of whole pairs
+        best = np.empty(len(starts_1), dtype=np.int64)
+        sizes = counts_1 + counts_2
+        ends = np.cumsum(sizes)
+        start = 0
+        while start < len(sizes):
+            base = ends[start - 1] if start else 0
+            stop = max(int(np.searchsorted(ends, base + CANDIDATE_CHUNK, side='right')), start + 1)
+            chunk_sizes = sizes[start:stop]
+            owner = np.repeat(np.arange(stop - start), chunk_sizes)
+            position = np.arange(int(chunk_sizes.sum())) - np.repeat(ends[start:stop] - chunk_sizes - base,
+                                                                      chunk_sizes)
+            width = counts_1[start:stop][owner]
+            from_2 = position >= width
+            ids = np.empty(len(owner), dtype=np.int64)
+            ids[~from_2] = ids_1[starts_1[start:stop][owner[~from_2]] + position[~from_2]]
+            ids[from_2] = ids_2[starts_2[start:stop][owner[from_2]] + position[from_2] - width[from_2]]
+            
+            order = np.argsort(owner * len(ranks) + ranks[ids], kind='stable')
+            ids, owner, from_2 = ids[order], owner[order], from_2[order]
+            adjacent = np.flatnonzero((owner[1:] == owner[:-1]) & (from_2[1:] != from_2[:-1]))
+            levels = self.resolver.find_common_ancestor_levels(ids[adjacent], ids[adjacent + 1])
+            
+            # Every pair has at least one adjacent candidate from each side
+            owners = owner[adjacent]
+            group_starts = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]])
+            best[start:stop] = np.maximum.reduceat(levels, group_starts)
+            start = stop
+        
+        return best, worst
+    
+    def _all_candidate_levels(self, side_1: tuple, side_2: tuple) -> tuple:
+        """
+        Best/worst levels from every candidate combination (any hierarchy).
+        
+        Combinations are laid out as flat arrays of location id pairs, sent
+        through the vectorized LCA query in chunks and reduced per pair with
+        np.maximum / np.minimum.reduceat.
+        
+        Args:
+            side_1: (keys, offsets, ids) with one key per pair, every key
+                having at least one candidate
+            side_2: Same for side 2
+            
+        Returns:
+            Tuple of (best_level, worst_level) int64 arrays per pair
+        """
+        keys_1, offsets_1, ids_1 = side_1
+        keys_2, offsets_2, ids_2 = side_2
+        count_2 = offsets_2[keys_2 + 1] - offsets_2[keys_2]
+        totals = (offsets_1[keys_1 + 1] - offsets_1[keys_1]) * count_2
+        best = np.empty(len(keys_1), dtype=np.int64)
+        worst = np.empty(len(keys_1), dtype=np.int64)
+        
+        # Chunks of whole pairs with about CANDIDATE_CHUNK combinations
+        ends = np.cumsum(totals)
+        start = 0
+        while start < len(totals):
+            base = ends[start - 1] if start else 0
+            stop = max(int(np.searchsorted(ends, base + CANDIDATE_CHUNK, side='right')), start + 1)
+            chunk_totals = totals[start:stop]
+            starts = ends[start:stop] - chunk_totals - base
+            
+            # Combination k of a pair is (candidate k // count_2, candidate k % count_2)
+            owner = np.repeat(np.arange(stop - start), chunk_totals)
+            position = np.arange(int(chunk_totals.sum())) - starts[owner]
+            width = count_2[start:stop][owner]
+            ids_a = ids_1[offsets_1[keys_1[start:stop]][owner] + position // width]
+            ids_b = ids_2[offsets_2[keys_2[start:stop]][owner] + position % width]
+            
+            levels = self.resolver.find_common_ancestor_levels(ids_a, ids_b)
+            best[start:stop] = np.maximum.reduceat(levels, starts)
+            worst[start:stop] = np.minimum.reduceat(levels, starts)
+            start = stop
+        
+        return best, worst
+    
+    def _resolve_columns(self, city: tuple, state: tuple) -> tuple:
+        """
+        Resolve a (city, state) column pair once per distinct normalized key.
+        
+        Args:
+            city: (codes, names) of the normalized city column
+            state: (codes, names) of the normalized state column
+            
+        Returns:
+            Tuple of (first_match_id, match_count, is_fuzzy) arrays per
+            row, plus (key_codes, offsets, ids): the distinct key of each
+            row and every key's candidate ids in CSR form. first_match_id
+            is -1 when the location has no matches.
+        """
+        city_codes, city_names = city
+        state_codes, state_names = state
+        
+        keys = city_codes * len(state_names) + state_codes
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        
+        key_first = np.full(len(unique_keys), -1, dtype=np.int64)
+        key_count = np.zeros(len(unique_keys), dtype=np.int64)
+        key_fuzzy = np.zeros(len(unique_keys), dtype=bool)
+        key_ids = []
+        for i, key in enumerate(unique_keys):
+            city_code, state_code = divmod(int(key), len(state_names))
+            matches, key_fuzzy[i] = self.resolver.match_normalized(city_names[city_code], state_names[state_code])
+            if matches:
+                key_first[i] = matches[0].id
+                key_count[i] = len(matches)
+                if self.candidates:
+                    key_ids.extend(match.id for match in matches)
+        
+        offsets = np.concatenate(([0], np.cumsum(key_count)))
+        ids = np.array(key_ids, dtype=np.int64)
+        return (key_first[inverse], key_count[inverse], key_fuzzy[inverse],
+                (inverse.astype(np.int64), offsets, ids))
+    
+    @staticmethod
+    def _normalize_column(df: pd.DataFrame, col: str) -> tuple:
+        """
+        Normalize a name column, touching each distinct raw value once.
+        
+        Empty values (None, NaN, blank strings) and missing columns
+        normalize to "".
+        
+        Args:
+            df: Input DataFrame
+            col: Column name
+            
+        Returns:
+            Tuple of (codes, names): int64 codes per row indexing into the
+            list of distinct normalized names.
+        """
+        if col not in df.columns:
+            return np.zeros(len(df), dtype=np.int64), [""]
+        
+        return factorize_names(df[col])
+    
     def _process_row(self, row: pd.Series) -> tuple:
         """
         Process a single row to determine expected_level and is_ambiguous.
@@ -64,7 +712,8 @@ class GeoProcessor:
             row: DataFrame row with city_1, city_2, state_1, state_2
             
         Returns:
-            Tuple of (expected_level, is_ambiguous)
+            Tuple of (expected_level, is_ambiguous), plus is_fuzzy in
+            fuzzy mode and the candidate columns in all-candidates mode
         """
         # Extract values
         city_1 = row.get('city_1')
@@ -72,17 +721,63 @@ class GeoProcessor:
         state_1 = row.get('state_1')
         state_2 = row.get('state_2')
         
+        if self.pair_cache.maxsize > 0:
+            key = _pair_key(*["" if is_empty(value) else normalize_name(value)
+                              for value in (city_1, state_1, city_2, state_2)])
+            cached = self.pair_cache.get(key)
+            if cached is None:
+                cached = self._compute_row(city_1, state_1, city_2, state_2)
+                self.pair_cache.put(key, cached)
+            return cached
+        
+        return self._compute_row(city_1, state_1, city_2, state_2)
+    
+    def _compute_row(self, city_1, state_1, city_2, state_2) -> tuple:
+        """
+        Resolve and compare one pair of raw names (no pair cache).
+        
+        Returns:
+            Same tuple as _process_row
+        """
         # Resolve locations
-        matches_1 = self.resolver.resolve(city_1, state_1)
-        matches_2 = self.resolver.resolve(city_2, state_2)
+        with self._phase('resolve'):
+            matches_1, fuzzy_1 = self.resolver.resolve_match(city_1, state_1)
+            matches_2, fuzzy_2 = self.resolver.resolve_match(city_2, state_2)
         
         # Determine ambiguity
         is_ambiguous = self._is_ambiguous(matches_1, matches_2)
         
         # Calculate expected_level (best case scenario)
-        expected_level = self._calculate_expected_level(matches_1, matches_2)
+        with self._phase('lca'):
+            expected_level = self._calculate_expected_level(matches_1, matches_2)
+        
+        result = (expected_level, is_ambiguous)
+        if self.resolver.fuzzy:
+            result += (int(fuzzy_1 or fuzzy_2),)
+        if self.candidates:
+            with self._phase('candidates'):
+                result += self._candidate_row(matches_1, matches_2)
+        return result
+    
+    def _candidate_row(self, matches_1: list, matches_2: list) -> tuple:
+        """
+        Best level, worst level and count over all candidate combinations.
+        
+        Args:
+            matches_1: List of Location matches for city_1
+            matches_2: List of Location matches for city_2
+            
+        Returns:
+            Tuple of (best_level, worst_level, candidate_count)
+        """
+        if not matches_1 or not matches_2:
+            return 2, 2, 0
         
-        return expected_level, is_ambiguous
+        code = np.zeros(1, dtype=np.int64)
+        best, worst = self._candidate_levels(
+            (code, np.array([0, len(matches_1)]), np.array([loc.id for loc in matches_1], dtype=np.int64)),
+            (code, np.array([0, len(matches_2)]), np.array([loc.id for loc in matches_2], dtype=np.int64)))
+        return int(best[0]), int(worst[0]), len(matches_1) * len(matches_2)
     
     def _is_ambiguous(self, matches_1: list, matches_2: list) -> int:
         """
@@ -120,6 +815,177 @@ class GeoProcessor:
         # Find common ancestor level
         return self.resolver.find_common_ancestor_level(loc_1, loc_2)
     
+    def save_pair_cache(self, path: Optional[str] = None):
+        """
+        Write the pair cache to a JSON file, to be reused by a later run.
+        
+        The file records the checksums of the hierarchy source and the
+        alias table and the resolution mode, so a cache is only ever loaded by a processor
+        that would compute the same results.
+        
+        Args:
+            path: Output file (default: pair_cache_path)
+        """
+        path = path or self.pair_cache_path
+        if path is None:
+            raise ValueError("No pair cache path given")
+        
+        document = {
+            "version": PAIR_CACHE_VERSION,
+            # An updated hierarchy no longer matches its source file
+            "source_checksum": None if self.loader.version else self.loader.source_checksum,
+            "aliases_checksum": self.loader.aliases_checksum,
+            "fuzzy": self.resolver.fuzzy,
+            "columns": self._output_columns(),
+            "entries": [list(key[0] + key[1]) + list(values) for key, values in self.pair_cache.items()],
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(document, f)
+        os.replace(tmp_path, path)
+    
+    def load_pair_cache(self, path: str) -> bool:
+        """
+        Fill the pair cache from a file written by save_pair_cache.
+        
+        Files from another hierarchy or resolution mode, or that cannot be
+        read, are ignored.
+        
+        Args:
+            path: Pair cache file
+            
+        Returns:
+            True if the entries were loaded
+        """
+        try:
+            with open(path, encoding='utf-8') as f:
+                document = json.load(f)
+        except (OSError, ValueError):
+            return False
+        
+        if (not isinstance(document, dict)
+                or document.get("version") != PAIR_CACHE_VERSION
+                or document.get("source_checksum") != self.loader.source_checksum
+                or document.get("aliases_checksum") != self.loader.aliases_checksum
+                or document.get("fuzzy") != self.resolver.fuzzy
+                or document.get("columns") != self._output_columns()):
+            return False
+        
+        for entry in document["entries"]:
+            self.pair_cache.put(((entry[0], entry[1]), (entry[2], entry[3])), tuple(entry[4:]))
+        return True
+    
     def get_stats(self) -> dict:
-        """Get statistics about the loaded geographic data."""
-        return self.loader.get_stats()
+        """Get statistics about the loaded geographic data and caches."""
+        stats = self.loader.get_stats()
+        stats["resolution_cache"] = self.resolver.get_cache_stats()
+        stats["pair_cache"] = self.pair_cache.get_stats()
+        if self.profiler is not None:
+            stats["profile"] = self.profiler.summary()
+        return stats
+
+
+def _assemble(df: pd.DataFrame, columns: dict, output: str, compact: bool,
+              dtype_backend: Optional[str]) -> pd.DataFrame:
+    """
+    Convert result columns to the requested dtypes and attach them.
+    
+    Args:
+        df: Input DataFrame
+        columns: Result values (arrays or lists of ints) keyed by column
+        output: See GeoProcessor.process
+        compact: See GeoProcessor.process
+        dtype_backend: See GeoProcessor.process
+        
+    Returns:
+        The output DataFrame
+    """
+    if dtype_backend not in (None, 'pyarrow'):
+        raise ValueError(f"dtype_backend must be None or 'pyarrow', got {dtype_backend!r}")
+    pa = import_pyarrow("dtype_backend='pyarrow'") if dtype_backend == 'pyarrow' else None
+    
+    converted = {}
+    for name, values in columns.items():
+        values = np.asarray(values, dtype=np.int64)
+        if compact:
+            values = values.astype(COMPACT_DTYPES.get(name, np.int64))
+        if pa is not None:
+            values = pd.arrays.ArrowExtensionArray(pa.array(values))
+        converted[name] = values
+    
+    if output == 'columns':
+        return pd.DataFrame(converted, index=df.index)
+    
+    # Create a copy to avoid modifying original
+    result = df if output == 'inplace' else df.copy()
+    for name, values in converted.items():
+        result[name] = values
+    return result
+
+
+def _subtree_sums(ranks: np.ndarray, weights: Optional[np.ndarray], low: np.ndarray,
+                  high: np.ndarray) -> np.ndarray:
+    """
+    Per-node subtree totals of weights placed at preorder ranks.
+    
+    Args:
+        ranks: Preorder rank of each record's location
+        weights: int64 or float64 value per record (None to count records)
+        low: First rank of every node's subtree
+        high: Rank after every node's subtree
+        
+    Returns:
+        Total per node, int64 for counts and int64 weights (summed exactly,
+        without a float64 round trip), float64 otherwise
+    """
+    if weights is not None and weights.dtype == np.int64:
+        totals = np.zeros(len(low), dtype=np.int64)
+        np.add.at(totals, ranks, weights)
+    else:
+        totals = np.bincount(ranks, weights=weights, minlength=len(low))
+    prefix = np.zeros(len(low) + 1, dtype=totals.dtype)
+    np.cumsum(totals, out=prefix[1:])
+    return prefix[high] - prefix[low]
+
+
+def _pair_key(city_1: str, state_1: str, city_2: str, state_2: str) -> tuple:
+    """Order-independent key of a normalized pair (the results are symmetric)."""
+    side_1 = (city_1, state_1)
+    side_2 = (city_2, state_2)
+    return (side_1, side_2) if side_1 <= side_2 else (side_2, side_1)
+
+
+def _compact(keys: np.ndarray) -> np.ndarray:
+    """Renumber int64 keys as 0..n_distinct-1 (in order of first appearance)."""
+    return pd.factorize(keys)[0].astype(np.int64)
+
+
+def _process_shared_chunk(bounds: tuple) -> tuple:
+    """Worker: process rows [start, stop) of the frame inherited on fork."""
+    start, stop = bounds
+    return _process_chunk(_worker_frame.iloc[start:stop])
+
+
+def _init_worker(json_path: str, snapshot_path: str, cache_size: int, fuzzy: bool, root_name: str,
+                 candidates: bool, profile: bool, aliases: dict):
+    """Worker initializer for spawned processes: load the hierarchy snapshot."""
+    global _worker_processor
+    _worker_processor = GeoProcessor(json_path, cache_size=cache_size, snapshot_path=snapshot_path,
+                                     fuzzy=fuzzy, root_name=root_name, candidates=candidates,
+                                     profile=profile, aliases=aliases)
+
+
+def _process_chunk(chunk: pd.DataFrame) -> tuple:
+    """
+    Worker: process a chunk sent by the parent process.
+    
+    Returns:
+        Tuple of (columns, profile summary of the chunk or None)
+    """
+    processor = _worker_processor
+    with processor.loader.lock:
+        processor._sync_version()
+        if processor.profiler is None:
+            return processor._process_batch(chunk), None
+        processor.profiler.reset()
+        return processor._process_batch(chunk), processor.profiler.summary()
@@ -0,0 +1,215 @@
+"""
+Registry of per-country hierarchies, loaded lazily on first use.
+"""
+
+import json
+import os
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .loader import DEFAULT_ROOT_NAME
+from .processor import GeoProcessor, CANDIDATE_COLUMNS
+from .utils import factorize_names, normalize_name
+
+
+class HierarchyRegistry:
+    """
+    Maps country codes to hierarchy sources and keeps a bounded set loaded.
+    
+    A country's GeoProcessor (and its GeoDataLoader) is only built the
+    first time the country is used. When a memory budget is set, the least
+    recently used countries are unloaded as soon as the loaded hierarchies
+    exceed it; they are loaded again (from their snapshot, if any) when
+    needed.
+    """
+    
+    def __init__(self, memory_budget: Optional[int] = None, **processor_options):
+        """
+        Initialize an empty registry.
+        
+        Args:
+            memory_budget: Maximum approximate memory in bytes of the loaded
+                hierarchies (see GeoDataLoader.memory_bytes); None for no
+                limit. The most recently used country always stays loaded.
+            **processor_options: Options passed to every GeoProcessor
+                (cache_size, fuzzy, pair_cache_size, candidates)
+        """
+        self.memory_budget = memory_budget
+        self.processor_options = processor_options
+        self._sources: Dict[str, dict] = {}
+        self._loaded: "OrderedDict[str, GeoProcessor]" = OrderedDict()  # LRU order
+        self._memory: Dict[str, int] = {}
+        self.loads = 0
+        self.evictions = 0
+    
+    @classmethod
+    def from_config(cls, config_path: str, memory_budget: Optional[int] = None,
+                    **processor_options) -> 'HierarchyRegistry':
+        """
+        Build a registry from a JSON file mapping country codes to sources.
+        
+        Example:
+            {"pt": {"json_path": "portugal.json", "root_name": "portugal"},
+             "es": {"json_path": "spain.json", "snapshot_path": "spain.snap"}}
+        
+        Relative paths are resolved against the config file's directory.
+        
+        Args:
+            config_path: Path to the config file
+            memory_budget: See __init__
+            **processor_options: See __init__
+            
+        Returns:
+            HierarchyRegistry instance
+        """
+        with open(config_path, encoding='utf-8') as f:
+            config = json.load(f)
+        
+        base_dir = os.path.dirname(os.path.abspath(config_path))
+        registry = cls(memory_budget=memory_budget, **processor_options)
+        for country, source in config.items():
+            snapshot_path = source.get("snapshot_path")
+            registry.register(
+                country,
+                os.path.join(base_dir, source["json_path"]),
+                snapshot_path=os.path.join(base_dir, snapshot_path) if snapshot_path else None,
+                root_name=source.get("root_name", DEFAULT_ROOT_NAME),
+            )
+        return registry
+    
+    def register(self, country: str, json_path: str, snapshot_path: Optional[str] = None,
+                 root_name: str = DEFAULT_ROOT_NAME):
+        """
+        Register (or replace) the hierarchy source of a country.
+        
+        Nothing is loaded until the country is used.
+        
+        Args:
+            country: Country code (case-insensitive)
+            json_path: Hierarchy JSON file
+            snapshot_path: Optional binary snapshot (see GeoDataLoader)
+            root_name: Name of the hierarchy's root node
+        """
+        country = normalize_name(country)
+        self.unload(country)
+        self._sources[country] = {
+            "json_path": json_path,
+            "snapshot_path": snapshot_path,
+            "root_name": root_name,
+        }
+    
+    @property
+    def countries(self) -> List[str]:
+        """Registered country codes."""
+        return list(self._sources)
+    
+    @property
+    def loaded(self) -> List[str]:
+        """Currently loaded country codes, least recently used first."""
+        return list(self._loaded)
+    
+    def get(self, country: str) -> GeoProcessor:
+        """
+        Return the processor of a country, loading it if needed.
+        
+        Args:
+            country: Country code (case-insensitive)
+            
+        Returns:
+            GeoProcessor for the country
+            
+        Raises:
+            KeyError: If the country is not registered
+        """
+        country = normalize_name(country)
+        processor = self._loaded.get(country)
+        if processor is not None:
+            self._loaded.move_to_end(country)
+            return processor
+        
+        source = self._sources[country]
+        processor = GeoProcessor(source["json_path"], snapshot_path=source["snapshot_path"],
+                                 root_name=source["root_name"], **self.processor_options)
+        self._loaded[country] = processor
+        self._memory[country] = processor.loader.memory_bytes()
+        self.loads += 1
+        self._evict()
+        return processor
+    
+    def unload(self, country: str):
+        """Drop a loaded country (it is loaded again on next use)."""
+        country = normalize_name(country)
+        if self._loaded.pop(country, None) is not None:
+            del self._memory[country]
+    
+    def memory_bytes(self) -> int:
+        """Approximate memory of the loaded hierarchies."""
+        return sum(self._memory.values())
+    
+    def _evict(self):
+        """Unload least recently used countries while over the memory budget."""
+        if self.memory_budget is None:
+            return
+        while len(self._loaded) > 1 and self.memory_bytes() > self.memory_budget:
+            country = next(iter(self._loaded))
+            self.unload(country)
+            self.evictions += 1
+    
+    def process(self, df: pd.DataFrame, country_col: str = 'country', batch: bool = True) -> pd.DataFrame:
+        """
+        Process a DataFrame whose rows may belong to different countries.
+        
+        Rows are grouped by the country column, each group goes through
+        its country's GeoProcessor.process, and the results are written
+        back in the original row order. Rows with an empty or unregistered
+        country are treated as unresolved (expected_level 2, not
+        ambiguous, no candidates).
+        
+        Args:
+            df: Input DataFrame (same columns as GeoProcessor.process plus
+                the country column)
+            country_col: Name of the country column
+            batch: Use the columnar batch engine (see GeoProcessor.process)
+            
+        Returns:
+            DataFrame with added columns
+        """
+        result = df.copy()
+        codes, countries = factorize_names(df[country_col])
+        
+        names = ['expected_level', 'is_ambiguous']
+        if self.processor_options.get('fuzzy'):
+            names.append('is_fuzzy')
+        if self.processor_options.get('candidates'):
+            names.extend(CANDIDATE_COLUMNS)
+        columns = {name: np.full(len(df), 2 if name.endswith('_level') else 0, dtype=np.int64)
+                   for name in names}
+        
+        for code, country in enumerate(countries):
+            if country not in self._sources:
+                continue
+            positions = np.flatnonzero(codes == code)
+            if not len(positions):
+                continue
+            processed = self.get(country).process(df.iloc[positions], batch=batch, output='columns')
+            for name in names:
+                columns[name][positions] = processed[name].to_numpy()
+        
+        for name, values in columns.items():
+            result[name] = values
+        return result
+    
+    def get_stats(self) -> dict:
+        """Get load/eviction counters and per-country memory."""
+        return {
+            "countries": self.countries,
+            "loaded": self.loaded,
+            "memory_bytes": self.memory_bytes(),
+            "memory_budget": self.memory_budget,
+            "memory_by_country": dict(self._memory),
+            "loads": self.loads,
+            "evictions": self.evictions,
+        }
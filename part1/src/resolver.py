@@ -3,21 +3,48 @@ Resolver module for location lookup and disambiguation.
 """
 
 from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .fuzzy import FuzzyIndex
 from .loader import GeoDataLoader, Location
-from .utils import normalize_name, is_empty
+from .profiling import Profiler
+from .utils import normalize_name, is_empty, LRUCache
 
 
 class LocationResolver:
     """Resolves location names to Location objects."""
     
-    def __init__(self, loader: GeoDataLoader):
+    def __init__(self, loader: GeoDataLoader, cache_size: int = 4096, fuzzy: bool = False,
+                 max_distance: int = 2, profiler: Optional[Profiler] = None):
         """
         Initialize resolver with a loaded GeoDataLoader.
         
         Args:
             loader: GeoDataLoader instance with parsed data
+            cache_size: Maximum number of normalized (city, state) keys kept
+                in the resolution cache (0 disables caching)
+            fuzzy: When a city has no exact match, match city names within
+                max_distance edits instead (see FuzzyIndex)
+            max_distance: Largest edit distance for fuzzy matches
+            profiler: Optional Profiler counting the lookup branch of
+                every resolution (see Profiler)
         """
         self.loader = loader
+        self.profiler = profiler
+        self.cache = LRUCache(cache_size)
+        self.fuzzy = fuzzy
+        self.max_distance = max_distance
+        self._fuzzy_index = None
+        self._version = loader.version
+    
+    @property
+    def fuzzy_index(self) -> FuzzyIndex:
+        """Deletion index over the city names, built on first use."""
+        self._check_version()
+        if self._fuzzy_index is None:
+            self._fuzzy_index = FuzzyIndex(self.loader.by_city, max_distance=self.max_distance)
+        return self._fuzzy_index
     
     def resolve(self, city: str, state: Optional[str] = None) -> List[Location]:
         """
@@ -36,16 +63,167 @@ class LocationResolver:
             return []
         
         city_norm = normalize_name(city)
+        state_norm = "" if is_empty(state) else normalize_name(state)
         
-        # If state is provided and not empty
-        if not is_empty(state):
-            state_norm = normalize_name(state)
+        return self.resolve_normalized(city_norm, state_norm)
+    
+    def resolve_match(self, city: str, state: Optional[str] = None) -> Tuple[List[Location], bool]:
+        """
+        Like resolve(), also telling whether the match is fuzzy.
+        
+        Args:
+            city: City name (will be normalized)
+            state: Optional state/district name (will be normalized)
+            
+        Returns:
+            Tuple of (matches, is_fuzzy). is_fuzzy is True when the matches
+            come from a misspelled city name (fuzzy mode only).
+        """
+        if is_empty(city):
+            return [], False
+        
+        state_norm = "" if is_empty(state) else normalize_name(state)
+        return self.match_normalized(normalize_name(city), state_norm)
+    
+    def resolve_normalized(self, city_norm: str, state_norm: str = "") -> List[Location]:
+        """
+        Resolve an already normalized (city, state) key to Location objects.
+        
+        This is the lookup behind resolve(), exposed for callers that
+        normalize names in bulk (e.g. the batch engine in GeoProcessor).
+        
+        Args:
+            city_norm: Normalized city name ("" if empty)
+            state_norm: Normalized state name ("" if empty)
+            
+        Returns:
+            List of matching Location objects. Empty list if no matches.
+        """
+        return self.match_normalized(city_norm, state_norm)[0]
+    
+    def match_normalized(self, city_norm: str, state_norm: str = "") -> Tuple[List[Location], bool]:
+        """
+        Like resolve_normalized(), also telling whether the match is fuzzy.
+        
+        Args:
+            city_norm: Normalized city name ("" if empty)
+            state_norm: Normalized state name ("" if empty)
+            
+        Returns:
+            Tuple of (matches, is_fuzzy)
+        """
+        if not city_norm:
+            return [], False
+        
+        self._check_version()
+        key = (city_norm, state_norm)
+        cached = self.cache.get(key)
+        if cached is None:
+            matches, branch = self._match(city_norm, state_norm)
+            cached = (tuple(matches), branch == 'fuzzy', branch)
+            self.cache.put(key, cached)
+        elif self.profiler is not None:
+            self.profiler.count('resolve.cache_hit')
+        if self.profiler is not None:
+            self.profiler.count('resolve.' + cached[2])
+        return list(cached[0]), cached[1]
+    
+    def explain(self, city: str, state: Optional[str] = None) -> dict:
+        """
+        Describe how a (city, state) pair is resolved (uncached).
+        
+        Args:
+            city: City name (will be normalized)
+            state: Optional state/district name (will be normalized)
             
+        Returns:
+            Dict with the normalized "city" and "state", the lookup
+            "branch" taken (see Profiler for the names; "empty" for an
+            empty city) and the ids of the matching locations
+        """
+        city_norm = "" if is_empty(city) else normalize_name(city)
+        state_norm = "" if is_empty(state) else normalize_name(state)
+        if not city_norm:
+            matches, branch = [], 'empty'
+        else:
+            self._check_version()
+            matches, branch = self._match(city_norm, state_norm)
+        return {
+            "city": city_norm,
+            "state": state_norm,
+            "branch": branch,
+            "location_ids": [loc.id for loc in matches],
+        }
+    
+    def _match(self, city_norm: str, state_norm: str) -> Tuple[List[Location], str]:
+        """Exact lookup with the fuzzy fallback, plus the branch taken."""
+        matches, branch = self._lookup(city_norm, state_norm)
+        if not matches and self.fuzzy:
+            matches = self._fuzzy_lookup(city_norm, state_norm)
+            if matches:
+                branch = 'fuzzy'
+        return matches, branch
+    
+    def _check_version(self):
+        """Drop cached results once the loader's hierarchy has been updated."""
+        if self._version != self.loader.version:
+            self.cache.clear()
+            self._fuzzy_index = None
+            self._version = self.loader.version
+    
+    def _fuzzy_lookup(self, city_norm: str, state_norm: str) -> List[Location]:
+        """
+        Resolve a city name with no exact match through the fuzzy index.
+        
+        Every city name at the smallest edit distance found is looked up
+        as if it had been typed, so two equally close names make the
+        result ambiguous.
+        
+        Args:
+            city_norm: Normalized city name
+            state_norm: Normalized state name ("" if empty)
+            
+        Returns:
+            List of matching Location objects
+        """
+        candidates = self.fuzzy_index.lookup(city_norm)
+        if not candidates:
+            return []
+        
+        best_distance = candidates[0][1]
+        names = [name for name, distance in candidates if distance == best_distance]
+        
+        # Prefer the candidates located in the given state. A name and its
+        # alias forms (see GeoDataLoader aliases) share ids, hence the dedup
+        if state_norm:
+            location_ids = dict.fromkeys(lid for name in names
+                                         for lid in self.loader.by_city_state.get((name, state_norm), []))
+            if location_ids:
+                return [self.loader.locations_by_id[lid] for lid in location_ids]
+        
+        location_ids = dict.fromkeys(lid for name in names for lid in self.loader.by_city[name])
+        return [self.loader.locations_by_id[lid] for lid in location_ids]
+    
+    def _lookup(self, city_norm: str, state_norm: str) -> Tuple[List[Location], str]:
+        """
+        Walk the indexes for a normalized (city, state) key (uncached).
+        
+        Args:
+            city_norm: Normalized city name
+            state_norm: Normalized state name ("" if empty)
+            
+        Returns:
+            Tuple of (matching Location objects, branch taken), the branch
+            being city_state, ancestor_scan, all_homonyms, city_only or
+            unmatched
+        """
+        # If state is provided and not empty
+        if state_norm:
             # Try (city, state) lookup first
             key = (city_norm, state_norm)
             if key in self.loader.by_city_state:
                 location_ids = self.loader.by_city_state[key]
-                return [self.loader.locations_by_id[lid] for lid in location_ids]
+                return [self.loader.locations_by_id[lid] for lid in location_ids], 'city_state'
             
             # Fallback: find cities that have state in their ancestry
             if city_norm in self.loader.by_city:
@@ -57,15 +235,16 @@ class LocationResolver:
                     if state_norm in loc.ancestors_names:
                         matches.append(loc)
                 if matches:
-                    return matches
+                    return matches, 'ancestor_scan'
         
         # No state or state lookup failed: return all cities with that name
         if city_norm in self.loader.by_city:
             location_ids = self.loader.by_city[city_norm]
-            return [self.loader.locations_by_id[lid] for lid in location_ids]
+            branch = 'all_homonyms' if state_norm else 'city_only'
+            return [self.loader.locations_by_id[lid] for lid in location_ids], branch
         
         # No matches found
-        return []
+        return [], 'unmatched'
     
     def is_ambiguous(self, matches: List[Location]) -> bool:
         """
@@ -88,6 +267,9 @@ class LocationResolver:
         2. One contains the other: return the container's level
         3. Different locations: return highest common ancestor level
         
+        Uses the loader's precomputed LCA index instead of intersecting
+        ancestor lists.
+        
         Args:
             loc1: First location
             loc2: Second location
@@ -95,30 +277,34 @@ class LocationResolver:
         Returns:
             Admin level of the highest common ancestor (2 = country if no common ancestor)
         """
-        # Case 1: Same location
-        if loc1.id == loc2.id:
-            return loc1.admin_level
-        
-        # Case 2: Check if one contains the other
-        # loc1 is ancestor of loc2
-        if loc1.id in loc2.ancestors:
-            return loc1.admin_level
-        
-        # loc2 is ancestor of loc1
-        if loc2.id in loc1.ancestors:
-            return loc2.admin_level
+        lca_index = self.loader.lca_index
+        common_id = lca_index.lca_one(loc1.id, loc2.id)
         
-        # Case 3: Find common ancestors
-        common_ancestor_ids = set(loc1.ancestors) & set(loc2.ancestors)
-        
-        if not common_ancestor_ids:
+        if common_id < 0:
             # No common ancestors (shouldn't happen in valid data)
             return 2  # Country level
         
-        # Find the common ancestor with the highest (deepest) admin_level
-        max_level = 2
-        for anc_id in common_ancestor_ids:
-            anc = self.loader.locations_by_id[anc_id]
-            max_level = max(max_level, anc.admin_level)
+        # Case 1 and 2: same location, or one contains the other
+        if common_id == loc1.id or common_id == loc2.id:
+            return int(self.loader.admin_levels[common_id])
         
-        return max_level
+        # Case 3: deepest admin_level among the common ancestors
+        return max(2, int(lca_index.path_max_level[common_id]))
+    
+    def find_common_ancestor_levels(self, ids_a, ids_b) -> np.ndarray:
+        """
+        Vectorized find_common_ancestor_level over arrays of location ids.
+        
+        Args:
+            ids_a: Location ids of the first locations (-1 = unresolved)
+            ids_b: Location ids of the second locations (-1 = unresolved)
+            
+        Returns:
+            int64 array with the common ancestor level of each pair
+            (2 = country, also used when either side is unresolved)
+        """
+        return self.loader.lca_index.common_ancestor_levels(ids_a, ids_b)
+    
+    def get_cache_stats(self) -> dict:
+        """Get hit/miss statistics of the resolution cache."""
+        return self.cache.get_stats()
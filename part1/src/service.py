@@ -0,0 +1,413 @@
+"""
+Asynchronous HTTP matching service over one warm GeoProcessor.
+
+Endpoints:
+- POST /match: a JSON array of pair objects (city_1, state_1, city_2,
+  state_2; also accepted as {"pairs": [...]}) or NDJSON, one pair per line
+  with Content-Type application/x-ndjson. Answers with one result object
+  per pair (the columns added by GeoProcessor.process), in order, in the
+  same format.
+- GET /health: liveness and hierarchy size.
+- GET /metrics: request, pair and batch counts, throughput, latency
+  percentiles and cache statistics.
+  
+Pairs of concurrent requests are micro-batched: requests queued while a
+batch is running (or within max_wait of the first one) are processed by
+a single GeoProcessor.process call, so the per-call overhead (pandas,
+normalization, the vectorized LCA query) is paid once per batch. Only the
+standard library is used (asyncio with a minimal HTTP/1.1 implementation).
+"""
+
+import asyncio
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .processor import GeoProcessor, PAIR_COLUMNS
+
+JSON_TYPE = 'application/json'
+NDJSON_TYPE = 'application/x-ndjson'
+
+
+class HTTPError(Exception):
+    """Request error answered with a status code and a JSON message."""
+    
+    def __init__(self, status: int, message: str):
+        """
+        Args:
+            status: HTTP status code
+            message: Error description sent to the client
+        """
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class MatchService:
+    """
+    HTTP service answering pair matching requests with a shared processor.
+    
+    The processor (and its resolution and pair caches) stays loaded for
+    the lifetime of the service. Batches run one at a time on a worker
+    thread, so the event loop keeps accepting requests meanwhile.
+    """
+    
+    def __init__(self, processor: GeoProcessor, host: str = '127.0.0.1', port: int = 8080,
+                 max_batch_rows: int = 50_000, max_wait: float = 0.002, max_body: int = 64 << 20,
+                 latency_window: int = 10_000):
+        """
+        Initialize the service (call start() or serve_forever() to listen).
+        
+        Args:
+            processor: Loaded GeoProcessor
+            host: Interface to listen on
+            port: TCP port (0 picks a free port, see self.port)
+            max_batch_rows: Pairs above which a batch stops taking requests
+            max_wait: Seconds a batch waits for more requests after the
+                first one (0 only batches the requests already queued)
+            max_body: Largest accepted request body in bytes
+            latency_window: Recent requests kept for latency percentiles
+        """
+        self.processor = processor
+        self.host = host
+        self.port = port
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait
+        self.max_body = max_body
+        self.metrics = ServiceMetrics(latency_window)
+        self._server = None
+        self._queue = None
+        self._batcher = None
+        self._executor = None
+    
+    async def start(self):
+        """
+        Start listening and batching.
+        
+        Raises:
+            OSError: If the socket cannot be bound (nothing is left running)
+        """
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._queue = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._batcher = asyncio.create_task(self._batch_loop())
+        self.metrics.start()
+    
+    async def stop(self):
+        """Stop listening, cancel the batcher and release the worker thread."""
+        self._server.close()
+        await self._server.wait_closed()
+        self._batcher.cancel()
+        try:
+            await self._batcher
+        except asyncio.CancelledError:
+            pass
+        self._executor.shutdown()
+    
+    async def serve_forever(self, ready: Optional[Callable[[], None]] = None):
+        """
+        Start the service and run until cancelled.
+        
+        Args:
+            ready: Called once the socket is bound (self.port is then the
+                actual port)
+        """
+        await self.start()
+        if ready is not None:
+            ready()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+    
+    async def match(self, pairs: List[dict]) -> List[dict]:
+        """
+        Match pairs through the micro-batcher.
+        
+        Args:
+            pairs: Pair objects (missing names count as empty)
+            
+        Returns:
+            One dict of result columns per pair
+        """
+        if not pairs:
+            return []
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((pairs, future))
+        return await future
+    
+    async def _batch_loop(self):
+        """Collect queued requests into batches and process them."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            rows = len(batch[0][0])
+            deadline = loop.time() + self.max_wait
+            while rows < self.max_batch_rows:
+                if self._queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    item = self._queue.get_nowait()
+                batch.append(item)
+                rows += len(item[0])
+            
+            for (_, future), result in zip(batch, await self._run_batch(batch)):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+    
+    async def _run_batch(self, batch: List[Tuple[List[dict], asyncio.Future]]) -> list:
+        """
+        Process a batch on the worker thread.
+        
+        A failed batch is retried one request at a time, so a request that
+        makes processing fail does not fail the requests batched with it.
+        
+        Returns:
+            One list of result dicts (or the exception raised) per request
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._executor, self._process_batch, batch)
+        except Exception as error:
+            if len(batch) == 1:
+                return [error]
+        return [(await self._run_batch([item]))[0] for item in batch]
+    
+    def _process_batch(self, batch: List[Tuple[List[dict], asyncio.Future]]) -> List[List[dict]]:
+        """Worker thread: run one process() call over every queued pair."""
+        start = time.perf_counter()
+        pairs = [pair for request_pairs, _ in batch for pair in request_pairs]
+        frame = pd.DataFrame({col: [pair.get(col) for pair in pairs] for col in PAIR_COLUMNS})
+        columns = self.processor.process(frame, output='columns')
+        
+        names = list(columns.columns)
+        rows = [dict(zip(names, values)) for values in zip(*(columns[name].tolist() for name in names))]
+        results = []
+        offset = 0
+        for request_pairs, _ in batch:
+            results.append(rows[offset:offset + len(request_pairs)])
+            offset += len(request_pairs)
+        self.metrics.record_batch(len(pairs), time.perf_counter() - start)
+        return results
+    
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve the requests of one (keep-alive) connection."""
+        try:
+            while True:
+                start = time.perf_counter()
+                keep_alive = False
+                try:
+                    request = await _read_request(reader, self.max_body)
+                    if request is None:
+                        break
+                    start = time.perf_counter()
+                    method, path, headers, body = request
+                    keep_alive = headers.get('connection', '').lower() != 'close'
+                    status, content_type, payload = await self._dispatch(method, path, headers, body)
+                except HTTPError as error:
+                    self.metrics.errors += 1
+                    status, content_type = error.status, JSON_TYPE
+                    payload = json.dumps({"error": error.message}).encode()
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    raise
+                except Exception as error:
+                    # Keep serving other requests after a processing failure
+                    self.metrics.errors += 1
+                    status, content_type = HTTPStatus.INTERNAL_SERVER_ERROR, JSON_TYPE
+                    payload = json.dumps({"error": repr(error)}).encode()
+                writer.write(_response(status, content_type, payload, keep_alive))
+                await writer.drain()
+                self.metrics.record_request(time.perf_counter() - start)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+    
+    async def _dispatch(self, method: str, path: str, headers: dict, body: bytes) -> Tuple[int, str, bytes]:
+        """Route a request; returns (status, content type, body)."""
+        if path == '/match':
+            if method != 'POST':
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "use POST")
+            ndjson = 'ndjson' in headers.get('content-type', '')
+            results = await self.match(_parse_pairs(body, ndjson))
+            if ndjson:
+                return HTTPStatus.OK, NDJSON_TYPE, "".join(json.dumps(row) + "\n" for row in results).encode()
+            return HTTPStatus.OK, JSON_TYPE, json.dumps(results).encode()
+        
+        if path in ('/health', '/metrics'):
+            if method != 'GET':
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "use GET")
+            document = self.health() if path == '/health' else self.get_metrics()
+            return HTTPStatus.OK, JSON_TYPE, json.dumps(document).encode()
+        
+        raise HTTPError(HTTPStatus.NOT_FOUND, f"unknown path {path}")
+    
+    def health(self) -> dict:
+        """Liveness document of GET /health."""
+        loader = self.processor.loader
+        return {
+            "status": "ok",
+            "locations": len(loader.locations) - len(loader.removed),
+            "hierarchy_version": loader.version,
+        }
+    
+    def get_metrics(self) -> dict:
+        """Metrics document of GET /metrics."""
+        metrics = self.metrics.summary()
+        metrics["queue_depth"] = self._queue.qsize() if self._queue is not None else 0
+        metrics["resolution_cache"] = self.processor.resolver.get_cache_stats()
+        metrics["pair_cache"] = self.processor.pair_cache.get_stats()
+        if self.processor.profiler is not None:
+            metrics["profile"] = self.processor.profiler.summary()
+        return metrics
+
+
+class ServiceMetrics:
+    """Request, batch and latency counters of a MatchService."""
+    
+    def __init__(self, latency_window: int = 10_000):
+        """
+        Args:
+            latency_window: Recent requests kept for latency percentiles
+        """
+        self.requests = 0
+        self.errors = 0
+        self.pairs = 0
+        self.batches = 0
+        self.processing_seconds = 0.0
+        self.latencies = deque(maxlen=latency_window)
+        self.started = time.perf_counter()
+    
+    def start(self):
+        """Restart the uptime clock."""
+        self.started = time.perf_counter()
+    
+    def record_request(self, seconds: float):
+        """Count an answered request and its latency."""
+        self.requests += 1
+        self.latencies.append(seconds)
+    
+    def record_batch(self, pairs: int, seconds: float):
+        """Count a processed batch."""
+        self.batches += 1
+        self.pairs += pairs
+        self.processing_seconds += seconds
+    
+    def summary(self) -> dict:
+        """
+        Get the counters, throughput and latency percentiles.
+        
+        Returns:
+            Dict with requests, errors, pairs, batches, pairs_per_batch,
+            uptime_seconds, pairs_per_second (over the uptime),
+            processing_seconds, pairs_per_processing_second and
+            latency_ms (p50, p90, p99, max over the recent requests)
+        """
+        uptime = time.perf_counter() - self.started
+        latencies = np.array(self.latencies) * 1000
+        if len(latencies):
+            p50, p90, p99 = np.percentile(latencies, [50, 90, 99]).tolist()
+            latency = {"p50": p50, "p90": p90, "p99": p99, "max": float(latencies.max())}
+        else:
+            latency = {"p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0}
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "pairs": self.pairs,
+            "batches": self.batches,
+            "pairs_per_batch": self.pairs / self.batches if self.batches else 0.0,
+            "uptime_seconds": uptime,
+            "pairs_per_second": self.pairs / uptime if uptime else 0.0,
+            "processing_seconds": self.processing_seconds,
+            "pairs_per_processing_second": (self.pairs / self.processing_seconds
+                                            if self.processing_seconds else 0.0),
+            "latency_ms": latency,
+        }
+
+
+async def _read_request(reader: asyncio.StreamReader,
+                        max_body: int) -> Optional[Tuple[str, str, dict, bytes]]:
+    """
+    Read one HTTP/1.1 request.
+    
+    Returns:
+        (method, path without query, lowercase headers, body), or None
+        when the client closed the connection
+    """
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    try:
+        method, target, _ = line.decode('latin-1').split(None, 2)
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "malformed request line")
+    
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    
+    if 'chunked' in headers.get('transfer-encoding', '').lower():
+        raise HTTPError(HTTPStatus.LENGTH_REQUIRED, "chunked bodies are not supported")
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "invalid Content-Length")
+    if length > max_body:
+        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"body larger than {max_body} bytes")
+    body = await reader.readexactly(length) if length else b''
+    return method.upper(), target.split('?', 1)[0], headers, body
+
+
+def _parse_pairs(body: bytes, ndjson: bool) -> List[dict]:
+    """Decode the pair objects of a /match body."""
+    try:
+        if ndjson:
+            pairs = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            pairs = json.loads(body)
+            if isinstance(pairs, dict):
+                pairs = pairs.get('pairs')
+    except ValueError as error:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"invalid JSON: {error}")
+    
+    if not isinstance(pairs, list) or not all(isinstance(pair, dict) for pair in pairs):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "expected a list of pair objects")
+    for index, pair in enumerate(pairs):
+        for col in PAIR_COLUMNS:
+            value = pair.get(col)
+            if value is not None and not isinstance(value, str):
+                raise HTTPError(HTTPStatus.BAD_REQUEST, f"pair {index}: {col} must be a string or null")
+    return pairs
+
+
+def _response(status: int, content_type: str, body: bytes, keep_alive: bool) -> bytes:
+    """Serialize an HTTP/1.1 response."""
+    status = HTTPStatus(status)
+    head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode('latin-1') + body
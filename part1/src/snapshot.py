@@ -0,0 +1,171 @@
+"""
+Binary snapshot format for precompiled GeoDataLoader structures.
+
+Layout (little endian):
+
+    magic      8 bytes   b"GEOSNAP\\0"
+    version    uint32
+    header_len uint32
+    header     JSON (utf-8): metadata plus dtype/shape/offset of each array
+    padding    to an 8-byte boundary
+    arrays     raw array data, each starting on an 8-byte boundary
+    
+Arrays are read back with numpy.frombuffer over a read-only mmap, so
+loading does not copy the numeric data.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+MAGIC = b"GEOSNAP\0"
+VERSION = 1
+_PREAMBLE = struct.Struct("<8sII")
+_ALIGN = 8
+
+
+class SnapshotError(ValueError):
+    """Raised when a snapshot file is missing, corrupt or incompatible."""
+
+
+def file_checksum(path: str) -> str:
+    """
+    Compute the SHA-256 checksum of a file.
+    
+    Args:
+        path: File path
+        
+    Returns:
+        Hex digest of the file contents
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def encode_strings(strings: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pack a list of strings into a utf-8 blob plus an offsets array.
+    
+    Args:
+        strings: Strings to pack
+        
+    Returns:
+        Tuple of (blob as uint8 array, int64 offsets of length len+1)
+    """
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return blob, offsets
+
+
+def decode_strings(blob: np.ndarray, offsets: np.ndarray) -> List[str]:
+    """
+    Unpack strings packed with encode_strings.
+    
+    Args:
+        blob: uint8 array with the concatenated utf-8 data
+        offsets: int64 offsets array
+        
+    Returns:
+        List of strings
+    """
+    data = blob.tobytes()
+    bounds = offsets.tolist()
+    return [data[bounds[i]:bounds[i + 1]].decode('utf-8') for i in range(len(bounds) - 1)]
+
+
+def write_snapshot(path: str, metadata: dict, arrays: Dict[str, np.ndarray]):
+    """
+    Write metadata and arrays to a snapshot file.
+    
+    The file is written to a temporary path and renamed into place, so
+    readers never observe a partially written snapshot.
+    
+    Args:
+        path: Destination file path
+        metadata: JSON-serializable metadata
+        arrays: Mapping of array name to numpy array
+    """
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        arrays[name] = array
+        layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset += _aligned(array.nbytes)
+    
+    header = json.dumps({"metadata": metadata, "arrays": layout}).encode('utf-8')
+    data_start = _aligned(_PREAMBLE.size + len(header))
+    
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(_PREAMBLE.pack(MAGIC, VERSION, len(header)))
+        f.write(header)
+        f.write(b"\0" * (data_start - _PREAMBLE.size - len(header)))
+        for array in arrays.values():
+            f.write(array.tobytes())
+            f.write(b"\0" * (_aligned(array.nbytes) - array.nbytes))
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path: str) -> Tuple[dict, Dict[str, np.ndarray]]:
+    """
+    Read a snapshot file written by write_snapshot.
+    
+    Args:
+        path: Snapshot file path
+        
+    Returns:
+        Tuple of (metadata, arrays). Arrays are read-only views over a
+        memory map of the file.
+        
+    Raises:
+        SnapshotError: If the file is missing, corrupt or has another version
+    """
+    try:
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as e:
+        raise SnapshotError(f"Cannot open snapshot {path}: {e}") from e
+    
+    if len(mapped) < _PREAMBLE.size:
+        raise SnapshotError(f"Snapshot {path} is truncated")
+    magic, version, header_len = _PREAMBLE.unpack_from(mapped, 0)
+    if magic != MAGIC:
+        raise SnapshotError(f"{path} is not a GeoDataLoader snapshot")
+    if version != VERSION:
+        raise SnapshotError(f"Snapshot {path} has version {version}, expected {VERSION}")
+    
+    try:
+        header = json.loads(mapped[_PREAMBLE.size:_PREAMBLE.size + header_len].decode('utf-8'))
+    except ValueError as e:
+        raise SnapshotError(f"Snapshot {path} has a corrupt header") from e
+    
+    data_start = _aligned(_PREAMBLE.size + header_len)
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        start = data_start + spec["offset"]
+        if start + count * dtype.itemsize > len(mapped):
+            raise SnapshotError(f"Snapshot {path} is truncated")
+        if count == 0:
+            arrays[name] = np.empty(spec["shape"], dtype=dtype)
+            continue
+        arrays[name] = np.frombuffer(mapped, dtype=dtype, count=count, offset=start).reshape(spec["shape"])
+    
+    return header["metadata"], arrays
+
+
+def _aligned(size: int) -> int:
+    """Round size up to the snapshot alignment."""
+    return (size + _ALIGN - 1) // _ALIGN * _ALIGN
@@ -0,0 +1,226 @@
+"""
+Streaming pipeline to annotate CSV/Parquet pair files larger than memory.
+
+Input is read in chunks, each chunk goes through GeoProcessor.process and
+is appended to the output right away, so memory stays flat regardless of
+the file size.
+"""
+
+import time
+from typing import Callable, Iterator, Optional
+
+import pandas as pd
+
+from .processor import GeoProcessor, PAIR_COLUMNS
+from .utils import import_pyarrow
+
+
+def detect_format(path: str) -> str:
+    """
+    Guess the file format from the extension.
+    
+    Args:
+        path: File path (compressed CSVs like .csv.gz are supported)
+        
+    Returns:
+        "csv" or "parquet"
+    """
+    name = path.lower()
+    if name.endswith(('.parquet', '.pq')):
+        return 'parquet'
+    return 'csv'
+
+
+def read_chunks(path: str, chunk_size: int = 100_000, file_format: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    """
+    Read a CSV or Parquet file as a sequence of DataFrames.
+    
+    Name columns are read as plain objects so values such as "1" stay
+    strings; empty CSV fields become NaN and are treated as empty names.
+    
+    Args:
+        path: Input file path
+        chunk_size: Rows per chunk
+        file_format: "csv" or "parquet" (default: from the extension)
+        
+    Yields:
+        DataFrame chunks with a running RangeIndex across the file
+    """
+    file_format = file_format or detect_format(path)
+    
+    if file_format == 'csv':
+        reader = pd.read_csv(path, chunksize=chunk_size, dtype={col: object for col in PAIR_COLUMNS})
+        with reader:
+            yield from reader
+    elif file_format == 'parquet':
+        parquet_file = _import_pyarrow_parquet().ParquetFile(path)
+        offset = 0
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            chunk = batch.to_pandas()
+            chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+            offset += len(chunk)
+            yield chunk
+        if offset == 0:
+            # Like read_csv, yield one empty chunk so the columns are known
+            yield parquet_file.schema_arrow.empty_table().to_pandas()
+    else:
+        raise ValueError(f"Unsupported format: {file_format}")
+
+
+def stream_process(processor: GeoProcessor, path: str, chunk_size: int = 100_000,
+                   file_format: Optional[str] = None, compact: bool = False) -> Iterator[pd.DataFrame]:
+    """
+    Annotate a pair file chunk by chunk.
+    
+    Args:
+        processor: Loaded GeoProcessor
+        path: Input CSV/Parquet file
+        chunk_size: Rows per chunk
+        file_format: "csv" or "parquet" (default: from the extension)
+        compact: int8 levels and bool flags (see GeoProcessor.process)
+        
+    Yields:
+        Chunks with expected_level and is_ambiguous columns added
+    """
+    for chunk in read_chunks(path, chunk_size, file_format):
+        # Chunks are fresh frames, so the columns are added in place
+        yield processor.process(chunk, output='inplace', compact=compact)
+
+
+def output_schema(processor: GeoProcessor, input_path: str, input_format: Optional[str] = None,
+                  compact: bool = False) -> dict:
+    """
+    Declare the Parquet types of the columns written by process_file.
+    
+    Args:
+        processor: Loaded GeoProcessor
+        input_path: Input CSV/Parquet file
+        input_format: Input format (default: from the extension)
+        compact: int8 levels and bool flags (see GeoProcessor.process)
+        
+    Returns:
+        Dict of column name -> pyarrow type: the input file's own types
+        (Parquet input) or strings for the name columns (CSV input), and
+        the types of the columns added by the processor
+    """
+    pa = import_pyarrow("Parquet support")
+    if (input_format or detect_format(input_path)) == 'parquet':
+        types = {field.name: field.type for field in _import_pyarrow_parquet().ParquetFile(input_path).schema_arrow}
+    else:
+        types = {col: pa.string() for col in PAIR_COLUMNS}
+    
+    # The added columns' dtypes do not depend on the rows
+    empty = pd.DataFrame({col: pd.Series([], dtype=object) for col in PAIR_COLUMNS})
+    added = processor.process(empty, output='columns', compact=compact)
+    types.update((col, pa.from_numpy_dtype(dtype)) for col, dtype in added.dtypes.items())
+    return types
+
+
+class ChunkWriter:
+    """Appends DataFrame chunks to a CSV or Parquet file."""
+    
+    def __init__(self, path: str, file_format: Optional[str] = None, schema: Optional[dict] = None):
+        """
+        Initialize the writer. The file is created on the first chunk.
+        
+        Args:
+            path: Output file path
+            file_format: "csv" or "parquet" (default: from the extension)
+            schema: Parquet only: dict of column name -> pyarrow type
+                declaring the output's types (see output_schema). Columns it
+                does not declare take the first chunk's type, with string
+                for columns that are all null there, so later chunks never
+                have to be cast to a null column.
+        """
+        self.path = path
+        self.file_format = file_format or detect_format(path)
+        if self.file_format not in ('csv', 'parquet'):
+            raise ValueError(f"Unsupported format: {self.file_format}")
+        self.schema = schema
+        self._parquet_writer = None
+        self._started = False
+    
+    def write(self, chunk: pd.DataFrame):
+        """Append a chunk to the output file."""
+        if self.file_format == 'csv':
+            chunk.to_csv(self.path, mode='a' if self._started else 'w', header=not self._started, index=False)
+        else:
+            pa = import_pyarrow("Parquet support")
+            if self._parquet_writer is None:
+                self._parquet_writer = _import_pyarrow_parquet().ParquetWriter(
+                    self.path, self._parquet_schema(pa, chunk))
+            table = pa.Table.from_pandas(chunk, schema=self._parquet_writer.schema, preserve_index=False)
+            self._parquet_writer.write_table(table)
+        self._started = True
+    
+    def _parquet_schema(self, pa, chunk: pd.DataFrame):
+        """Output schema: the declared types over the first chunk's columns."""
+        declared = self.schema or {}
+        fields = []
+        for field in pa.Schema.from_pandas(chunk, preserve_index=False):
+            if field.name in declared:
+                field = field.with_type(declared[field.name])
+            if pa.types.is_null(field.type):
+                field = field.with_type(pa.string())
+            fields.append(field)
+        return pa.schema(fields)
+    
+    def close(self):
+        """Finish the output file."""
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def process_file(processor: GeoProcessor, input_path: str, output_path: str, chunk_size: int = 100_000,
+                 input_format: Optional[str] = None, output_format: Optional[str] = None,
+                 progress: Optional[Callable[[dict], None]] = None, compact: bool = False) -> dict:
+    """
+    Annotate a pair file and write the result incrementally.
+    
+    Args:
+        processor: Loaded GeoProcessor
+        input_path: Input CSV/Parquet file
+        output_path: Output CSV/Parquet file
+        chunk_size: Rows per chunk
+        input_format: Input format (default: from the extension)
+        output_format: Output format (default: from the extension)
+        progress: Optional callback called after each chunk with the
+            running statistics (see return value)
+        compact: int8 levels and bool flags (see GeoProcessor.process)
+        
+    Returns:
+        Statistics: rows, chunks, seconds, rows_per_sec
+    """
+    stats = {"rows": 0, "chunks": 0, "seconds": 0.0, "rows_per_sec": 0.0}
+    start = time.perf_counter()
+    
+    output_format = output_format or detect_format(output_path)
+    schema = None
+    if output_format == 'parquet':
+        schema = output_schema(processor, input_path, input_format, compact)
+    
+    with ChunkWriter(output_path, output_format, schema=schema) as writer:
+        for chunk in stream_process(processor, input_path, chunk_size, input_format, compact=compact):
+            writer.write(chunk)
+            stats["rows"] += len(chunk)
+            stats["chunks"] += 1
+            stats["seconds"] = time.perf_counter() - start
+            stats["rows_per_sec"] = stats["rows"] / stats["seconds"] if stats["seconds"] else 0.0
+            if progress is not None:
+                progress(dict(stats))
+    
+    return stats
+
+
+def _import_pyarrow_parquet():
+    """Import pyarrow.parquet, which is only needed for Parquet files."""
+    import_pyarrow("Parquet support")
+    import pyarrow.parquet
+    return pyarrow.parquet
@@ -2,7 +2,15 @@
 Utility functions for geographic location processing.
 """
 
+import gc
 import unicodedata
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
 
 
 def normalize_name(name: str) -> str:
@@ -13,6 +21,8 @@ def normalize_name(name: str) -> str:
     - Removes accents/diacritics
     - Strips whitespace
     
+    Results are memoized (LRU), since the same names repeat across rows.
+    
     Args:
         name: Original location name
         
@@ -28,6 +38,16 @@ def normalize_name(name: str) -> str:
     if not name or not isinstance(name, str):
         return ""
     
+    return _normalize_str(name)
+
+
+@lru_cache(maxsize=65536)
+def _normalize_str(name: str) -> str:
+    """Normalize a non-empty string (memoized body of normalize_name)."""
+    # ASCII shortcut: no accents to remove, NFD is the identity
+    if name.isascii():
+        return name.lower().strip()
+    
     # Convert to lowercase
     name = name.lower()
     
@@ -43,6 +63,46 @@ def normalize_name(name: str) -> str:
     return name
 
 
+def factorize_names(values) -> Tuple[np.ndarray, List[str]]:
+    """
+    Normalize an array of names, touching each distinct raw value once.
+    
+    Empty values (None, NaN, blank strings, non-strings) normalize to "".
+    
+    Args:
+        values: Array-like of raw names (Series, ndarray, list)
+        
+    Returns:
+        Tuple of (codes, names): int64 code per value indexing into the
+        list of distinct normalized names
+    """
+    raw_codes, raw_uniques = pd.factorize(values)
+    normalized = [normalize_name(value) for value in raw_uniques]
+    # Distinct raw values may collapse to the same normalized name;
+    # the trailing "" catches the NA sentinel (-1) from factorize.
+    norm_codes, norm_uniques = pd.factorize(pd.Series(normalized + [""], dtype=object))
+    return norm_codes[raw_codes].astype(np.int64), list(norm_uniques)
+
+
+def normalize_series(series: pd.Series) -> pd.Series:
+    """
+    Bulk version of normalize_name for a pandas Series.
+    
+    Each distinct value is normalized once and the result is broadcast
+    back to the rows, so the cost depends on the number of distinct names
+    rather than the number of rows.
+    
+    Args:
+        series: Series of raw names
+        
+    Returns:
+        Series of normalized names (object dtype) with the same index/name
+    """
+    codes, names = factorize_names(series)
+    values = np.array(names, dtype=object)[codes]
+    return pd.Series(values, index=series.index, name=series.name, dtype=object)
+
+
 def is_empty(value) -> bool:
     """
     Check if a value is empty (None, NaN, empty string, or whitespace).
@@ -64,3 +124,113 @@ def is_empty(value) -> bool:
         return len(value.strip()) == 0
     
     return False
+
+
+def import_pyarrow(feature: str):
+    """
+    Import pyarrow, an optional dependency.
+    
+    Args:
+        feature: What needs it, for the error message (e.g. "Parquet support")
+        
+    Returns:
+        The pyarrow module
+    """
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError(f"{feature} requires pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+
+@contextmanager
+def gc_paused():
+    """
+    Pause the cyclic garbage collector inside a with-block.
+    
+    Building millions of small acyclic containers (index lists, key
+    tuples) otherwise triggers repeated full collections that cost as
+    much as the build itself.
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+class LRUCache:
+    """Bounded least-recently-used cache with hit/miss counters."""
+    
+    def __init__(self, maxsize: int = 4096):
+        """
+        Initialize an empty cache.
+        
+        Args:
+            maxsize: Maximum number of entries (0 disables caching)
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+    
+    def get(self, key, default=None):
+        """
+        Return the cached value for key, marking it as recently used.
+        
+        Args:
+            key: Cache key
+            default: Value returned on a miss
+            
+        Returns:
+            Cached value or default
+        """
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+    
+    def put(self, key, value):
+        """
+        Store a value, evicting the least recently used entry when full.
+        
+        Args:
+            key: Cache key
+            value: Value to store
+        """
+        if self.maxsize <= 0:
+            return
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+    
+    def items(self) -> list:
+        """(key, value) pairs from least to most recently used."""
+        return list(self._data.items())
+    
+    def clear(self):
+        """Drop all entries and reset the counters."""
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+    
+    def __len__(self):
+        return len(self._data)
+    
+    def get_stats(self) -> dict:
+        """Get cache statistics."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
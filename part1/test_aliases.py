@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test the alias table compiled into the name indexes.
+"""
+
+import sys
+import os
+import tempfile
+
+import pandas as pd
+
+# Add part1 directory to path to enable imports
+part1_dir = os.path.dirname(os.path.abspath(__file__))
+if part1_dir not in sys.path:
+    sys.path.insert(0, part1_dir)
+
+from src.aliases import load_aliases, name_variants
+from src.loader import GeoDataLoader
+from src.prefix import PrefixIndex
+from src.processor import GeoProcessor
+
+ALIASES_PATH = os.path.join(part1_dir, 'data', 'aliases.json')
+
+
+def test_alias_table():
+    """Entries are normalized, get both period forms and must be words."""
+    table = load_aliases({"São": ["S."], "SANTA": "sta"})
+    assert table == {"sao": ["s", "s."], "santa": ["sta", "sta."]}
+    assert load_aliases(table) == table
+    assert name_variants("sao pedro", table) == ["s pedro", "s. pedro"]
+    assert name_variants("pedro", table) == []
+    assert len(name_variants(" ".join(["sao"] * 10), table, limit=5)) == 5
+    for bad in ({"nossa senhora": ["ns"]}, {"santa": [""]}, {"santa": ["."]}):
+        try:
+            load_aliases(bad)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"accepted {bad}")
+    print("✅ Alias tables are normalized and validated")
+
+
+def test_abbreviated_names_resolve():
+    """Abbreviated inputs match like the full names they stand for."""
+    json_path = os.path.join(part1_dir, 'data', 'portugal.json')
+    plain = GeoProcessor(json_path)
+    processor = GeoProcessor(json_path, aliases=ALIASES_PATH)
+    loader = processor.loader
+    
+    # Every alias form holds (at least) the ids of the name it abbreviates
+    for key, ids in plain.loader.by_city.items():
+        assert loader.by_city[key] == ids
+        for form in name_variants(key, loader.aliases):
+            assert set(ids) <= set(loader.by_city[form])
+    for key, ids in plain.loader.by_city_state.items():
+        assert loader.by_city_state[key] == ids
+    
+    df = pd.DataFrame({
+        'city_1': ['S. Pedro do Sul', 'Sta Maria', 'N. Sra. das Neves', 'V. N. de Gaia', 'Sao Pedro do Sul'],
+        'state_1': ['', 'Viseu', '', 'Porto', 'Viseu'],
+        'city_2': ['Sao Pedro do Sul', 'Santa Maria', 'Nossa Senhora das Neves', 'Vila Nova de Gaia', 'Sul'],
+        'state_2': ['', 'Viseu', '', 'Porto', 'S. Pedro do Sul'],
+    })
+    full = df.replace({'S. Pedro do Sul': 'Sao Pedro do Sul', 'Sta Maria': 'Santa Maria',
+                       'N. Sra. das Neves': 'Nossa Senhora das Neves', 'V. N. de Gaia': 'Vila Nova de Gaia'})
+    result = processor.process(df)
+    assert result['expected_level'].tolist() == processor.process(full)['expected_level'].tolist()
+    assert result['expected_level'].min() >= 7
+    assert (plain.process(df)['expected_level'] < result['expected_level']).iloc[:4].all()
+    assert plain.process(full)['expected_level'].tolist() == result['expected_level'].tolist()
+    assert processor.resolver.explain('S. Pedro do Sul', 'Viseu')['branch'] == 'city_state'
+    print("✅ Abbreviated names resolve like the full names")
+
+
+def test_alias_snapshot_and_updates():
+    """Snapshots are tied to the alias table; updates index alias forms."""
+    json_path = os.path.join(part1_dir, 'data', 'portugal.json')
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot_path = os.path.join(tmp, 'portugal.snap')
+        loader = GeoDataLoader(json_path, snapshot_path=snapshot_path, aliases=ALIASES_PATH)
+        restored = GeoDataLoader.load_snapshot(snapshot_path)
+        assert restored.aliases == loader.aliases
+        assert restored.aliases_checksum == loader.aliases_checksum
+        assert (restored.by_city, restored.by_city_state) == (loader.by_city, loader.by_city_state)
+        
+        # Another table (or none) rebuilds the snapshot instead of loading it
+        other = GeoDataLoader(json_path, snapshot_path=snapshot_path, aliases={"santa": ["sta"]})
+        assert 's pedro do sul' not in other.by_city and 'sta maria' in other.by_city
+        plain = GeoDataLoader.load_snapshot(snapshot_path, aliases={})
+        assert plain.aliases_checksum is None and 'sta maria' not in plain.by_city
+        
+        # Pair cache files are tied to the alias table too
+        cache_path = os.path.join(tmp, 'pairs.json')
+        processor = GeoProcessor(json_path, pair_cache_size=100, aliases=ALIASES_PATH)
+        processor.process(pd.DataFrame({'city_1': ['Sta Maria'], 'state_1': ['Viseu'],
+                                        'city_2': ['Viseu'], 'state_2': ['']}))
+        processor.save_pair_cache(cache_path)
+        assert GeoProcessor(json_path, pair_cache_size=100, aliases=ALIASES_PATH).load_pair_cache(cache_path)
+        assert not GeoProcessor(json_path, pair_cache_size=100).load_pair_cache(cache_path)
+    
+    viseu = next(loc_id for loc_id in loader.by_city['viseu'] if loader.admin_levels[loc_id] == 6)
+    new_id = loader.add_subtree(viseu, "Santa Nova", {"admin_level": 8})
+    assert loader.by_city['sta n'] == [new_id] and new_id in loader.by_city_state[('sta. nova', 'viseu')]
+    loader.rename(new_id, "Outra Nova")
+    assert 'sta nova' not in loader.by_city and ('sta nova', 'viseu') not in loader.by_city_state
+    assert loader.by_city['outra n'] == [new_id]
+    loader.remove_subtree(new_id)
+    assert 'outra n' not in loader.by_city
+    print("✅ Alias keys follow snapshots and hierarchy updates")
+
+
+def test_prefix_search_ignores_alias_keys():
+    """Alias forms are lookup keys only: prefix search lists names once."""
+    json_path = os.path.join(part1_dir, 'data', 'portugal.json')
+    plain = PrefixIndex(GeoDataLoader(json_path))
+    aliased = PrefixIndex(GeoDataLoader(json_path, aliases=ALIASES_PATH))
+    assert aliased.names == plain.names
+    for prefix in ('sao', 'sta', 's. ', 'nossa', 'vila nova'):
+        assert ([loc.id for loc in aliased.search(prefix, limit=50)]
+                == [loc.id for loc in plain.search(prefix, limit=50)])
+    print("✅ Prefix search ignores alias keys")
+
+
+if __name__ == '__main__':
+    test_alias_table()
+    test_abbreviated_names_resolve()
+    test_alias_snapshot_and_updates()
+    test_prefix_search_ignores_alias_keys()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test that the columnar batch engine matches the row-by-row path.
+"""
+
+import random
+import pandas as pd
+import sys
+import os
+
+# Add part1 directory to path to enable imports
+part1_dir = os.path.dirname(os.path.abspath(__file__))
+if part1_dir not in sys.path:
+    sys.path.insert(0, part1_dir)
+
+from src.processor import GeoProcessor
+
+
+def _random_pairs(processor, n, seed=0):
+    """Build a DataFrame of random pairs, including messy values."""
+    rng = random.Random(seed)
+    cities = list(processor.loader.by_city)[:300] + [
+        'lugar que nao existe', 'São Pedro do Sul', '  VALADARES  ', '', '   ', None, float('nan')
+    ]
+    states = [None, float('nan'), '', 'viseu', 'Viseu', 'porto', 'lisboa', 'sao pedro do sul', 'madeira']
+    return pd.DataFrame({
+        'id_1': range(n),
+        'id_2': range(n),
+        'city_1': [rng.choice(cities) for _ in range(n)],
+        'city_2': [rng.choice(cities) for _ in range(n)],
+        'state_1': [rng.choice(states) for _ in range(n)],
+        'state_2': [rng.choice(states) for _ in range(n)],
+    }, index=[f"row{i}" for i in range(n)])
+
+
+def test_batch_matches_row_path():
+    """Batch and row-by-row processing must give identical frames."""
+    json_path = os.path.join(part1_dir, 'data', 'portugal.json')
+    processor = GeoProcessor(json_path)
+
+    df = _random_pairs(processor, 5000)
+    expected = processor.process(df, batch=False)
+    actual = processor.process(df)
+
+    pd.testing.assert_frame_equal(actual, expected)
+    print(f"✅ Batch engine matches row path on {len(df)} rows")
+
+
+def test_batch_missing_columns():
+    """Missing state columns behave like empty states."""
+    json_path = os.path.join(part1_dir, 'data', 'portugal.json')
+    processor = GeoProcessor(json_path)
+
+    df = pd.DataFrame({
+        'city_1': ['valadares', 'sao pedro do sul'],
+        'city_2': ['valadares', 'valadares'],
+    })
+    expected = processor.process(df, batch=False)
+    actual = processor.process(df)
+
+    pd.testing.assert_frame_equal(actual, expected)
+    assert list(actual['expected_level']) == [8, 7]
+    assert list(actual['is_ambiguous']) == [1, 1]
+    print("✅ Missing columns handled like empty values")
+
+
+if __name__ == '__main__':
+    test_batch_matches_row_path()
+    test_batch_missing_columns()
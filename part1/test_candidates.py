@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test the all-candidates mode (best/worst level over every combination).
+"""
+
+import json
+import pandas as pd
+import sys
+import os
+import tempfile
+
+# Add part1 directory to path to enable imports
+part1_dir = os.path.dirname(os.path.abspath(__file__))
+for path in (part1_dir, os.path.join(part1_dir, 'benchmarks')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import src.processor
+from src.processor import GeoProcessor
+from synthetic import synthetic_pairs, synthetic_tree
+from test_batch_engine import _random_pairs
+
+
+def _nested_loop(processor, row):
+    """Reference: every candidate combination compared one by one."""
+    matches_1 = processor.resolver.resolve(row['city_1'], row['state_1'])
+    matches_2 = processor.resolver.resolve(row['city_2'], row['state_2'])
+    levels = [processor.resolver.find_common_ancestor_level(a, b) for a in matches_1 for b in matches_2]
+    if not levels:
+        return 2, 2, 0
+    return max(levels), min(levels), len(levels)
+
+
+def test_candidates_match_nested_loop():
+    """Batch and row engines agree with comparing every combination."""
+    json_path = os.path.join(part1_dir, 'data', 'portugal.json')
+    processor = GeoProcessor(json_path, candidates=True)
+    df = _random_pairs(processor, 2000, seed=7)
+    
+    # Names with many homonyms and no state
+    df.iloc[:10, df.columns.get_loc('city_1')] = ['Pinheiro', 'Santana', 'Espinho', 'Carvalhal', 'Calheta',
+                                                  'Pinheiro', 'Santa Cruz', 'São Vicente', 'Valadares', 'Lisboa']
+    df.iloc[:10, df.columns.get_loc('state_1')] = ''
+    df.iloc[:10, df.columns.get_loc('city_2')] = ['Pinheiro', 'Castelo Branco', 'Santa Bárbara', 'Espinho',
+                                                  'Santa Cruz', 'Lisboa', 'Rio de Moinhos', 'Calheta',
+                                                  'Valadares', 'Porto']
+    df.iloc[:10, df.columns.get_loc('state_2')] = ''
+    
+    result = processor.process(df)
+    expected = [_nested_loop(processor, row) for _, row in df.iterrows()]
+    columns = ['best_level', 'worst_level', 'candidate_count']
+    assert [tuple(values) for values in result[columns].itertuples(index=False)] == expected
+    assert (result['candidate_count'] >= 25).any()
+    
+    # First-match expected_level is unchanged and never beats the best case
+    plain = GeoProcessor(json_path).process(df)
+    assert result['expected_level'].tolist() == plain['expected_level'].tolist()
+    assert (result['best_level'] >= result['expected_level']).all()
+    
+    pd.testing.assert_frame_equal(processor.process(df, batch=False), result)
+    print(f"✅ All-candidates levels match the nested loop "
+          f"(max {result['candidate_count'].max()} combinations)")
+
+
+def test_candidates_chunked():
+    """Results do not depend on how combinations are split into chunks."""
+    json_path = os.path.join(part1_dir, 'data', 'portugal.json')
+    processor = GeoProcessor(json_path, candidates=True, pair_cache_size=10_000)
+    df = _random_pairs(processor, 1000, seed=8)
+    expected = processor.process(df)
+    
+    chunk = src.processor.CANDIDATE_CHUNK
+    src.processor.CANDIDATE_CHUNK = 7
+    try:
+        processor.pair_cache.clear()
+        pd.testing.assert_frame_equal(processor.process(df), expected)
+    finally:
+        src.processor.CANDIDATE_CHUNK = chunk
+    
+    # Served from the pair cache, in either order
+    pd.testing.assert_frame_equal(processor.process(df), expected)
+    assert processor.get_stats()['pair_cache']['hits'] > 0
+    print("✅ Chunked and cached candidate levels are consistent")
+
+
+def test_candidates_many_homonyms():
+    """Names with dozens of homonyms on a synthetic tree."""
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, 'tree.json')
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(synthetic_tree(5000, n_names=500, common_share=0.5), f)
+        processor = GeoProcessor(json_path, candidates=True)
+        df = synthetic_pairs(processor.loader, 300)
+        
+        result = processor.process(df)
+        expected = [_nested_loop(processor, row) for _, row in df.iterrows()]
+        columns = ['best_level', 'worst_level', 'candidate_count']
+        assert [tuple(values) for values in result[columns].itertuples(index=False)] == expected
+        assert result['candidate_count'].max() > 1000
+    print(f"✅ Up to {result['candidate_count'].max()} combinations per row match the nested loop")
+
+
+def test_candidates_updated_and_irregular_hierarchy():
+    """Preorder ranks follow updates; irregular levels use every combination."""
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, 'tree.json')
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(synthetic_tree(2000, n_names=100, common_share=0.5, seed=3), f)
+        processor = GeoProcessor(json_path, candidates=True)
+        loader = processor.loader
+        df = synthetic_pairs(loader, 300, seed=4)
+        columns = ['best_level', 'worst_level', 'candidate_count']
+        
+        # Move concelhos to other districts, so ids are no longer in preorder
+        districts = [loc.id for loc in loader.locations if loc.admin_level == 6]
+        concelhos = [loc.id for loc in loader.locations if loc.admin_level == 7]
+        for i, concelho in enumerate(concelhos[:20]):
+            loader.move_subtree(concelho, districts[-1 - i % len(districts)])
+        assert not (loader.lca_index.preorder == range(len(loader.locations))).all()
+        
+        # A district below a freguesia breaks the level order
+        freguesia = next(loc.id for loc in loader.locations if loc.admin_level == 8)
+        for node in ({"admin_level": 8}, {"admin_level": 6, "children": {"Lisboa": {"admin_level": 8}}}):
+            loader.add_subtree(freguesia, "Lisboa", node)
+            result = processor.process(df)
+            expected = [_nested_loop(processor, row) for _, row in df.iterrows()]
+            assert [tuple(values) for values in result[columns].itertuples(index=False)] == expected
+    print("✅ Candidate levels correct after updates and with irregular levels")
+
+
+if __name__ == '__main__':
+    test_candidates_match_nested_loop()
+    test_candidates_chunked()
+    test_candidates_many_homonyms()
+    test_candidates_updated_and_irregular_hierarchy()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test per-level clustering of location records against pairwise matching.
+"""
+
+import random
+import sys
+import os
+
+import pandas as pd
+
+# Add part1 directory to path to enable imports
+part1_dir = os.path.dirname(os.path.abspath(__file__))
+if part1_dir not in sys.path:
+    sys.path.insert(0, part1_dir)
+
+from src.clustering import UnionFind
+from src.processor import GeoProcessor
+
+LEVELS = (6, 7, 8)
+
+
+def _records(processor, n, seed):
+    rng = random.Random(seed)
+    cities = list(processor.loader.by_city)[:150] + ['santa maria', 'sao pedro', 'lugar que nao existe', '', None]
+    states = [None, '', 'viseu', 'porto', 'lisboa', 'aveiro']
+    return pd.DataFrame({
+        'city': [rng.choice(cities) for _ in range(n)],
+        'state': [rng.choice(states) for _ in range(n)],
+    }, index=[f"rec{i}" for i in range(n)])
+
+
+def _block(loader, loc_id, level):
+    """Highest ancestor whose path reaches level, by walking the chain."""
+    block = -1
+    for ancestor in loader.ancestor_ids(loc_id):
+        if loader.lca_index.path_max_level[ancestor] >= level:
+            block = ancestor
+    return block
+
+
+def _same_partition(clusters, groups):
+    """Cluster ids (-1 = none) describe the same partition as group labels."""
+    return (pd.Series(clusters).groupby(pd.Series(groups)).nunique().max() <= 1
+            and pd.Series(groups).groupby(pd.Series(clusters)).nunique().max() <= 1)
+
+
+def test_first_candidate_clusters_match_pairs():
+    """Without merging, same cluster <=> process() matches at the level."""
+    json_path = os.path.join(part1_dir, 'data', 'portugal.json')
+    processor = GeoProcessor(json_path)
+    df = _records(processor, 200, seed=3)
+    clusters = processor.cluster(df, LEVELS, merge_ambiguous=False)
+    assert list(clusters.columns) == [f'cluster_{level}' for level in LEVELS]
+    assert clusters.index.equals(df.index)
+    
+    pairs = pd.merge(df.reset_index(), df.reset_index(), how='cross', suffixes=('_1', '_2'))
+    levels = processor.process(pairs, output='columns')['expected_level'].to_numpy()
+    for level in LEVELS:
+        ids = clusters[f'cluster_{level}'].to_numpy()
+        ids_1 = ids[pairs.index.to_numpy() // len(df)]
+        ids_2 = ids[pairs.index.to_numpy() % len(df)]
+        assert ((ids_1 == ids_2) & (ids_1 >= 0)).tolist() == (levels >= level).tolist(), level
+        assert ids.max() + 1 == len(set(ids.tolist()) - {-1})
+    print("✅ First-candidate clusters agree with pairwise levels")
+
+
+def test_ambiguous_records_merge_clusters():
+    """With merging, clusters are the components of shared candidate blocks."""
+    json_path = os.path.join(part1_dir, 'data', 'portugal.json')
+    processor = GeoProcessor(json_path)
+    loader = processor.loader
+    df = _records(processor, 300, seed=4)
+    clusters = processor.cluster(df, LEVELS)
+    
+    for level in LEVELS:
+        block_ids = {}
+        sets = UnionFind(len(df))
+        for row, (city, state) in enumerate(zip(df['city'], df['state'])):
+            for location in processor.resolver.resolve(city, state):
+                block = _block(loader, location.id, level)
+                if block >= 0:
+                    sets.union(row, block_ids.setdefault(block, row))
+        groups = [sets.find(row) if any(_block(loader, loc.id, level) >= 0
+                                         for loc in processor.resolver.resolve(city, state)) else -1
+                  for row, (city, state) in enumerate(zip(df['city'], df['state']))]
+        ids = clusters[f'cluster_{level}'].tolist()
+        assert [i < 0 for i in ids] == [g < 0 for g in groups]
+        assert _same_partition(ids, groups), level
+    
+    # "Sao Vicente" alone could be the one in Chaves or the one in Lisboa
+    records = pd.DataFrame({'city': ['Sao Vicente', 'Sao Vicente', 'Sao Vicente'],
+                            'state': ['Chaves', 'Lisboa', '']})
+    assert processor.cluster(records, [8])['cluster_8'].tolist() == [0, 0, 0]
+    assert processor.cluster(records, [8], merge_ambiguous=False)['cluster_8'].tolist() == [0, 1, -1]
+    print("✅ Ambiguous records merge their candidates' clusters")
+
+
+if __name__ == '__main__':
+    test_first_candidate_clusters_match_pairs()
+    test_ambiguous_records_merge_clusters()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test typo-tolerant (fuzzy) city resolution.
+"""
+
+import pandas as pd
+import sys
+import os
+
+# Add part1 directory to path to enable imports
+part1_dir = os.path.dirname(os.path.abspath(__file__))
+if part1_dir not in sys.path:
+    sys.path.insert(0, part1_dir)
+
+from src.fuzzy import FuzzyIndex, edit_distance
+from src.processor import GeoProcessor
+from test_batch_engine import _random_pairs
+
+
+def test_fuzzy_index_lookup():
+    """The index finds names within the edit distance, closest first."""
+    index = FuzzyIndex(['vila nova de gaia', 'vila nova de poiares', 'sao pedro do sul', 'valadares'])
+    
+    assert index.lookup('vila nova de gaya') == [('vila nova de gaia', 1)]
+    assert index.lookup('s. pedro do sul') == [('sao pedro do sul', 2)]
+    assert index.lookup('valadraes') == [('valadares', 1)]   # transposition
+    assert index.lookup('porto') == []
+    assert edit_distance('kitten', 'sitting', 2) == 3
+    print("✅ Fuzzy index finds misspelled names")
+
+
+def test_fuzzy_processing():
+    """Fuzzy mode resolves misspelled cities and flags them."""
+    json_path = os.path.join(part1_dir, 'data', 'portugal.json')
+    processor = GeoProcessor(json_path, fuzzy=True)
+    
+    df = pd.DataFrame({
+        'city_1': ['vila nova de gaya', 's. pedro do sul', 'valadares'],
+        'state_1': ['porto', None, 'viseu'],
+        'city_2': ['vila nova de gaia', 'sao pedro do sul', 'valadares'],
+        'state_2': ['porto', None, 'viseu'],
+    })
+    result = processor.process(df)
+    assert list(result['expected_level']) == [7, 7, 8]
+    assert list(result['is_fuzzy']) == [1, 1, 0]
+    pd.testing.assert_frame_equal(result, processor.process(df, batch=False))
+    
+    # Without fuzzy mode the misspelled names stay unresolved
+    exact = GeoProcessor(json_path).process(df)
+    assert list(exact['expected_level']) == [2, 2, 8]
+    assert 'is_fuzzy' not in exact.columns
+    print("✅ Fuzzy matches resolved and flagged")
+
+
+def test_fuzzy_keeps_exact_results():
+    """Rows that resolve exactly give the same result in fuzzy mode."""
+    json_path = os.path.join(part1_dir, 'data', 'portugal.json')
+    exact = GeoProcessor(json_path)
+    fuzzy = GeoProcessor(json_path, fuzzy=True)
+    
+    df = _random_pairs(exact, 2000, seed=3)
+    expected = exact.process(df)
+    actual = fuzzy.process(df)
+    
+    exact_rows = actual['is_fuzzy'] == 0
+    pd.testing.assert_frame_equal(actual.loc[exact_rows, expected.columns], expected[exact_rows])
+    pd.testing.assert_frame_equal(actual, fuzzy.process(df, batch=False))
+    print(f"✅ Fuzzy mode keeps exact results ({int((~exact_rows).sum())} fuzzy rows)")
+
+
+if __name__ == '__main__':
+    test_fuzzy_index_lookup()
+    test_fuzzy_processing()
+    test_fuzzy_keeps_exact_results()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test the precomputed LCA index against ancestor-list intersection.
+"""
+
+import random
+import numpy as np
+import sys
+import os
+
+# Add part1 directory to path to enable imports
+part1_dir = os.path.dirname(os.path.abspath(__file__))
+if part1_dir not in sys.path:
+    sys.path.insert(0, part1_dir)
+
+from src.hierarchy import LCAIndex
+from src.loader import GeoDataLoader
+from src.resolver import LocationResolver
+
+
+def _brute_force_level(loader, id_1, id_2):
+    """Common ancestor level computed from ancestor lists (original algorithm)."""
+    if id_1 < 0 or id_2 < 0:
+        return 2
+    ancestors_1 = loader.ancestor_ids(id_1)
+    ancestors_2 = loader.ancestor_ids(id_2)
+    if id_1 == id_2 or id_1 in ancestors_2:
+        return int(loader.admin_levels[id_1])
+    if id_2 in ancestors_1:
+        return int(loader.admin_levels[id_2])
+    common = set(ancestors_1) & set(ancestors_2)
+    return max([2] + [int(loader.admin_levels[a]) for a in common])
+
+
+def test_lca_matches_ancestor_lists():
+    """Scalar and vectorized levels match the ancestor-list algorithm."""
+    loader = GeoDataLoader(os.path.join(part1_dir, 'data', 'portugal.json'))
+    resolver = LocationResolver(loader)
+    
+    rng = np.random.default_rng(0)
+    n = len(loader.locations)
+    ids_a = rng.integers(-1, n, size=20000)
+    ids_b = rng.integers(-1, n, size=20000)
+    # Include identical and parent/child pairs
+    ids_b[:2000] = ids_a[:2000]
+    ids_b[2000:4000] = np.maximum(loader.parent_ids[np.maximum(ids_a[2000:4000], 0)], 0)
+    
+    levels = resolver.find_common_ancestor_levels(ids_a, ids_b)
+    expected = [_brute_force_level(loader, a, b) for a, b in zip(ids_a.tolist(), ids_b.tolist())]
+    assert levels.tolist() == expected
+    
+    for a, b, level in zip(ids_a[:2000].tolist(), ids_b[:2000].tolist(), expected):
+        if a >= 0 and b >= 0:
+            assert resolver.find_common_ancestor_level(loader.locations[a], loader.locations[b]) == level
+    print(f"✅ LCA levels match ancestor lists on {len(ids_a)} pairs")
+
+
+def test_lca_deep_random_tree():
+    """LCA ids are correct on a deep random tree."""
+    rng = random.Random(1)
+    n = 3000
+    parent_ids = np.array([-1] + [rng.randrange(i) for i in range(1, n)], dtype=np.int32)
+    admin_levels = np.zeros(n, dtype=np.int8)
+    index = LCAIndex(parent_ids, admin_levels)
+    
+    def chain(v):
+        result = []
+        while v >= 0:
+            result.append(v)
+            v = int(parent_ids[v])
+        return result
+    
+    pairs = [(rng.randrange(n), rng.randrange(n)) for _ in range(2000)]
+    expected = []
+    for a, b in pairs:
+        ancestors_b = set(chain(b))
+        expected.append(next(v for v in chain(a) if v in ancestors_b))
+    
+    ids_a = np.array([a for a, _ in pairs])
+    ids_b = np.array([b for _, b in pairs])
+    assert index.lca(ids_a, ids_b).tolist() == expected
+    assert [index.lca_one(a, b) for a, b in pairs] == expected
+    print(f"✅ LCA correct on random tree of depth {int(index.depths.max())}")
+
+
+if __name__ == '__main__':
+    test_lca_matches_ancestor_lists()
+    test_lca_deep_random_tree()
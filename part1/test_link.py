@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test hierarchy-blocked linkage against a filtered cross join.
+"""
+
+import json
+import random
+import sys
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Add part1 directory to path to enable imports
+part1_dir = os.path.dirname(os.path.abspath(__file__))
+if part1_dir not in sys.path:
+    sys.path.insert(0, part1_dir)
+
+from src.processor import GeoProcessor
+
+
+def _locations(processor, n, seed, prefix):
+    """Random single-location frame with messy values."""
+    rng = random.Random(seed)
+    cities = list(processor.loader.by_city)[:400] + ['lugar que nao existe', 'Vizeu', '', None]
+    states = [None, '', 'viseu', 'porto', 'lisboa', 'madeira', 'aveiro']
+    return pd.DataFrame({
+        'city': [rng.choice(cities) for _ in range(n)],
+        'state': [rng.choice(states) for _ in range(n)],
+    }, index=[f"{prefix}{i}" for i in range(n)])
+
+
+def _cross_join(processor, df_a, df_b, min_level):
+    """Expected result: process() over every pair, filtered by level."""
+    pairs = pd.DataFrame({
+        'index_a': np.repeat(df_a.index.to_numpy(), len(df_b)),
+        'index_b': np.tile(df_b.index.to_numpy(), len(df_a)),
+        'city_1': np.repeat(df_a['city'].to_numpy(), len(df_b)),
+        'state_1': np.repeat(df_a['state'].to_numpy(), len(df_b)),
+        'city_2': np.tile(df_b['city'].to_numpy(), len(df_a)),
+        'state_2': np.tile(df_b['state'].to_numpy(), len(df_a)),
+    })
+    result = processor.process(pairs)
+    result = result[result['expected_level'] >= min_level]
+    return result[['index_a', 'index_b'] + processor._output_columns()].reset_index(drop=True)
+
+
+def test_link_matches_cross_join():
+    """link returns exactly the cross-join pairs at min_level or deeper."""
+    json_path = os.path.join(part1_dir, 'data', 'portugal.json')
+    processor = GeoProcessor(json_path, fuzzy=True)
+    df_a = _locations(processor, 300, seed=1, prefix='a')
+    df_b = _locations(processor, 250, seed=2, prefix='b')
+    
+    for min_level in (4, 6, 7, 8):
+        expected = _cross_join(processor, df_a, df_b, min_level)
+        actual = processor.link(df_a, df_b, min_level)
+        pd.testing.assert_frame_equal(actual, expected)
+        assert len(actual) < len(df_a) * len(df_b)
+    
+    compact = processor.link(df_a, df_b, 7, compact=True)
+    assert compact['expected_level'].dtype == np.int8
+    assert compact['is_ambiguous'].tolist() == processor.link(df_a, df_b, 7)['is_ambiguous'].astype(bool).tolist()
+    
+    try:
+        processor.link(df_a, df_b, 2)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("min_level 2 accepted")
+    print("✅ link matches the filtered cross join")
+
+
+def test_link_non_monotone_levels():
+    """Pairs blocked together but matching above min_level are dropped."""
+    tree = {
+        "admin_level": 2,
+        "children": {
+            "Norte": {"admin_level": 8, "children": {
+                "Vale": {"admin_level": 6, "children": {
+                    "Aldeia": {"admin_level": 9},
+                    "Quinta": {"admin_level": 9},
+                }},
+                "Serra": {"admin_level": 9},
+            }},
+            "Sul": {"admin_level": 6, "children": {"Praia": {"admin_level": 8}}},
+        },
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, 'tree.json')
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(tree, f)
+        processor = GeoProcessor(json_path)
+        
+        names = ['Norte', 'Vale', 'Aldeia', 'Quinta', 'Serra', 'Sul', 'Praia', 'Nenhures']
+        df = pd.DataFrame({'city': names, 'state': [''] * len(names)})
+        for min_level in (6, 7, 8, 9):
+            expected = _cross_join(processor, df, df, min_level)
+            pd.testing.assert_frame_equal(processor.link(df, df, min_level), expected)
+    print("✅ link handles levels that decrease going down")
+
+
+if __name__ == '__main__':
+    test_link_matches_cross_join()
+    test_link_non_monotone_levels()
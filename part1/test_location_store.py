@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test the array-backed location store and Location views.
+"""
+
+import sys
+import os
+
+# Add part1 directory to path to enable imports
+part1_dir = os.path.dirname(os.path.abspath(__file__))
+if part1_dir not in sys.path:
+    sys.path.insert(0, part1_dir)
+
+from src.loader import GeoDataLoader, Location
+
+
+def test_location_views():
+    """Location views expose the same hierarchy as the parent arrays."""
+    loader = GeoDataLoader(os.path.join(part1_dir, 'data', 'portugal.json'))
+    
+    valadares = next(loc for loc in (loader.locations[lid] for lid in loader.by_city['valadares'])
+                     if 'sao pedro do sul' in loc.ancestors_names)
+    assert valadares.ancestors_names == ['valadares', 'sao pedro do sul', 'viseu', 'portugal']
+    assert valadares.ancestors_levels == [8, 7, 6, 2]
+    assert valadares.ancestors[0] == valadares.id
+    assert valadares.parent_id == valadares.ancestors[1]
+    assert loader.locations[0].parent_id is None
+    
+    # Views are cheap: no per-instance __dict__, equality by id
+    assert not hasattr(valadares, '__dict__')
+    assert loader.locations_by_id[valadares.id] == valadares
+    assert valadares.id in loader.locations_by_id
+    assert len(loader.locations) == len(loader.parent_ids)
+    print(f"✅ {valadares!r}: {' > '.join(valadares.ancestors_names)}")
+
+
+def test_standalone_location():
+    """Location(id, name, admin_level, parent_id) still builds a plain location."""
+    loader = GeoDataLoader(os.path.join(part1_dir, 'data', 'portugal.json'))
+    location = Location(7, 'viseu', 6, parent_id=0)
+    assert (location.id, location.name, location.original_name) == (7, 'viseu', 'viseu')
+    assert (location.admin_level, location.parent_id, location.ancestors) == (6, 0, [])
+    location.ancestors = [7, 0]
+    assert location.ancestors == [7, 0]
+    assert location != loader.locations[7] and location not in loader.locations_by_id
+    assert isinstance(loader.locations[7], Location)
+    print(f"✅ Standalone {location!r}")
+
+
+def test_memory_stats():
+    """get_stats reports the array store as smaller than per-node objects."""
+    loader = GeoDataLoader(os.path.join(part1_dir, 'data', 'portugal.json'))
+    memory = loader.get_stats()['memory']
+    assert 0 < memory['location_store_bytes'] < memory['per_node_objects_bytes'], memory
+    print(f"✅ Memory: {memory}")
+
+
+if __name__ == '__main__':
+    test_location_views()
+    test_standalone_location()
+    test_memory_stats()
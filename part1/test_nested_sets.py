@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test nested-set containment and subtree range queries.
+"""
+
+import random
+import sys
+import os
+
+import numpy as np
+
+# Add part1 directory to path to enable imports
+part1_dir = os.path.dirname(os.path.abspath(__file__))
+if part1_dir not in sys.path:
+    sys.path.insert(0, part1_dir)
+
+from src.loader import GeoDataLoader
+
+
+def _check(loader, ancestors, rng):
+    """Compare is_within / descendants with ancestor chain scans."""
+    live = [loc_id for loc_id in range(len(loader.locations)) if loc_id not in loader.removed]
+    chains = {loc_id: set(loader.ancestor_ids(loc_id)) for loc_id in live}
+    ids = np.array(rng.sample(live, 300) + [-1], dtype=np.int64)
+    for ancestor in ancestors:
+        expected = [loc_id >= 0 and ancestor in chains[loc_id] for loc_id in ids.tolist()]
+        assert loader.is_within(ids, ancestor).tolist() == expected
+        proper = [within and loc_id != ancestor for within, loc_id in zip(expected, ids.tolist())]
+        assert loader.is_within(ids, ancestor, proper=True).tolist() == proper
+        
+        below = sorted(loc_id for loc_id in live if loc_id != ancestor and ancestor in chains[loc_id])
+        assert sorted(loader.descendants(ancestor).tolist()) == below
+        for level in (7, 8):
+            at_level = [loc_id for loc_id in below if loader.admin_levels[loc_id] == level]
+            assert sorted(loader.descendants(ancestor, level=level).tolist()) == at_level
+
+
+def test_containment_and_descendants():
+    """Interval labels agree with the ancestor chains."""
+    json_path = os.path.join(part1_dir, 'data', 'portugal.json')
+    loader = GeoDataLoader(json_path)
+    rng = random.Random(5)
+    viseu = next(loc_id for loc_id in loader.by_city['viseu'] if loader.admin_levels[loc_id] == 6)
+    ancestors = [0, viseu] + rng.sample(range(len(loader.locations)), 20)
+    _check(loader, ancestors, rng)
+    
+    # Unfiltered results are slices of the preorder array, not copies
+    descendants = loader.descendants(viseu)
+    assert np.shares_memory(descendants, loader.lca_index.by_preorder)
+    assert (np.diff(loader.lca_index.preorder[descendants]) == 1).all()
+    print(f"✅ Containment and descendants agree ({len(descendants)} locations under Viseu)")
+
+
+def test_labels_follow_updates():
+    """Labels are rebuilt after the hierarchy changes."""
+    json_path = os.path.join(part1_dir, 'data', 'portugal.json')
+    loader = GeoDataLoader(json_path)
+    rng = random.Random(6)
+    viseu = next(loc_id for loc_id in loader.by_city['viseu'] if loader.admin_levels[loc_id] == 6)
+    lisboa = next(loc_id for loc_id in loader.by_city['lisboa'] if loader.admin_levels[loc_id] == 6)
+    _check(loader, [viseu], rng)
+    
+    moved = int(loader.descendants(viseu, level=7)[0])
+    loader.move_subtree(moved, lisboa)
+    new_id = loader.add_subtree(viseu, "Concelho Novo", {"admin_level": 7, "children": {
+        "Freguesia Nova": {"admin_level": 8}}})
+    removed = next(loc_id for loc_id in loader.descendants(lisboa, level=7).tolist() if loc_id != moved)
+    loader.remove_subtree(removed)
+    
+    assert not loader.is_within([moved], viseu)[0] and loader.is_within([moved], lisboa)[0]
+    assert new_id in loader.descendants(viseu, level=7).tolist()
+    _check(loader, [0, viseu, lisboa, moved], rng)
+    
+    try:
+        loader.descendants(len(loader.locations))
+    except KeyError:
+        pass
+    else:
+        raise AssertionError("unknown ancestor accepted")
+    print("✅ Interval labels follow hierarchy updates")
+
+
+if __name__ == '__main__':
+    test_containment_and_descendants()
+    test_labels_follow_updates()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Test the memoized and bulk name normalization.
+"""
+
+import random
+import unicodedata
+import pandas as pd
+import sys
+import os
+
+# Add part1 directory to path to enable imports
+part1_dir = os.path.dirname(os.path.abspath(__file__))
+if part1_dir not in sys.path:
+    sys.path.insert(0, part1_dir)
+
+from src.utils import normalize_name, normalize_series
+
+
+def _reference_normalize(name):
+    """Original normalize_name implementation (no cache, no ASCII shortcut)."""
+    if not name or not isinstance(name, str):
+        return ""
+    name = unicodedata.normalize('NFD', name.lower())
+    return ''.join(char for char in name if unicodedata.category(char) != 'Mn').strip()
+
+
+def test_normalize_name_matches_reference():
+    """Fast paths give the same result as the original implementation."""
+    rng = random.Random(0)
+    alphabet = "abcXYZ  .-'ãçéÍõÔ\tİß"
+    samples = [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 12))) for _ in range(5000)]
+    samples += ["São Pedro", "  VALADARES  ", "", None, float('nan'), 42]
+    for sample in samples:
+        assert normalize_name(sample) == _reference_normalize(sample), repr(sample)
+    print(f"✅ normalize_name matches reference on {len(samples)} samples")
+
+
+def test_normalize_series():
+    """normalize_series equals mapping normalize_name over the values."""
+    series = pd.Series(["São Pedro", None, "  VALADARES ", float('nan'), "", "sao pedro", "Viseu"] * 3,
+                       index=range(100, 121), name="city_1")
+    expected = pd.Series([normalize_name(v) for v in series], index=series.index, name="city_1", dtype=object)
+    pd.testing.assert_series_equal(normalize_series(series), expected)
+    print("✅ normalize_series broadcasts normalized values")
+
+
+if __name__ == '__main__':
+    test_normalize_name_matches_reference()
+    test_normalize_series()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test GeoProcessor.process output modes and compact/Arrow dtypes.
+"""
+
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Add part1 directory to path to enable imports
+part1_dir = os.path.dirname(os.path.abspath(__file__))
+if part1_dir not in sys.path:
+    sys.path.insert(0, part1_dir)
+
+from src.processor import GeoProcessor
+from test_batch_engine import _random_pairs
+
+
+def test_output_modes():
+    """copy, inplace and columns give the same values."""
+    json_path = os.path.join(part1_dir, 'data', 'portugal.json')
+    processor = GeoProcessor(json_path, fuzzy=True, candidates=True)
+    df = _random_pairs(processor, 2000, seed=9)
+    original = df.copy()
+    
+    expected = processor.process(df)
+    pd.testing.assert_frame_equal(df, original)
+    new_columns = [col for col in expected.columns if col not in df.columns]
+    
+    columns = processor.process(df, output='columns')
+    assert list(columns.columns) == new_columns
+    assert columns.index.equals(df.index)
+    pd.testing.assert_frame_equal(columns, expected[new_columns])
+    
+    for batch in (True, False):
+        target = original.copy()
+        result = processor.process(target, batch=batch, output='inplace')
+        assert result is target
+        pd.testing.assert_frame_equal(result, expected)
+    
+    try:
+        processor.process(df, output='view')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("unknown output mode accepted")
+    print("✅ copy, inplace and columns outputs agree")
+
+
+def test_compact_dtypes():
+    """compact=True stores int8 levels and bool flags with the same values."""
+    json_path = os.path.join(part1_dir, 'data', 'portugal.json')
+    processor = GeoProcessor(json_path, fuzzy=True, candidates=True)
+    df = _random_pairs(processor, 2000, seed=10)
+    
+    wide = processor.process(df, output='columns')
+    for batch in (True, False):
+        compact = processor.process(df, batch=batch, output='columns', compact=True)
+        assert compact['expected_level'].dtype == np.int8
+        assert compact['best_level'].dtype == np.int8
+        assert compact['worst_level'].dtype == np.int8
+        assert compact['is_ambiguous'].dtype == bool
+        assert compact['is_fuzzy'].dtype == bool
+        assert compact['candidate_count'].dtype == np.int64
+        pd.testing.assert_frame_equal(compact.astype(np.int64), wide)
+    
+    parallel = processor.process_parallel(df, workers=2, chunk_size=500, output='columns', compact=True)
+    pd.testing.assert_frame_equal(parallel, processor.process(df, output='columns', compact=True))
+    print("✅ Compact dtypes hold the same values")
+
+
+def test_arrow_backed_frames():
+    """Arrow-backed input is read as is and pyarrow output wraps the arrays."""
+    try:
+        import pyarrow
+    except ImportError:
+        json_path = os.path.join(part1_dir, 'data', 'portugal.json')
+        processor = GeoProcessor(json_path)
+        try:
+            processor.process(_random_pairs(processor, 10), dtype_backend='pyarrow')
+        except ImportError:
+            pass
+        else:
+            raise AssertionError("pyarrow output without pyarrow")
+        print("⚠️  pyarrow not installed, Arrow output not tested")
+        return
+    
+    json_path = os.path.join(part1_dir, 'data', 'portugal.json')
+    processor = GeoProcessor(json_path)
+    df = _random_pairs(processor, 2000, seed=11)
+    expected = processor.process(df, output='columns', compact=True)
+    
+    arrow_df = df.astype({col: pd.ArrowDtype(pyarrow.string()) for col in ['city_1', 'state_1', 'city_2', 'state_2']})
+    result = processor.process(arrow_df, output='columns', compact=True, dtype_backend='pyarrow')
+    assert result['expected_level'].dtype == pd.ArrowDtype(pyarrow.int8())
+    assert result['is_ambiguous'].dtype == pd.ArrowDtype(pyarrow.bool_())
+    pd.testing.assert_frame_equal(result.astype({'expected_level': np.int8, 'is_ambiguous': bool}), expected)
+    print("✅ Arrow-backed input and output")
+
+
+if __name__ == '__main__':
+    test_output_modes()
+    test_compact_dtypes()
+    test_arrow_backed_frames()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test the pair-level result cache in GeoProcessor.
+"""
+
+import pandas as pd
+import sys
+import os
+import tempfile
+
+# Add part1 directory to path to enable imports
+part1_dir = os.path.dirname(os.path.abspath(__file__))
+if part1_dir not in sys.path:
+    sys.path.insert(0, part1_dir)
+
+from src.processor import GeoProcessor
+from test_batch_engine import _random_pairs
+
+
+def _swap_sides(df):
+    """Same pairs with the two locations exchanged."""
+    return df.rename(columns={'city_1': 'city_2', 'city_2': 'city_1',
+                              'state_1': 'state_2', 'state_2': 'state_1'})
+
+
+def test_pair_cache_results():
+    """Cached pairs give the same results as uncached processing."""
+    json_path = os.path.join(part1_dir, 'data', 'portugal.json')
+    uncached = GeoProcessor(json_path)
+    cached = GeoProcessor(json_path, pair_cache_size=100_000)
+    
+    df = _random_pairs(uncached, 3000, seed=5)
+    expected = uncached.process(df)
+    pd.testing.assert_frame_equal(cached.process(df), expected)
+    misses = cached.get_stats()['pair_cache']['misses']
+    
+    # Second batch and the swapped pairs are served from the cache
+    pd.testing.assert_frame_equal(cached.process(df), expected)
+    pd.testing.assert_frame_equal(cached.process(_swap_sides(df)), uncached.process(_swap_sides(df)))
+    pd.testing.assert_frame_equal(cached.process(df, batch=False), expected)
+    
+    stats = cached.get_stats()['pair_cache']
+    assert stats['misses'] == misses, stats
+    assert stats['hits'] > 0, stats
+    print(f"✅ Pair cache results match uncached processing: {stats}")
+
+
+def test_pair_cache_persistence():
+    """The pair cache is saved and reloaded only for the same hierarchy."""
+    json_path = os.path.join(part1_dir, 'data', 'portugal.json')
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = os.path.join(tmp, 'pairs.json')
+        first = GeoProcessor(json_path, pair_cache_size=1000, pair_cache_path=cache_path)
+        df = _random_pairs(first, 500, seed=6)
+        expected = first.process(df)
+        first.save_pair_cache()
+        
+        second = GeoProcessor(json_path, pair_cache_size=1000, pair_cache_path=cache_path)
+        assert len(second.pair_cache) == len(first.pair_cache)
+        pd.testing.assert_frame_equal(second.process(df), expected)
+        assert second.get_stats()['pair_cache']['misses'] == 0
+        
+        # A cache computed in another resolution mode is ignored
+        fuzzy = GeoProcessor(json_path, fuzzy=True, pair_cache_size=1000, pair_cache_path=cache_path)
+        assert len(fuzzy.pair_cache) == 0
+    print("✅ Pair cache persisted between runs")
+
+
+if __name__ == '__main__':
+    test_pair_cache_results()
+    test_pair_cache_persistence()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test that process_parallel matches process.
+"""
+
+import multiprocessing
+import pandas as pd
+import sys
+import os
+import tempfile
+
+# Add part1 directory to path to enable imports
+part1_dir = os.path.dirname(os.path.abspath(__file__))
+if part1_dir not in sys.path:
+    sys.path.insert(0, part1_dir)
+
+from src.processor import GeoProcessor
+from test_batch_engine import _random_pairs
+
+
+def test_parallel_matches_process():
+    """Chunks are reassembled in order with the original index."""
+    processor = GeoProcessor(os.path.join(part1_dir, 'data', 'portugal.json'))
+    df = _random_pairs(processor, 3000, seed=1).sample(frac=1, random_state=0)
+    
+    expected = processor.process(df)
+    for start_method in [m for m in ('fork', 'spawn') if m in multiprocessing.get_all_start_methods()]:
+        actual = processor.process_parallel(df, workers=3, chunk_size=700, start_method=start_method)
+        pd.testing.assert_frame_equal(actual, expected)
+        print(f"✅ process_parallel ({start_method}) matches process on {len(df)} rows")
+
+
+
+def test_parallel_after_hierarchy_updates():
+    """Workers see updates made after the pair cache and snapshot were filled."""
+    json_path = os.path.join(part1_dir, 'data', 'portugal.json')
+    reference = GeoProcessor(json_path)
+    loader = reference.loader
+    viseu = next(loc_id for loc_id in loader.by_city['viseu'] if loader.admin_levels[loc_id] == 6)
+    removed = int(loader.descendants(viseu, level=7)[0])
+    name = loader.locations[removed].original_name
+    df = pd.concat([_random_pairs(reference, 2000, seed=2),
+                    pd.DataFrame({'city_1': [name], 'state_1': ['Viseu'],
+                                  'city_2': [name], 'state_2': ['Viseu']})], ignore_index=True)
+    before = reference.process(df)
+    loader.remove_subtree(removed)
+    expected = reference.process(df)
+    assert expected['expected_level'].iloc[-1] < before['expected_level'].iloc[-1]
+    
+    for start_method in [m for m in ('fork', 'spawn') if m in multiprocessing.get_all_start_methods()]:
+        with tempfile.TemporaryDirectory() as tmp:
+            processor = GeoProcessor(json_path, pair_cache_size=10_000,
+                                     snapshot_path=os.path.join(tmp, 'portugal.snap'))
+            processor.process(df)
+            processor.loader.remove_subtree(removed)
+            actual = processor.process_parallel(df, workers=3, chunk_size=700, start_method=start_method)
+            pd.testing.assert_frame_equal(actual, expected)
+        print(f"✅ process_parallel ({start_method}) follows hierarchy updates")
+
+if __name__ == '__main__':
+    test_parallel_matches_process()
+    test_parallel_after_hierarchy_updates()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test the prefix (autocomplete) index against a brute-force scan.
+"""
+
+import random
+import sys
+import os
+
+# Add part1 directory to path to enable imports
+part1_dir = os.path.dirname(os.path.abspath(__file__))
+if part1_dir not in sys.path:
+    sys.path.insert(0, part1_dir)
+
+from src.loader import GeoDataLoader
+from src.prefix import PrefixIndex
+from src.utils import normalize_name
+
+
+def _brute_force(loader, prefix, ancestor=None, limit=10):
+    """Every indexed location, filtered and sorted like PrefixIndex.search."""
+    key = normalize_name(prefix) + (" " if prefix and prefix[-1].isspace() and prefix.strip() else "")
+    ancestors = None
+    if ancestor is not None:
+        ancestors = set(loader.by_city.get(normalize_name(ancestor), []))
+    matches = []
+    for name, ids in loader.by_city.items():
+        if not name.startswith(key):
+            continue
+        for loc_id in ids:
+            if ancestors is None or ancestors & set(loader.ancestor_ids(loc_id)[1:]):
+                matches.append((name, int(loader.admin_levels[loc_id]), loc_id))
+    return [loc_id for _, _, loc_id in sorted(matches)[:limit]]
+
+
+def _search_ids(index, *args, **kwargs):
+    return [loc.id for loc in index.search(*args, **kwargs)]
+
+
+def test_prefix_matches_brute_force():
+    """Prefix search, with and without ancestor, equals a full scan."""
+    json_path = os.path.join(part1_dir, 'data', 'portugal.json')
+    loader = GeoDataLoader(json_path)
+    index = PrefixIndex(loader)
+    rng = random.Random(0)
+    
+    names = list(loader.by_city)
+    districts = sorted({loader.names[loader.name_ids[loc_id]]
+                        for loc_id in range(len(loader.locations)) if loader.admin_levels[loc_id] <= 7})
+    queries = [("sao", "viseu", 10), ("São ", None, 5), ("", None, 3), ("zzz", None, 10),
+               ("a", "faro", 50), ("s", "sintra", 10), ("lis", "lugar inexistente", 10)]
+    for _ in range(300):
+        name = rng.choice(names)
+        queries.append((name[:rng.randint(1, 5)], rng.choice([None] + districts), rng.choice([1, 10, 100])))
+    
+    for prefix, ancestor, limit in queries:
+        expected = _brute_force(loader, prefix, ancestor, limit)
+        assert _search_ids(index, prefix, ancestor, limit=limit) == expected, (prefix, ancestor, limit)
+    
+    viseu = loader.by_city["viseu"][0]
+    assert _search_ids(index, "sao", viseu) == _search_ids(index, "sao", loader.locations[viseu])
+    assert all(loc.name.startswith("sao") for loc in index.search("sao", "viseu"))
+    print(f"✅ {len(queries)} prefix queries match the brute-force scan")
+
+
+def test_prefix_after_updates():
+    """The index follows hierarchy updates."""
+    json_path = os.path.join(part1_dir, 'data', 'portugal.json')
+    loader = GeoDataLoader(json_path)
+    index = PrefixIndex(loader)
+    viseu = loader.by_city["viseu"][0]
+    
+    new_id = loader.add_subtree(viseu, "Sãozinho Novo", {"admin_level": 8})
+    assert new_id in _search_ids(index, "saozinho", "viseu")
+    
+    lisboa = loader.by_city["lisboa"][0]
+    loader.move_subtree(new_id, lisboa)
+    assert new_id not in _search_ids(index, "saozinho", "viseu")
+    assert _search_ids(index, "saozinho", "lisboa") == _brute_force(loader, "saozinho", "lisboa")
+    
+    loader.remove_subtree(new_id)
+    assert _search_ids(index, "saozinho novo") == []
+    print("✅ Prefix index follows hierarchy updates")
+
+
+if __name__ == '__main__':
+    test_prefix_matches_brute_force()
+    test_prefix_after_updates()
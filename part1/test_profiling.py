@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test the resolution profiling hooks (branch counters, phase timers, explain).
+"""
+
+import json
+import sys
+import os
+import tempfile
+
+import pandas as pd
+
+# Add part1 directory to path to enable imports
+part1_dir = os.path.dirname(os.path.abspath(__file__))
+if part1_dir not in sys.path:
+    sys.path.insert(0, part1_dir)
+
+from src.loader import GeoDataLoader
+from src.processor import GeoProcessor
+from src.profiling import Profiler
+from src.resolver import LocationResolver
+from test_batch_engine import _random_pairs
+
+
+def test_branch_counters():
+    """Every resolution is counted under the lookup branch it took."""
+    json_path = os.path.join(part1_dir, 'data', 'portugal.json')
+    profiler = Profiler()
+    resolver = LocationResolver(GeoDataLoader(json_path), fuzzy=True, profiler=profiler)
+    
+    cases = [
+        (("Sintra", "Lisboa"), 'city_state'),
+        (("Sintra", "Sintra"), 'ancestor_scan'),
+        (("Sintra", "Faro"), 'all_homonyms'),
+        (("Sintra", ""), 'city_only'),
+        (("Sintr", "Lisboa"), 'fuzzy'),
+        (("Xyzzyqwerty", ""), 'unmatched'),
+    ]
+    for (city, state), branch in cases:
+        explained = resolver.explain(city, state)
+        assert explained["branch"] == branch, (city, state, explained)
+        assert explained["location_ids"] == [loc.id for loc in resolver.resolve(city, state)]
+    assert resolver.explain("", "Lisboa")["branch"] == 'empty'
+    
+    resolver.resolve("Sintra", "Lisboa")
+    counters = profiler.summary()["counters"]
+    assert counters['resolve.city_state'] == 2
+    assert counters['resolve.cache_hit'] == 1
+    for _, branch in cases[1:]:
+        assert counters['resolve.' + branch] == 1, branch
+    print("✅ Branch counters and explain agree")
+
+
+def test_processor_profile():
+    """Profiling records phases and rows without changing the results."""
+    json_path = os.path.join(part1_dir, 'data', 'portugal.json')
+    plain = GeoProcessor(json_path, candidates=True)
+    profiled = GeoProcessor(json_path, candidates=True, pair_cache_size=1000, profile=True)
+    assert plain.profiler is None
+    df = _random_pairs(plain, 2000, seed=12)
+    
+    for batch in (True, False):
+        pd.testing.assert_frame_equal(profiled.process(df, batch=batch), plain.process(df, batch=batch))
+    summary = profiled.get_stats()["profile"]
+    assert summary["counters"]["rows"] == 2 * len(df)
+    assert set(summary["phases"]) == {'normalize', 'pair_cache', 'resolve', 'lca', 'candidates'}
+    assert summary["phases"]["lca"]["calls"] > 1
+    assert abs(sum(phase["share"] for phase in summary["phases"].values()) - 1) < 1e-9
+    
+    profiled.profiler.reset()
+    result = profiled.process_parallel(df, workers=2, chunk_size=500)
+    pd.testing.assert_frame_equal(result, plain.process(df))
+    summary = profiled.profiler.summary()
+    assert summary["counters"]["rows"] == len(df)
+    assert summary["phases"]["normalize"]["calls"] == 4
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'profile.json')
+        profiled.profiler.dump(path, extra={"run": {"rows": len(df)}})
+        with open(path, encoding='utf-8') as f:
+            document = json.load(f)
+        assert document["counters"] == summary["counters"]
+        assert document["run"] == {"rows": len(df)}
+    print("✅ Processor phases profiled")
+
+
+if __name__ == '__main__':
+    test_branch_counters()
+    test_processor_profile()
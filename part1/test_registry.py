@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test the multi-country hierarchy registry.
+"""
+
+import json
+import pandas as pd
+import sys
+import os
+import tempfile
+
+# Add part1 directory to path to enable imports
+part1_dir = os.path.dirname(os.path.abspath(__file__))
+if part1_dir not in sys.path:
+    sys.path.insert(0, part1_dir)
+
+from src.processor import GeoProcessor
+from src.registry import HierarchyRegistry
+
+
+SPAIN = {
+    "admin_level": 2,
+    "children": {
+        "galicia": {"admin_level": 4, "children": {
+            "pontevedra": {"admin_level": 6, "children": {
+                "vigo": {"admin_level": 8},
+                "valadares": {"admin_level": 8},
+            }},
+        }},
+    },
+}
+
+
+def _write_config(tmp):
+    """Registry config with Portugal and a small Spanish hierarchy."""
+    with open(os.path.join(tmp, 'spain.json'), 'w', encoding='utf-8') as f:
+        json.dump(SPAIN, f)
+    config = {
+        "PT": {"json_path": os.path.join(part1_dir, 'data', 'portugal.json')},
+        "ES": {"json_path": "spain.json", "root_name": "espana", "snapshot_path": "spain.snap"},
+    }
+    config_path = os.path.join(tmp, 'countries.json')
+    with open(config_path, 'w', encoding='utf-8') as f:
+        json.dump(config, f)
+    return config_path
+
+
+def test_registry_routes_rows_by_country():
+    """Rows are processed with their own country's hierarchy."""
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = HierarchyRegistry.from_config(_write_config(tmp))
+        assert registry.loaded == []
+        
+        df = pd.DataFrame({
+            'country': ['pt', 'ES', 'es', None, 'fr'],
+            'city_1': ['valadares', 'valadares', 'vigo', 'valadares', 'paris'],
+            'state_1': ['viseu', 'pontevedra', None, None, None],
+            'city_2': ['valadares', 'vigo', 'espana', 'valadares', 'paris'],
+            'state_2': ['viseu', None, None, None, None],
+        })
+        result = registry.process(df)
+        assert list(result['expected_level']) == [8, 6, 2, 2, 2]
+        assert list(result['is_ambiguous']) == [0, 0, 0, 0, 0]
+        assert registry.get('es').loader.root_name == 'espana'
+        
+        # Same results as a processor dedicated to the country
+        portugal = GeoProcessor(os.path.join(part1_dir, 'data', 'portugal.json'))
+        expected = portugal.process(df.iloc[[0]])
+        assert result['expected_level'].iloc[0] == expected['expected_level'].iloc[0]
+    print("✅ Registry routes rows by country")
+
+
+def test_registry_evicts_under_budget():
+    """Least recently used countries are unloaded over the memory budget."""
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = HierarchyRegistry.from_config(_write_config(tmp), memory_budget=1)
+        registry.get('pt')
+        assert registry.loaded == ['pt']
+        registry.get('es')
+        assert registry.loaded == ['es']
+        registry.get('pt')
+        
+        stats = registry.get_stats()
+        assert stats['loads'] == 3 and stats['evictions'] == 2, stats
+        assert stats['memory_bytes'] == stats['memory_by_country']['pt']
+        
+        unlimited = HierarchyRegistry.from_config(_write_config(tmp))
+        unlimited.get('pt')
+        unlimited.get('es')
+        assert sorted(unlimited.loaded) == ['es', 'pt']
+    print("✅ Registry evicts least recently used hierarchies")
+
+
+if __name__ == '__main__':
+    test_registry_routes_rows_by_country()
+    test_registry_evicts_under_budget()
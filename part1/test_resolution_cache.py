@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test the LRU resolution cache in LocationResolver.
+"""
+
+import sys
+import os
+
+# Add part1 directory to path to enable imports
+part1_dir = os.path.dirname(os.path.abspath(__file__))
+if part1_dir not in sys.path:
+    sys.path.insert(0, part1_dir)
+
+from src.loader import GeoDataLoader
+from src.resolver import LocationResolver
+from src.processor import GeoProcessor
+
+
+def test_cache_hits_and_results():
+    """Cached resolutions return the same locations as uncached ones."""
+    loader = GeoDataLoader(os.path.join(part1_dir, 'data', 'portugal.json'))
+    cached = LocationResolver(loader, cache_size=16)
+    uncached = LocationResolver(loader, cache_size=0)
+
+    queries = [
+        ('valadares', 'viseu'),            # direct (city, state) hit
+        ('valadares', None),               # all homonyms
+        ('Valadares', 'VISEU'),            # same normalized key as the first query
+        ('lugar que nao existe', None),    # no match
+        ('valadares', 'estado errado'),    # state fallback to all homonyms
+    ]
+    for city, state in queries:
+        expected = [loc.id for loc in uncached.resolve(city, state)]
+        assert [loc.id for loc in cached.resolve(city, state)] == expected
+        assert [loc.id for loc in cached.resolve(city, state)] == expected
+
+    stats = cached.get_cache_stats()
+    assert stats['misses'] == 4, stats
+    assert stats['hits'] == 6, stats
+    assert uncached.get_cache_stats()['size'] == 0
+    print(f"✅ Cache results match uncached resolver: {stats}")
+
+
+def test_cache_is_bounded():
+    """The cache never grows beyond its configured size."""
+    processor = GeoProcessor(os.path.join(part1_dir, 'data', 'portugal.json'), cache_size=8)
+    for city in list(processor.loader.by_city)[:50]:
+        processor.resolver.resolve(city)
+
+    stats = processor.get_stats()['resolution_cache']
+    assert stats['size'] == 8, stats
+    assert stats['maxsize'] == 8, stats
+    print(f"✅ Cache bounded at {stats['maxsize']} entries")
+
+
+if __name__ == '__main__':
+    test_cache_hits_and_results()
+    test_cache_is_bounded()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Test hierarchical roll-up of record counts and values against ancestor walks.
+"""
+
+import random
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Add part1 directory to path to enable imports
+part1_dir = os.path.dirname(os.path.abspath(__file__))
+if part1_dir not in sys.path:
+    sys.path.insert(0, part1_dir)
+
+from src.processor import GeoProcessor
+
+LEVELS = (6, 7, 8)
+
+
+def _records(processor, n, seed):
+    rng = random.Random(seed)
+    cities = list(processor.loader.by_city)[:300] + ['santa maria', 'lugar que nao existe', '', None]
+    states = [None, '', 'viseu', 'porto', 'lisboa']
+    return pd.DataFrame({
+        'city': [rng.choice(cities) for _ in range(n)],
+        'state': [rng.choice(states) for _ in range(n)],
+        'count': [rng.randrange(100) for _ in range(n)],
+        'amount': [rng.choice([np.nan, rng.uniform(0, 10)]) for _ in range(n)],
+    })
+
+
+def _expected(processor, df, levels):
+    """Totals per (level, location id), by walking every record's ancestors."""
+    loader = processor.loader
+    totals = {}
+    for city, state, count, amount in df[['city', 'state', 'count', 'amount']].itertuples(index=False):
+        matches = processor.resolver.resolve(city, state)
+        if not matches:
+            continue
+        for ancestor in loader.ancestor_ids(matches[0].id):
+            level = int(loader.admin_levels[ancestor])
+            if level in levels:
+                entry = totals.setdefault((level, ancestor), [0, 0, 0.0])
+                entry[0] += 1
+                entry[1] += count
+                entry[2] += 0.0 if np.isnan(amount) else amount
+    return totals
+
+
+def _check(processor, df, levels=LEVELS):
+    result = processor.rollup(df, ['count', 'amount'], levels)
+    assert list(result.columns) == ['level', 'location_id', 'name', 'records', 'count', 'amount']
+    assert result['count'].dtype == np.int64 and result['amount'].dtype == np.float64
+    expected = _expected(processor, df, levels)
+    keys = list(zip(result['level'].tolist(), result['location_id'].tolist()))
+    assert keys == sorted(expected)
+    for row, key in zip(result.itertuples(index=False), keys):
+        records, count, amount = expected[key]
+        assert (row.records, row.count) == (records, count), key
+        assert abs(row.amount - amount) < 1e-9, key
+        assert row.name == processor.loader.locations[row.location_id].original_name
+    return result
+
+
+def test_rollup_matches_ancestor_walk():
+    """Subtree totals equal the per-record ancestor sums at every level."""
+    json_path = os.path.join(part1_dir, 'data', 'portugal.json')
+    processor = GeoProcessor(json_path)
+    df = _records(processor, 2000, seed=7)
+    result = _check(processor, df)
+    
+    resolved = sum(bool(processor.resolver.resolve(city, state)) for city, state in zip(df['city'], df['state']))
+    assert resolved < len(df)
+    assert set(result['level']) == set(LEVELS)
+    assert 0 < result.loc[result['level'] == 6, 'records'].sum() <= resolved
+    
+    only_7 = processor.rollup(df, levels=[7])
+    assert list(only_7.columns) == ['level', 'location_id', 'name', 'records']
+    assert only_7.reset_index(drop=True).equals(
+        result.loc[result['level'] == 7, ['level', 'location_id', 'name', 'records']].reset_index(drop=True))
+    assert processor.rollup(df.iloc[:0], ['count']).empty
+    print("✅ Roll-up agrees with ancestor walks")
+
+
+def test_rollup_follows_hierarchy_updates():
+    """Totals are recomputed from the current tree after updates."""
+    json_path = os.path.join(part1_dir, 'data', 'portugal.json')
+    processor = GeoProcessor(json_path)
+    loader = processor.loader
+    viseu = next(loc_id for loc_id in loader.by_city['viseu'] if loader.admin_levels[loc_id] == 6)
+    lisboa = next(loc_id for loc_id in loader.by_city['lisboa'] if loader.admin_levels[loc_id] == 6)
+    df = _records(processor, 1000, seed=8)
+    _check(processor, df)
+    
+    moved = int(loader.descendants(viseu, level=7)[0])
+    loader.move_subtree(moved, lisboa)
+    loader.add_subtree(viseu, "Concelho Novo", {"admin_level": 7, "children": {
+        "Freguesia Nova": {"admin_level": 8}}})
+    loader.remove_subtree(next(loc_id for loc_id in loader.descendants(lisboa, level=7).tolist()
+                               if loc_id != moved))
+    df = pd.concat([df, pd.DataFrame({'city': ['Freguesia Nova', loader.locations[moved].original_name],
+                                      'state': ['Viseu', 'Lisboa'], 'count': [5, 6],
+                                      'amount': [1.5, np.nan]})], ignore_index=True)
+    result = _check(processor, df)
+    assert result.loc[result['location_id'] == moved, 'records'].iloc[0] >= 1
+    print("✅ Roll-up follows hierarchy updates")
+
+
+
+def test_rollup_integer_sums_are_exact():
+    """Integer columns are summed in int64, exact beyond float64 precision."""
+    json_path = os.path.join(part1_dir, 'data', 'portugal.json')
+    processor = GeoProcessor(json_path)
+    df = _records(processor, 500, seed=9)
+    df['count'] = 2 ** 53 + df['count'] * 2 + 1  # Odd values above 2**53 are not floats
+    df['flag'] = df['count'] % 4 == 1
+    result = processor.rollup(df, ['count', 'flag'], levels=[6])
+    assert result['count'].dtype == np.int64 and result['flag'].dtype == np.int64
+    
+    expected = {}
+    for city, state, count in df[['city', 'state', 'count']].itertuples(index=False):
+        matches = processor.resolver.resolve(city, state)
+        if matches:
+            for ancestor in processor.loader.ancestor_ids(matches[0].id):
+                if processor.loader.admin_levels[ancestor] == 6:
+                    expected[ancestor] = expected.get(ancestor, 0) + int(count)
+    assert dict(zip(result['location_id'].tolist(), result['count'].tolist())) == expected
+    assert result['flag'].sum() <= result['records'].sum()
+    
+    # Nullable integers (NA counts as 0) stay exact too
+    nullable = df.assign(count=df['count'].astype('Int64'))
+    nullable.loc[::3, 'count'] = pd.NA
+    totals = processor.rollup(nullable, ['count'], levels=[6])['count']
+    expected = processor.rollup(df.assign(count=df['count'].where(nullable['count'].notna(), 0)), ['count'],
+                                levels=[6])['count']
+    assert totals.dtype == np.int64 and totals.tolist() == expected.tolist()
+    
+    try:
+        processor.rollup(df.assign(label='x'), ['count', 'label'])
+    except ValueError as error:
+        assert 'label' in str(error)
+    else:
+        raise AssertionError("non-numeric value column accepted")
+    print("✅ Integer roll-up sums are exact")
+
+
+if __name__ == '__main__':
+    test_rollup_matches_ancestor_walk()
+    test_rollup_follows_hierarchy_updates()
+    test_rollup_integer_sums_are_exact()
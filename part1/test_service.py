@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Test the HTTP matching service on localhost.
+"""
+
+import asyncio
+import http.client
+import json
+import sys
+import os
+
+import pandas as pd
+
+# Add part1 directory to path to enable imports
+part1_dir = os.path.dirname(os.path.abspath(__file__))
+if part1_dir not in sys.path:
+    sys.path.insert(0, part1_dir)
+
+from src.processor import GeoProcessor
+from src.service import MatchService
+from test_batch_engine import _random_pairs
+
+
+def _request(port, method, path, body=None, content_type='application/json'):
+    """Blocking HTTP request; returns (status, content type, body)."""
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        connection.request(method, path, body=body, headers={'Content-Type': content_type})
+        response = connection.getresponse()
+        return response.status, response.getheader('Content-Type'), response.read()
+    finally:
+        connection.close()
+
+
+def _records(df):
+    return [{col: (None if pd.isna(value) else value) for col, value in row.items()}
+            for row in df[['city_1', 'state_1', 'city_2', 'state_2']].to_dict('records')]
+
+
+def test_match_endpoint():
+    """Concurrent JSON and NDJSON requests get the results of process()."""
+    json_path = os.path.join(part1_dir, 'data', 'portugal.json')
+    processor = GeoProcessor(json_path, fuzzy=True)
+    df = _random_pairs(processor, 3000, seed=13)
+    expected = processor.process(df, output='columns').to_dict('records')
+    requests = [_records(df.iloc[start:start + 100]) for start in range(0, len(df), 100)]
+    
+    async def scenario():
+        service = MatchService(processor, port=0, max_wait=0.01)
+        await service.start()
+        try:
+            bodies = [json.dumps(pairs) for pairs in requests[:-1]]
+            json_calls = [asyncio.to_thread(_request, service.port, 'POST', '/match', body) for body in bodies]
+            ndjson = "".join(json.dumps(pair) + "\n" for pair in requests[-1])
+            ndjson_call = asyncio.to_thread(_request, service.port, 'POST', '/match', ndjson,
+                                            'application/x-ndjson')
+            responses = await asyncio.gather(*json_calls, ndjson_call)
+            
+            results = []
+            for status, content_type, body in responses[:-1]:
+                assert status == 200 and content_type == 'application/json'
+                results.extend(json.loads(body))
+            status, content_type, body = responses[-1]
+            assert status == 200 and content_type == 'application/x-ndjson'
+            results.extend(json.loads(line) for line in body.splitlines())
+            assert results == expected
+            
+            wrapped = await asyncio.to_thread(_request, service.port, 'POST', '/match',
+                                              json.dumps({"pairs": requests[0]}))
+            assert json.loads(wrapped[2]) == expected[:100]
+            assert json.loads((await asyncio.to_thread(_request, service.port, 'POST', '/match', '[]'))[2]) == []
+            
+            metrics = service.get_metrics()
+            assert metrics["pairs"] == len(df) + 100
+            assert metrics["requests"] == len(requests) + 2
+            assert metrics["batches"] < len(requests)
+            assert metrics["latency_ms"]["p99"] >= metrics["latency_ms"]["p50"] > 0
+        finally:
+            await service.stop()
+    
+    asyncio.run(scenario())
+    print("✅ Micro-batched /match results equal process()")
+
+
+def test_health_metrics_and_errors():
+    """Health and metrics documents, and JSON errors for bad requests."""
+    json_path = os.path.join(part1_dir, 'data', 'portugal.json')
+    processor = GeoProcessor(json_path)
+    
+    async def scenario():
+        service = MatchService(processor, port=0)
+        await service.start()
+        try:
+            status, _, body = await asyncio.to_thread(_request, service.port, 'GET', '/health')
+            health = json.loads(body)
+            assert status == 200 and health["status"] == "ok"
+            assert health["locations"] == processor.get_stats()["total_locations"]
+            
+            errors = [
+                (('POST', '/match', '{not json'), 400),
+                (('POST', '/match', '[1, 2]'), 400),
+                (('POST', '/match', '[{"city_1": ["x"]}]'), 400),
+                (('POST', '/match', '[{"city_1": "Viseu", "state_2": 3}]'), 400),
+                (('GET', '/match', None), 405),
+                (('GET', '/nowhere', None), 404),
+            ]
+            for args, expected_status in errors:
+                status, _, body = await asyncio.to_thread(_request, service.port, *args)
+                assert status == expected_status, (args, status)
+                assert "error" in json.loads(body)
+            
+            status, _, body = await asyncio.to_thread(_request, service.port, 'GET', '/metrics')
+            metrics = json.loads(body)
+            assert status == 200
+            assert metrics["errors"] == len(errors)
+            assert metrics["pairs"] == 0
+            assert "hits" in metrics["resolution_cache"]
+        finally:
+            await service.stop()
+    
+    asyncio.run(scenario())
+    print("✅ Health, metrics and error responses")
+
+
+
+def test_failing_request_is_isolated():
+    """A request failing in its batch does not fail the requests batched with it."""
+    json_path = os.path.join(part1_dir, 'data', 'portugal.json')
+    processor = GeoProcessor(json_path)
+    process = processor.process
+    
+    def failing_process(df, **kwargs):
+        if (df['city_1'] == 'fail').any():
+            raise RuntimeError("processing failed")
+        return process(df, **kwargs)
+    
+    processor.process = failing_process
+    good = [{"city_1": "Viseu", "state_1": None, "city_2": "Viseu", "state_2": ""}]
+    expected = process(pd.DataFrame(good), output='columns').to_dict('records')
+    
+    async def scenario():
+        service = MatchService(processor, port=0, max_wait=0.2)
+        await service.start()
+        try:
+            bodies = [good, [{"city_1": "fail"}], good, good]
+            responses = await asyncio.gather(*(asyncio.to_thread(_request, service.port, 'POST', '/match',
+                                                                 json.dumps(body)) for body in bodies))
+            assert [status for status, _, _ in responses] == [200, 500, 200, 200]
+            assert all(json.loads(responses[i][2]) == expected for i in (0, 2, 3))
+        finally:
+            await service.stop()
+    
+    asyncio.run(scenario())
+    print("✅ A failing request does not fail its batch")
+
+
+if __name__ == '__main__':
+    test_match_endpoint()
+    test_health_metrics_and_errors()
+    test_failing_request_is_isolated()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test binary snapshots of the GeoDataLoader structures.
+"""
+
+import json
+import shutil
+import sys
+import os
+import tempfile
+
+# Add part1 directory to path to enable imports
+part1_dir = os.path.dirname(os.path.abspath(__file__))
+if part1_dir not in sys.path:
+    sys.path.insert(0, part1_dir)
+
+from src.loader import GeoDataLoader
+from src.snapshot import SnapshotError
+
+
+def _describe(loader):
+    """Flatten everything a loader exposes into comparable values."""
+    locations = [
+        (loc.id, loc.name, loc.original_name, loc.admin_level, loc.parent_id,
+         loc.ancestors, loc.ancestors_names, loc.ancestors_levels)
+        for loc in loader.locations
+    ]
+    return locations, loader.by_city, loader.by_city_state
+
+
+def test_snapshot_roundtrip():
+    """A snapshot restores exactly the same locations and indexes."""
+    json_path = os.path.join(part1_dir, 'data', 'portugal.json')
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot_path = os.path.join(tmp, 'portugal.snap')
+        loader = GeoDataLoader(json_path)
+        loader.save_snapshot(snapshot_path)
+        
+        restored = GeoDataLoader.load_snapshot(snapshot_path)
+        assert _describe(restored) == _describe(loader)
+        assert restored.source_checksum == loader.source_checksum
+        assert restored.get_stats() == loader.get_stats()
+    print("✅ Snapshot round trip restores the same structures")
+
+
+def test_snapshot_rebuilds_when_stale():
+    """Changing the source JSON invalidates the snapshot."""
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, 'portugal.json')
+        snapshot_path = os.path.join(tmp, 'portugal.snap')
+        shutil.copy(os.path.join(part1_dir, 'data', 'portugal.json'), json_path)
+        
+        # First use writes the snapshot
+        loader = GeoDataLoader(json_path, snapshot_path=snapshot_path)
+        assert os.path.exists(snapshot_path)
+        total = len(loader.locations)
+        
+        # Add a new freguesia to the source
+        with open(json_path, encoding='utf-8') as f:
+            data = json.load(f)
+        data["children"]["madeira"]["children"]["santana"]["children"]["nova freguesia"] = {"admin_level": 8}
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        
+        rebuilt = GeoDataLoader.load_snapshot(snapshot_path, json_path)
+        assert len(rebuilt.locations) == total + 1
+        assert 'nova freguesia' in rebuilt.by_city
+        
+        # The rewritten snapshot now matches the new source
+        again = GeoDataLoader.load_snapshot(snapshot_path)
+        assert _describe(again) == _describe(rebuilt)
+    print("✅ Stale snapshot rebuilt from the changed JSON")
+
+
+def test_corrupt_snapshot_without_source():
+    """A corrupt snapshot without its source JSON raises SnapshotError."""
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot_path = os.path.join(tmp, 'broken.snap')
+        with open(snapshot_path, 'wb') as f:
+            f.write(b"not a snapshot")
+        try:
+            GeoDataLoader.load_snapshot(snapshot_path)
+        except SnapshotError:
+            print("✅ Corrupt snapshot rejected")
+        else:
+            raise AssertionError("Expected SnapshotError")
+
+
+if __name__ == '__main__':
+    test_snapshot_roundtrip()
+    test_snapshot_rebuilds_when_stale()
+    test_corrupt_snapshot_without_source()
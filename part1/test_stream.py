@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test the streaming CSV pipeline against in-memory processing.
+"""
+
+import importlib.util
+import os
+import subprocess
+import sys
+import tempfile
+import pandas as pd
+import pytest
+
+# Add part1 directory to path to enable imports
+part1_dir = os.path.dirname(os.path.abspath(__file__))
+if part1_dir not in sys.path:
+    sys.path.insert(0, part1_dir)
+
+from src.processor import GeoProcessor, PAIR_COLUMNS
+from src.stream import process_file, stream_process
+from test_batch_engine import _random_pairs
+
+
+def test_stream_csv_matches_process():
+    """Chunked output equals processing the whole file at once."""
+    processor = GeoProcessor(os.path.join(part1_dir, 'data', 'portugal.json'))
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = os.path.join(tmp, 'pairs.csv')
+        output_path = os.path.join(tmp, 'result.csv')
+        _random_pairs(processor, 2500, seed=2).to_csv(input_path, index=False)
+        
+        progress = []
+        stats = process_file(processor, input_path, output_path, chunk_size=1000, progress=progress.append)
+        assert stats['rows'] == 2500 and stats['chunks'] == 3, stats
+        assert [p['rows'] for p in progress] == [1000, 2000, 2500]
+        
+        whole = pd.read_csv(input_path, dtype={col: object for col in PAIR_COLUMNS})
+        expected = processor.process(whole)
+        actual = pd.read_csv(output_path, dtype={col: object for col in PAIR_COLUMNS})
+        pd.testing.assert_frame_equal(actual, expected)
+        
+        # The generator API keeps a running index across chunks
+        chunks = list(stream_process(processor, input_path, chunk_size=1000))
+        pd.testing.assert_frame_equal(pd.concat(chunks), expected)
+    print(f"✅ Streamed {stats['rows']} rows in {stats['chunks']} chunks")
+
+
+def test_stream_parquet_output_schema():
+    """Parquet output types are declared, not taken from an all-null first chunk."""
+    pytest.importorskip('pyarrow')
+    processor = GeoProcessor(os.path.join(part1_dir, 'data', 'portugal.json'))
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = os.path.join(tmp, 'pairs.csv')
+        output_path = os.path.join(tmp, 'result.parquet')
+        df = _random_pairs(processor, 2000, seed=3)
+        df.iloc[:1000, df.columns.get_loc('state_1')] = None
+        df.to_csv(input_path, index=False)
+        
+        process_file(processor, input_path, output_path, chunk_size=1000, compact=True)
+        actual = pd.read_parquet(output_path)
+        assert actual['state_1'].iloc[:1000].isna().all()
+        assert actual['state_1'].iloc[1000:].notna().any()
+        assert actual['expected_level'].dtype == 'int8'
+        expected = processor.process(pd.read_csv(input_path, dtype={col: object for col in PAIR_COLUMNS}),
+                                     compact=True)
+        assert actual['expected_level'].tolist() == expected['expected_level'].tolist()
+    print("✅ Parquet output schema survives an all-null first chunk")
+
+
+
+def test_cli_reports_missing_pyarrow():
+    """process_file.py exits with a message, not a traceback, without pyarrow."""
+    if importlib.util.find_spec('pyarrow') is not None:
+        pytest.skip("pyarrow installed")
+    processor = GeoProcessor(os.path.join(part1_dir, 'data', 'portugal.json'))
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = os.path.join(tmp, 'pairs.csv')
+        _random_pairs(processor, 10, seed=4).to_csv(input_path, index=False)
+        for args in ([input_path, os.path.join(tmp, 'result.parquet')],
+                     [os.path.join(tmp, 'pairs.parquet'), os.path.join(tmp, 'result.csv')]):
+            result = subprocess.run([sys.executable, os.path.join(part1_dir, 'process_file.py'), *args, '--quiet'],
+                                    capture_output=True, text=True)
+            assert result.returncode == 1, result.stderr
+            assert 'requires pyarrow' in result.stderr and 'Traceback' not in result.stderr
+    print("✅ process_file.py reports a missing pyarrow")
+
+
+if __name__ == '__main__':
+    test_stream_csv_matches_process()
+    try:
+        test_stream_parquet_output_schema()
+    except pytest.skip.Exception as skip:
+        print(f"⚠️  {skip.msg}")
+    try:
+        test_cli_reports_missing_pyarrow()
+    except pytest.skip.Exception as skip:
+        print(f"⚠️  {skip.msg}")
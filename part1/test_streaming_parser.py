@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test the iterative, event-based hierarchy parser.
+"""
+
+import io
+import json
+import sys
+import os
+import tempfile
+
+# Add part1 directory to path to enable imports
+part1_dir = os.path.dirname(os.path.abspath(__file__))
+if part1_dir not in sys.path:
+    sys.path.insert(0, part1_dir)
+
+from src import jsonstream
+from src.jsonstream import _iter_events, build_value
+from src.loader import GeoDataLoader
+from src.snapshot import file_checksum
+
+
+def _reference_locations(data, root_name='portugal'):
+    """(name, admin_level, parent_id) in preorder, walking the dict tree."""
+    locations = []
+    
+    def walk(node, parent_id, name):
+        name = name or node.get("name", "")
+        if node.get("admin_level") is None:
+            return
+        loc_id = len(locations)
+        locations.append((name, node["admin_level"], parent_id))
+        for child_name, child in (node.get("children") or {}).items():
+            walk(child, loc_id, child_name)
+    
+    walk(data, None, root_name)
+    return locations
+
+
+def _loaded_locations(loader):
+    return [(loc.original_name, loc.admin_level, loc.parent_id) for loc in loader.locations]
+
+
+def _load_both_ways(json_path):
+    """Load json_path in memory and streamed; both must agree."""
+    loaded = GeoDataLoader(json_path)
+    limit = jsonstream.IN_MEMORY_LIMIT
+    jsonstream.IN_MEMORY_LIMIT = 0
+    try:
+        streamed = GeoDataLoader(json_path)
+    finally:
+        jsonstream.IN_MEMORY_LIMIT = limit
+    assert _loaded_locations(streamed) == _loaded_locations(loaded)
+    assert streamed.source_checksum == loaded.source_checksum == file_checksum(json_path)
+    return loaded
+
+
+def test_tokenizer_matches_json_module():
+    """Events rebuild the same document as json.loads, whatever the chunk size."""
+    document = {
+        "a": [1, -2.5, 3e2, True, False, None, "x"],
+        "escaped \"key\"": "line\nbreak \\ ão \U0001f600",
+        "nested": {"empty": {}, "list": [[], [{}]], "são": {"admin_level": 8}},
+    }
+    raw = json.dumps(document, ensure_ascii=False).encode('utf-8')
+    for chunk_size in (1, 2, 3, 7, 64, 1 << 20):
+        events = _iter_events(io.BytesIO(raw), chunk_size)
+        event, value = next(events)
+        assert build_value(events, event, value) == document, chunk_size
+        
+        # Bytes already read (see iter_events) are tokenized first
+        events = list(_iter_events(io.BytesIO(raw[chunk_size:]), chunk_size, raw[:chunk_size]))
+        assert events == list(_iter_events(io.BytesIO(raw), 1 << 20)), chunk_size
+    print("✅ Tokenizer matches json.loads for every chunk size")
+
+
+def test_portugal_matches_dict_walk():
+    """Streaming parse numbers portugal.json exactly like the dict walk."""
+    json_path = os.path.join(part1_dir, 'data', 'portugal.json')
+    with open(json_path, encoding='utf-8') as f:
+        expected = _reference_locations(json.load(f))
+    assert _loaded_locations(_load_both_ways(json_path)) == expected
+    print(f"✅ Streaming parser matches the dict walk ({len(expected)} locations)")
+
+
+def test_unusual_nodes_and_deep_trees():
+    """Late admin_levels, unnamed keys, invalid nodes and very deep trees."""
+    data = {
+        "children": {
+            "late": {"children": {"child": {"admin_level": 8}}, "admin_level": 7},
+            "": {"name": "Named By Field", "admin_level": 7},
+            "no level": {"children": {"orphan": {"admin_level": 8}}},
+            "null level": {"admin_level": None},
+            "not a node": 42,
+            "regular": {"admin_level": 6, "extra": [1, {"x": 2}], "children": {
+                "leaf": {"admin_level": 8},
+            }},
+        },
+        "admin_level": 2,
+    }
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, 'tree.json')
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        loader = _load_both_ways(json_path)
+        assert _loaded_locations(loader) == _reference_locations({**data, "children": {
+            key: value for key, value in data["children"].items() if key != "not a node"}})
+        
+        # A chain deeper than the recursion limit
+        deep_path = os.path.join(tmp, 'deep.json')
+        with open(deep_path, 'w', encoding='utf-8') as f:
+            f.write('{"admin_level": 2' + ''.join(f', "children": {{"n{i}": {{"admin_level": 8'
+                                                   for i in range(1500)) + '}}' * 1500 + '}')
+        deep_loader = _load_both_ways(deep_path)
+        assert len(deep_loader.locations) == 1501
+        assert int(deep_loader.depths.max()) == 1500
+    print("✅ Unusual nodes and a 1500-level tree parsed")
+
+
+if __name__ == '__main__':
+    test_tokenizer_matches_json_module()
+    test_portugal_matches_dict_walk()
+    test_unusual_nodes_and_deep_trees()
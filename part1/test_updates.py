@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Test incremental hierarchy updates against a rebuild from the edited JSON.
+"""
+
+import copy
+import itertools
+import json
+import sys
+import os
+import tempfile
+
+import pandas as pd
+
+# Add part1 directory to path to enable imports
+part1_dir = os.path.dirname(os.path.abspath(__file__))
+if part1_dir not in sys.path:
+    sys.path.insert(0, part1_dir)
+
+from src.loader import GeoDataLoader
+from src.processor import GeoProcessor
+from src.resolver import LocationResolver
+
+
+TREE = {
+    "admin_level": 2,
+    "children": {
+        "Lisboa": {"admin_level": 6, "children": {
+            "Sintra": {"admin_level": 7, "children": {
+                "Colares": {"admin_level": 8},
+                "Santa Maria": {"admin_level": 8},
+            }},
+            "Cascais": {"admin_level": 7, "children": {
+                "Alcabideche": {"admin_level": 8},
+            }},
+        }},
+        "Porto": {"admin_level": 6, "children": {
+            "Maia": {"admin_level": 7, "children": {
+                "Santa Maria": {"admin_level": 8},
+                "Moreira": {"admin_level": 8},
+            }},
+        }},
+    },
+}
+
+
+def _path(loader, loc_id):
+    return tuple(loader.locations[a].original_name for a in reversed(loader.ancestor_ids(loc_id)))
+
+
+def _canonical(loader):
+    """Indexes and common ancestor levels keyed by name paths instead of ids."""
+    def paths(ids):
+        return sorted(_path(loader, loc_id) for loc_id in ids)
+    
+    live = [loc_id for loc_id in range(len(loader.locations)) if loc_id not in loader.removed]
+    resolver = LocationResolver(loader)
+    levels = {}
+    for a, b in itertools.combinations(live, 2):
+        level = resolver.find_common_ancestor_level(loader.locations[a], loader.locations[b])
+        levels[tuple(sorted((_path(loader, a), _path(loader, b))))] = level
+    return (
+        {city: paths(ids) for city, ids in loader.by_city.items()},
+        {key: paths(ids) for key, ids in loader.by_city_state.items()},
+        levels,
+    )
+
+
+def _find(loader, *path):
+    return next(loc_id for loc_id in range(len(loader.locations))
+                if loc_id not in loader.removed and _path(loader, loc_id) == ("portugal",) + path)
+
+
+def _fresh_loader(tmp, tree):
+    json_path = os.path.join(tmp, 'edited.json')
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(tree, f)
+    return GeoDataLoader(json_path)
+
+
+def test_updates_match_rebuild():
+    """Every update leaves the same indexes as parsing the edited JSON."""
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, 'tree.json')
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(TREE, f)
+        loader = GeoDataLoader(json_path)
+        expected = copy.deepcopy(TREE)
+        lisboa = expected["children"]["Lisboa"]["children"]
+        porto = expected["children"]["Porto"]["children"]
+        
+        loader.add_subtree(_find(loader, "Porto"), "Gaia", {"admin_level": 7, "children": {
+            "Avintes": {"admin_level": 8}, "Colares": {"admin_level": 8}}})
+        porto["Gaia"] = {"admin_level": 7, "children": {
+            "Avintes": {"admin_level": 8}, "Colares": {"admin_level": 8}}}
+        assert _canonical(loader) == _canonical(_fresh_loader(tmp, expected))
+        
+        loader.rename(_find(loader, "Lisboa", "Sintra"), "Sintra Nova")
+        lisboa["Sintra Nova"] = lisboa.pop("Sintra")
+        assert _canonical(loader) == _canonical(_fresh_loader(tmp, expected))
+        
+        loader.move_subtree(_find(loader, "Porto", "Maia"), _find(loader, "Lisboa"))
+        lisboa["Maia"] = porto.pop("Maia")
+        assert _canonical(loader) == _canonical(_fresh_loader(tmp, expected))
+        
+        removed = loader.remove_subtree(_find(loader, "Lisboa", "Cascais"))
+        del lisboa["Cascais"]
+        assert len(removed) == 2
+        assert _canonical(loader) == _canonical(_fresh_loader(tmp, expected))
+        assert loader.get_stats()["total_locations"] == len(loader.locations) - 2
+        
+        # Updates survive a snapshot round trip
+        snapshot_path = os.path.join(tmp, 'tree.snap')
+        loader.save_snapshot(snapshot_path)
+        restored = GeoDataLoader.load_snapshot(snapshot_path)
+        assert restored.removed == loader.removed
+        assert _canonical(restored) == _canonical(loader)
+    print("✅ Add, rename, move and remove match a rebuild")
+
+
+def test_invalid_updates():
+    """Unknown ids and cycles are rejected without touching the hierarchy."""
+    with tempfile.TemporaryDirectory() as tmp:
+        loader = _fresh_loader(tmp, TREE)
+        before = _canonical(loader)
+        lisboa = _find(loader, "Lisboa")
+        sintra = _find(loader, "Lisboa", "Sintra")
+        
+        for update in (lambda: loader.move_subtree(lisboa, sintra),
+                       lambda: loader.add_subtree(len(loader.locations), "X", {"admin_level": 8}),
+                       lambda: loader.add_subtree(lisboa, "X", {"children": {}})):
+            try:
+                update()
+            except (KeyError, ValueError):
+                pass
+            else:
+                raise AssertionError("invalid update accepted")
+        
+        loader.remove_subtree(sintra)
+        try:
+            loader.rename(sintra, "Y")
+        except KeyError:
+            pass
+        else:
+            raise AssertionError("renamed a removed location")
+        assert loader.version == 1
+        assert before != _canonical(loader)
+    print("✅ Invalid updates rejected")
+
+
+def test_processor_sees_updates():
+    """Resolution and pair caches are dropped when the hierarchy changes."""
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, 'tree.json')
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(TREE, f)
+        processor = GeoProcessor(json_path, pair_cache_size=100)
+        df = pd.DataFrame({
+            'id_1': [1, 2], 'city_1': ['Colares', 'Moreira'], 'state_1': ['', ''],
+            'id_2': [3, 4], 'city_2': ['Alcabideche', 'Avintes'], 'state_2': ['', ''],
+        })
+        
+        for batch in (True, False):
+            assert processor.process(df, batch=batch)['expected_level'].tolist() == [6, 2]
+        
+        loader = processor.loader
+        loader.add_subtree(_find(loader, "Porto", "Maia"), "Avintes", {"admin_level": 8})
+        loader.move_subtree(_find(loader, "Lisboa", "Cascais", "Alcabideche"), _find(loader, "Lisboa", "Sintra"))
+        for batch in (True, False):
+            assert processor.process(df, batch=batch)['expected_level'].tolist() == [7, 7]
+    print("✅ Processor results follow hierarchy updates")
+
+
+if __name__ == '__main__':
+    test_updates_match_rebuild()
+    test_invalid_updates()
+    test_processor_sees_updates()